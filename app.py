@@ -1,12 +1,30 @@
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for
+from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, Response, stream_with_context
 import os
 import re
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import io
+import csv
+import zlib
+import itertools
+import tempfile
 import base64
 from werkzeug.utils import secure_filename
 import uuid
+import time
+import sqlite3
+import hashlib
+import importlib.util
+import zipfile
+import threading
+import shutil
+import random
+import math
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 
 # Optional imports with fallbacks
 try:
@@ -16,11 +34,9 @@ except ImportError:
     TESSERACT_AVAILABLE = False
     print("Warning: pytesseract not available")
 
-try:
-    import easyocr
-    EASYOCR_AVAILABLE = True
-except ImportError:
-    EASYOCR_AVAILABLE = False
+# EasyOCR pulls in torch, so only check it is installed; it is imported on first use
+EASYOCR_AVAILABLE = importlib.util.find_spec('easyocr') is not None
+if not EASYOCR_AVAILABLE:
     print("Warning: easyocr not available")
 
 try:
@@ -45,103 +61,80 @@ except ImportError:
     print("Warning: numpy not available")
 
 try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
+    import fitz  # PyMuPDF
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+    print("Warning: PyMuPDF not available")
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
 except ImportError:
-    PANDAS_AVAILABLE = False
-    print("Warning: pandas not available")
+    PYARROW_AVAILABLE = False
+    print("Warning: pyarrow not available")
 
 try:
-    import plotly.graph_objs as go
-    import plotly.utils
-    PLOTLY_AVAILABLE = True
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    OPENPYXL_AVAILABLE = True
 except ImportError:
-    PLOTLY_AVAILABLE = False
-    print("Warning: plotly not available")
+    OPENPYXL_AVAILABLE = False
+    print("Warning: openpyxl not available")
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'innovo_automation_2024'
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['OCR_WORKERS'] = int(os.environ.get('OCR_WORKERS', 2))  # OCR pool size
+app.config['OCR_POOL'] = os.environ.get('OCR_POOL', 'process')  # 'process' or 'thread'
+app.config['OCR_BACKEND'] = os.environ.get('OCR_BACKEND', 'auto')  # auto, easyocr, tesseract or mock
+app.config['OCR_MIN_ACCURACY'] = float(os.environ.get('OCR_MIN_ACCURACY', 0.8))  # for auto selection
+app.config['OCR_ESCALATE_CONFIDENCE'] = float(os.environ.get('OCR_ESCALATE_CONFIDENCE', 0))  # 0 = never
+app.config['OCR_CONCURRENCY'] = int(os.environ.get('OCR_CONCURRENCY', os.cpu_count() or 1))  # concurrent reads per engine per process
+app.config['OCR_REGIONS'] = os.environ.get('OCR_REGIONS', '1').lower() in ('1', 'true', 'yes')  # OCR detected text blocks only
+app.config['OCR_REGION_MAX_COVERAGE'] = float(os.environ.get('OCR_REGION_MAX_COVERAGE', 0.6))  # denser pages are OCR'd whole
+app.config['OCR_BANDS'] = int(os.environ.get('OCR_BANDS', 0))  # OCR pages top-down in this many bands, stopping early; 0 = off
+app.config['OCR_BAND_CONFIDENCE'] = float(os.environ.get('OCR_BAND_CONFIDENCE', 0.6))  # OCR confidence required fields need to stop early
+app.config['OCR_PRELOAD'] = os.environ.get('OCR_PRELOAD', '').lower() in ('1', 'true', 'yes')  # load engines at worker start
+app.config['UPLOAD_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))  # must stay under MAX_CONTENT_LENGTH
+app.config['MAX_UPLOAD_SIZE'] = int(os.environ.get('MAX_UPLOAD_SIZE', 1024 * 1024 * 1024))  # chunked uploads
+app.config['UPLOAD_EXPIRY'] = int(os.environ.get('UPLOAD_EXPIRY', 24 * 3600))  # seconds before an idle upload is dropped
+app.config['MAX_JOBS'] = int(os.environ.get('MAX_JOBS', 1000))  # jobs kept for polling
+app.config['OCR_BATCH_SIZE'] = int(os.environ.get('OCR_BATCH_SIZE', 8))  # documents per batched OCR call
+app.config['ALLOWED_EXTENSIONS'] = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.pdf'}
+app.config['PREPROCESS_PROFILE'] = os.environ.get('PREPROCESS_PROFILE', 'quality')  # default tier
+app.config['PDF_DPI'] = int(os.environ.get('PDF_DPI', 200))  # PDF page rasterization resolution
+app.config['PDF_MAX_PAGES'] = int(os.environ.get('PDF_MAX_PAGES', 50))  # pages OCR'd per PDF
+app.config['DATABASE'] = os.environ.get('DATABASE', 'idp.sqlite3')  # processed documents store
+app.config['ANALYTICS_DAYS'] = int(os.environ.get('ANALYTICS_DAYS', 90))  # days shown in charts
+app.config['ANALYTICS_CHART_POINTS'] = int(os.environ.get('ANALYTICS_CHART_POINTS', 30))  # max points per series
+app.config['EXPORT_CHUNK_ROWS'] = int(os.environ.get('EXPORT_CHUNK_ROWS', 5000))  # rows per Parquet/XLSX chunk
+app.config['AUTOMATION_SINK'] = os.environ.get('AUTOMATION_SINK', 'file:deliveries.jsonl')  # file:<path> or http(s) URL
+app.config['AUTOMATION_BATCH_SIZE'] = int(os.environ.get('AUTOMATION_BATCH_SIZE', 50))  # records per delivery
+app.config['AUTOMATION_MAX_ATTEMPTS'] = int(os.environ.get('AUTOMATION_MAX_ATTEMPTS', 5))  # before a record fails
+app.config['AUTOMATION_RETRY_BASE'] = float(os.environ.get('AUTOMATION_RETRY_BASE', 1.0))  # seconds, doubled per attempt
+app.config['AUTOMATION_RETRY_MAX'] = float(os.environ.get('AUTOMATION_RETRY_MAX', 300))  # backoff ceiling in seconds
+app.config['AUTOMATION_TIMEOUT'] = float(os.environ.get('AUTOMATION_TIMEOUT', 10))  # per delivery, also the claim lease
+app.config['SSE_INTERVAL'] = float(os.environ.get('SSE_INTERVAL', 0.25))  # seconds between event stream checks
+app.config['SSE_STREAM_SECONDS'] = int(os.environ.get('SSE_STREAM_SECONDS', 300))  # streams end (and clients reconnect) after this
+app.config['SSE_SYNC_STREAM_SECONDS'] = int(os.environ.get('SSE_SYNC_STREAM_SECONDS', 20))  # cap on single-threaded workers; keep below their timeout
+app.config['CACHE_FOLDER'] = os.environ.get('CACHE_FOLDER', 'cache')  # OCR result cache
+app.config['CACHE_MEMORY_ENTRIES'] = int(os.environ.get('CACHE_MEMORY_ENTRIES', 256))
+app.config['CACHE_DISK_BYTES'] = int(os.environ.get('CACHE_DISK_BYTES', 256 * 1024 * 1024))
 
 # Create upload directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs('static/sample_docs', exist_ok=True)
 
-# Initialize OCR readers
-if EASYOCR_AVAILABLE:
-    try:
-        easyocr_reader = easyocr.Reader(['en'])
-        ocr_available = True
-    except:
-        ocr_available = False
-        print("EasyOCR initialization failed")
-else:
-    ocr_available = False
-    print("EasyOCR not available")
-
-# Global variables for analytics
-processed_documents = []
-total_processing_time = 0
-manual_processing_time = 5  # minutes per document
-automated_processing_time = 0.33  # 20 seconds
-
-class DocumentProcessor:
-    def __init__(self):
-        self.patterns = {
-            'invoice_number': [
-                r'(?:invoice|inv)[\s#:]*([A-Z0-9-]+)',
-                r'(?:no|number)[\s#:]*([A-Z0-9-]+)',
-                r'#([A-Z0-9-]+)'
-            ],
-            'company_name': [
-                r'^([A-Za-z\s&.,]+?)(?:\n|$)',
-                r'(?:from|bill\s*to)[\s:]*([A-Za-z\s&.,]+)',
-                r'^([A-Za-z\s&.,]+?)(?:\s+invoice|\s+receipt)'
-            ],
-            'date': [
-                r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-                r'(\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+\d{2,4})',
-                r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})'
-            ],
-            'amount': [
-                r'(?:total|amount|sum)[\s:]*[\$₹€£]?([\d,]+\.?\d*)',
-                r'[\$₹€£]([\d,]+\.?\d*)',
-                r'([\d,]+\.?\d*)\s*(?:dollars?|rupees?|euros?|pounds?)'
-            ],
-            'tax': [
-                r'(?:tax|vat|gst)[\s:]*[\$₹€£]?([\d,]+\.?\d*)',
-                r'(\d+\.?\d*%)\s*(?:tax|vat|gst)'
-            ]
-        }
+def mock_ocr_text(image_path):
+    """Mock OCR extraction for demo purposes when OCR is not available"""
+    # Return sample extracted text based on filename
+    filename = os.path.basename(image_path).lower()
     
-    def extract_text(self, image_path):
-        """Extract text from image using OCR"""
-        try:
-            # Try EasyOCR first
-            if ocr_available and EASYOCR_AVAILABLE:
-                result = easyocr_reader.readtext(image_path)
-                text = ' '.join([item[1] for item in result])
-            elif TESSERACT_AVAILABLE and PILLOW_AVAILABLE:
-                # Fallback to Tesseract
-                image = Image.open(image_path)
-                text = pytesseract.image_to_string(image)
-            else:
-                # Mock OCR for demo purposes
-                text = self.mock_ocr_extraction(image_path)
-            
-            return text
-        except Exception as e:
-            print(f"OCR Error: {e}")
-            return self.mock_ocr_extraction(image_path)
-    
-    def mock_ocr_extraction(self, image_path):
-        """Mock OCR extraction for demo purposes when OCR is not available"""
-        # Return sample extracted text based on filename
-        filename = os.path.basename(image_path).lower()
-        
-        if 'invoice' in filename:
-            return """
+    if 'invoice' in filename:
+        return """
             INVOICE
             Invoice #: INV-2024-001
             Date: 15/12/2024
@@ -158,8 +151,8 @@ class DocumentProcessor:
             Thank you for your business!
             Payment due within 30 days
             """
-        elif 'receipt' in filename:
-            return """
+    elif 'receipt' in filename:
+        return """
             Coffee Corner
             Receipt #RCP-1001
             Date: 15/12/2024
@@ -171,8 +164,8 @@ class DocumentProcessor:
             Thank you for visiting!
             Have a great day!
             """
-        elif 'form' in filename:
-            return """
+    elif 'form' in filename:
+        return """
             Project Request Form
             Date: 15/12/2024
             
@@ -189,35 +182,1017 @@ class DocumentProcessor:
             
             Signature: John Smith
             """
+    else:
+        return "Sample document text for demonstration purposes."
+
+def mean_confidence(items):
+    """Mean confidence of OCR items, 0 when there are none"""
+    return sum(item[2] for item in items) / len(items) if items else 0.0
+
+class OCRBackend:
+    """An OCR engine behind a common interface
+    
+    read() returns EasyOCR-style items: (bounding box, text, confidence).
+    Callers hold slot() around reads; engines that are not thread safe get a
+    single slot, so threads in one process take turns instead of sharing
+    model state.
+    """
+    name = 'base'
+    separator = ' '
+    thread_safe = True
+    reads_pixels = True  # False for engines whose output does not depend on the image
+    slots = None
+    
+    def available(self):
+        """Whether the engine is installed in this environment"""
+        return True
+    
+    def load(self):
+        """Load models or check binaries; called once per process by the registry"""
+    
+    def limit(self, concurrency):
+        """Cap concurrent reads in this process"""
+        self.slots = threading.BoundedSemaphore(max(1, concurrency) if self.thread_safe else 1)
+    
+    def slot(self):
+        """Context manager holding one read slot; unlimited until the registry loads the engine"""
+        return self.slots or nullcontext()
+    
+    def read(self, image, file_name=None):
+        raise NotImplementedError
+    
+    def read_batch(self, images, file_names):
+        """OCR several images; engines with native batching override this"""
+        return [self.read(image, name) for image, name in zip(images, file_names)]
+    
+    def text(self, items):
+        """Join OCR items into the document text"""
+        return self.separator.join(item[1] for item in items)
+
+class EasyOCRBackend(OCRBackend):
+    name = 'easyocr'
+    thread_safe = False  # the reader's torch model is not safe to call from several threads
+    
+    def available(self):
+        return EASYOCR_AVAILABLE
+    
+    def load(self):
+        import easyocr
+        self.reader = easyocr.Reader(['en'])
+    
+    def read(self, image, file_name=None):
+        return self.reader.readtext(image)
+    
+    def read_batch(self, images, file_names):
+        # EasyOCR batches only same-sized images, so group them by dimensions
+        groups = {}
+        for index, image in enumerate(images):
+            shape = image.shape if NUMPY_AVAILABLE and isinstance(image, np.ndarray) else None
+            groups.setdefault(shape, []).append(index)
+        
+        results = [None] * len(images)
+        for shape, indexes in groups.items():
+            if shape is None or len(indexes) == 1:
+                for index in indexes:
+                    results[index] = self.read(images[index])
+                continue
+            
+            batched = self.reader.readtext_batched([images[i] for i in indexes])
+            for index, items in zip(indexes, batched):
+                results[index] = items
+        return results
+
+class TesseractBackend(OCRBackend):
+    name = 'tesseract'
+    separator = '\n'
+    
+    def available(self):
+        return TESSERACT_AVAILABLE and PILLOW_AVAILABLE
+    
+    def load(self):
+        # Fails fast when pytesseract is installed but the tesseract binary is not
+        pytesseract.get_tesseract_version()
+    
+    def read(self, image, file_name=None):
+        if isinstance(image, (bytes, bytearray)):
+            image = Image.open(io.BytesIO(image))
+        elif isinstance(image, str):
+            image = Image.open(image)
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        
+        # Group recognised words into lines, one item per line
+        lines = OrderedDict()
+        for i, word in enumerate(data['text']):
+            if word.strip():
+                key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+                lines.setdefault(key, []).append(i)
+        
+        items = []
+        for indexes in lines.values():
+            left = min(data['left'][i] for i in indexes)
+            top = min(data['top'][i] for i in indexes)
+            right = max(data['left'][i] + data['width'][i] for i in indexes)
+            bottom = max(data['top'][i] + data['height'][i] for i in indexes)
+            confidences = [float(data['conf'][i]) for i in indexes if float(data['conf'][i]) >= 0]
+            confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+            text = ' '.join(data['text'][i] for i in indexes)
+            items.append(([[left, top], [right, top], [right, bottom], [left, bottom]], text, confidence))
+        return items
+
+class MockBackend(OCRBackend):
+    """Canned text chosen by file name, for demos without an OCR engine"""
+    name = 'mock'
+    reads_pixels = False
+    
+    def read(self, image, file_name=None):
+        return [(None, mock_ocr_text(file_name or ''), 1.0)]
+
+# Reference document for the startup self-benchmark and words it must yield
+OCR_BENCHMARK_SAMPLE = os.path.join('static', 'sample_docs', 'invoice_1.png')
+OCR_BENCHMARK_WORDS = ['invoice', 'date', 'bill', 'business', 'street', 'sydney', 'australia',
+                       'description', 'amount', 'professional', 'services', 'gst', 'total',
+                       'thank', 'payment', 'due']
+
+class OCREngineRegistry:
+    """OCR backends loaded on first use, one shared instance per process
+    
+    With OCR_BACKEND=auto, select() benchmarks every installed backend on a
+    sample document and routes traffic to the fastest one whose accuracy
+    meets OCR_MIN_ACCURACY.
+    """
+    
+    def __init__(self, backends, config):
+        self.backends = OrderedDict((backend.name, backend) for backend in backends)
+        self.config = config
+        self.loaded = set()
+        self.load_times = {}
+        self.failures = {}
+        self.benchmarks = {}
+        self.selected = None
+        self.lock = threading.RLock()
+    
+    def get(self, name):
+        """The loaded backend, or None if it is unavailable or failed to load"""
+        if name in self.loaded:
+            return self.backends[name]
+        
+        with self.lock:
+            if name in self.loaded:
+                return self.backends[name]
+            backend = self.backends.get(name)
+            if backend is None or name in self.failures or not backend.available():
+                return None
+            
+            start = time.perf_counter()
+            try:
+                backend.load()
+            except Exception as e:
+                self.failures[name] = str(e)
+                print(f"{name} initialization failed: {e}")
+                return None
+            self.load_times[name] = time.perf_counter() - start
+            backend.limit(self.config['OCR_CONCURRENCY'])
+            self.loaded.add(name)
+            print(f"Loaded OCR engine {name} in {self.load_times[name]:.2f}s")
+            return backend
+    
+    def warm_up(self):
+        """Load every available backend now instead of on the first document"""
+        for name in self.backends:
+            self.get(name)
+        return dict(self.load_times)
+    
+    def select(self, prepare):
+        """Backend to route documents to; prepare(bytes) preprocesses the benchmark sample"""
+        if self.selected is not None:
+            return self.selected
+        
+        with self.lock:
+            if self.selected is not None:
+                return self.selected
+            
+            choice = self.config['OCR_BACKEND']
+            if choice != 'auto':
+                self.selected = self.get(choice)
+                if self.selected is None:
+                    print(f"OCR backend {choice} unavailable, selecting automatically")
+            
+            if self.selected is None:
+                candidates = [name for name in self.backends if name != 'mock' and self.get(name)]
+                if len(candidates) > 1:
+                    self.benchmarks = self.benchmark(candidates, prepare)
+                    accurate = [name for name, result in self.benchmarks.items()
+                                if result['accuracy'] >= self.config['OCR_MIN_ACCURACY']]
+                    if accurate:
+                        candidates = sorted(accurate, key=lambda name: self.benchmarks[name]['latency'])
+                    elif self.benchmarks:
+                        candidates = sorted(self.benchmarks, key=lambda name: -self.benchmarks[name]['accuracy'])
+                self.selected = self.get(candidates[0]) if candidates else self.get('mock')
+            
+            print(f"OCR backend: {self.selected.name}",
+                  self.benchmarks.get(self.selected.name, '(no self-benchmark)'))
+            return self.selected
+    
+    def benchmark(self, names, prepare):
+        """Per-page latency (seconds) and reference-word accuracy for each backend"""
+        try:
+            with open(OCR_BENCHMARK_SAMPLE, 'rb') as f:
+                image = prepare(f.read())
+        except OSError as e:
+            print(f"OCR self-benchmark skipped: {e}")
+            return {}
+        
+        results = {}
+        for name in names:
+            backend = self.backends[name]
+            try:
+                with backend.slot():
+                    backend.read(image)  # first call pays one-off initialisation
+                    start = time.perf_counter()
+                    text = backend.text(backend.read(image)).lower()
+                    latency = time.perf_counter() - start
+            except Exception as e:
+                print(f"OCR self-benchmark failed for {name}: {e}")
+                continue
+            accuracy = sum(word in text for word in OCR_BENCHMARK_WORDS) / len(OCR_BENCHMARK_WORDS)
+            results[name] = {'latency': round(latency, 3), 'accuracy': round(accuracy, 3)}
+        return results
+    
+    def escalation(self, backend):
+        """More accurate backend to retry low-confidence pages with, if any"""
+        current = self.benchmarks.get(backend.name, {}).get('accuracy', 0)
+        stronger = [name for name, result in self.benchmarks.items() if result['accuracy'] > current]
+        if not stronger:
+            return None
+        return self.get(max(stronger, key=lambda name: self.benchmarks[name]['accuracy']))
+
+ocr_registry = OCREngineRegistry([EasyOCRBackend(), TesseractBackend(), MockBackend()], app.config)
+
+# Image preprocessing tiers, cheapest first. Downscaling targets a DPI assuming
+# letter/A4-width pages; None keeps the full scan resolution.
+PAGE_WIDTH_INCHES = 8.5
+PREPROCESS_PROFILES = {
+    'fast': {'target_dpi': 150, 'denoise': 'median'},
+    'balanced': {'target_dpi': 300, 'denoise': 'bilateral'},
+    'quality': {'target_dpi': None, 'denoise': 'nlmeans'}
+}
+
+# Text block detection: closing kernel as a fraction of the page size, padding
+# kept around each block, smallest block kept, and the most blocks OCR'd one by
+# one before whole-page OCR is cheaper
+REGION_KERNEL = (1 / 40, 1 / 120)
+REGION_MARGIN = 8
+REGION_MIN_SIZE = 12
+REGION_MAX_BLOCKS = 40
+
+# Document classification: keyword weights per type over word tokens, and the
+# score the best type must reach before a document stops being 'Unknown'.
+# Types are listed in tie-break order.
+DOCUMENT_KEYWORDS = {
+    'Invoice': {'invoice': 4, 'inv': 1, 'bill': 1.5, 'due': 1, 'payment': 1, 'terms': 0.5,
+                'description': 0.5, 'abn': 1},
+    'Receipt': {'receipt': 4, 'cashier': 1.5, 'cash': 1, 'change': 1, 'visiting': 1.5, 'card': 0.5,
+                'paid': 0.5},
+    'Form': {'form': 4, 'signature': 1.5, 'contact': 1, 'timesheet': 2, 'timeline': 1, 'status': 1,
+             'request': 0.5, 'report': 0.5, 'applicant': 1.5}
+}
+CLASSIFIER_MIN_SCORE = 2
+TOKEN_PATTERN = re.compile(r'[a-z]+')
+
+# Fields that let banded OCR stop before the bottom of a page, per document
+# type. Invoice totals sit at the foot of the page, so stopping after the
+# header leaves them out; types not listed are always read to the end.
+REQUIRED_FIELDS = {
+    'Invoice': ('invoice_number', 'company_name', 'date'),
+    'Receipt': ('invoice_number', 'company_name', 'date', 'amount'),
+    'Form': ('form_type', 'company_name', 'date')
+}
+
+# Global variables for analytics
+manual_processing_time = 5  # minutes per document
+automated_processing_time = 0.33  # 20 seconds
+
+# Upper bounds (seconds) of the processing time histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+# Pipeline stages timed per document, and their (finer) histogram buckets
+PIPELINE_STAGES = ('decode', 'preprocess', 'ocr', 'extraction', 'persistence')
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+def latency_bucket(seconds, buckets=LATENCY_BUCKETS):
+    """Label of the histogram bucket a duration falls into"""
+    for bound in buckets:
+        if seconds <= bound:
+            return '+Inf' if bound == float('inf') else str(bound)
+
+class StageTimings(dict):
+    """Seconds spent in each pipeline stage, measured with a monotonic clock
+    
+    `on_stage`, if set, is called with each stage's name as it starts.
+    """
+    on_stage = None
+    
+    @contextmanager
+    def measure(self, stage):
+        if self.on_stage is not None:
+            self.on_stage(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self[stage] = self.get(stage, 0) + time.perf_counter() - start
+
+def downsample(days, points):
+    """Merge (day, count, total) buckets into at most `points` series points
+    
+    Each point is labelled with its first day and averages over every
+    document in the merged days.
+    """
+    size = max(1, -(-len(days) // points))
+    series = {'dates': [], 'processing_times': [], 'document_counts': []}
+    for start in range(0, len(days), size):
+        chunk = days[start:start + size]
+        count = sum(c for _, c, _ in chunk)
+        total = sum(t for _, _, t in chunk)
+        series['dates'].append(chunk[0][0])
+        series['processing_times'].append(round(total / count, 3) if count else 0)
+        series['document_counts'].append(count)
+    return series
+
+class DocumentStore:
+    """Processed documents persisted in SQLite, shared by every worker process
+    
+    WAL mode lets readers (analytics, exports) run alongside the writer. Each
+    thread gets its own connection, and connections are never carried across
+    a fork.
+    
+    Running aggregates (totals, per type, per day, per cache outcome and a
+    processing time histogram) are updated in the same transaction as each
+    insert, so analytics never scan the documents table.
+    
+    Extraction jobs are mirrored in the jobs table, so a status poll can land
+    on any worker, not only the one that accepted the job. The deliveries
+    table is the outbound automation queue.
+    """
+    
+    COLUMNS = ['document_type', 'company_name', 'invoice_number', 'date', 'amount', 'tax',
+               'form_type', 'contact_name', 'email', 'phone', 'raw_text', 'processing_time', 'timestamp', 'file_name', 'ocr_cache']
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            document_type TEXT NOT NULL,
+            company_name TEXT,
+            invoice_number TEXT,
+            date TEXT,
+            amount TEXT,
+            tax TEXT,
+            form_type TEXT,
+            contact_name TEXT,
+            email TEXT,
+            phone TEXT,
+            raw_text TEXT,
+            processing_time REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            file_name TEXT,
+            ocr_cache TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_documents_timestamp ON documents (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_documents_document_type ON documents (document_type);
+        CREATE TABLE IF NOT EXISTS aggregates (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (kind, key)
+        );
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            file_name TEXT,
+            submitted_at TEXT NOT NULL,
+            finished_at TEXT,
+            result TEXT,
+            error TEXT,
+            stage TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_submitted_at ON jobs (submitted_at);
+        CREATE TABLE IF NOT EXISTS deliveries (
+            automation_id TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            delivered_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (status, next_attempt_at);
+    """
+    
+    # Columns added to tables that may predate them
+    MIGRATIONS = [
+        'ALTER TABLE jobs ADD COLUMN stage TEXT',
+        'ALTER TABLE documents ADD COLUMN form_type TEXT',
+        'ALTER TABLE documents ADD COLUMN contact_name TEXT',
+        'ALTER TABLE documents ADD COLUMN email TEXT',
+        'ALTER TABLE documents ADD COLUMN phone TEXT'
+    ]
+    
+    UPSERT = """
+        INSERT INTO aggregates (kind, key, count, total) VALUES (?, ?, 1, ?)
+        ON CONFLICT (kind, key) DO UPDATE SET count = count + 1, total = total + excluded.total
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        with self.connect() as conn:
+            conn.executescript(self.SCHEMA)
+            for statement in self.MIGRATIONS:
+                try:
+                    conn.execute(statement)
+                except sqlite3.OperationalError:
+                    pass  # column already there
+            # Workers starting together must not both backfill the aggregates
+            conn.execute('BEGIN IMMEDIATE')
+            self._backfill(conn)
+    
+    def connect(self):
+        """This thread's connection, opened on first use"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+    
+    def _backfill(self, conn):
+        """Build the aggregates for documents stored before they existed"""
+        if conn.execute('SELECT 1 FROM aggregates LIMIT 1').fetchone():
+            return
+        for row in conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM documents").fetchall():
+            self._aggregate(conn, dict(row))
+    
+    def _aggregate(self, conn, result, timings=None):
+        """Fold one document (and its stage timings) into the running aggregates"""
+        seconds = result['processing_time']
+        conn.executemany(self.UPSERT, [
+            ('all', '', seconds),
+            ('type', result['document_type'], seconds),
+            ('day', result['timestamp'][:10], seconds),
+            ('cache', result.get('ocr_cache') or '', seconds),
+            ('latency', latency_bucket(seconds), seconds)
+        ] + [(f'stage:{stage}', latency_bucket(elapsed, STAGE_BUCKETS), elapsed)
+             for stage, elapsed in (timings or {}).items()])
+    
+    def add(self, result):
+        """Persist one processed document and update the aggregates"""
+        placeholders = ', '.join('?' * len(self.COLUMNS))
+        with self.connect() as conn:
+            start = time.perf_counter()
+            conn.execute(f"INSERT INTO documents ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                         [result.get(column) for column in self.COLUMNS])
+            # Persistence covers the insert; the commit happens after it is recorded
+            timings = dict(result.get('timings') or {}, persistence=time.perf_counter() - start)
+            self._aggregate(conn, result, timings)
+    
+    def counts(self, kind):
+        """{key: count} for one kind of aggregate"""
+        rows = self.connect().execute('SELECT key, count FROM aggregates WHERE kind = ?', (kind,))
+        return {key: count for key, count in rows}
+    
+    def summary(self):
+        """Document count and mean processing time"""
+        row = self.connect().execute(
+            "SELECT count, total FROM aggregates WHERE kind = 'all'").fetchone()
+        if not row:
+            return 0, 0
+        return row[0], row[1] / row[0]
+    
+    def type_counts(self):
+        """Documents per document type"""
+        return self.counts('type')
+    
+    def cache_counts(self):
+        """Documents per OCR cache outcome (hit, miss, bypass)"""
+        return self.counts('cache')
+    
+    def histogram(self, kind, buckets=LATENCY_BUCKETS):
+        """Per-bucket counts (in bucket order) and the sum of observations for one kind"""
+        rows = self.connect().execute('SELECT key, count, total FROM aggregates WHERE kind = ?',
+                                      (kind,)).fetchall()
+        counts = {key: count for key, count, _ in rows}
+        labels = [latency_bucket(bound, buckets) for bound in buckets]
+        return {'buckets': labels, 'counts': [counts.get(label, 0) for label in labels],
+                'sum': sum(total for _, _, total in rows)}
+    
+    def latency_histogram(self):
+        """Document counts per processing time bucket, in bucket order"""
+        return self.histogram('latency')
+    
+    def stage_histograms(self):
+        """{stage: histogram} for every pipeline stage observed so far"""
+        rows = self.connect().execute(
+            "SELECT DISTINCT kind FROM aggregates WHERE kind LIKE 'stage:%'").fetchall()
+        stages = sorted((kind.split(':', 1)[1] for kind, in rows),
+                        key=lambda stage: (PIPELINE_STAGES + (stage,)).index(stage))
+        return {stage: self.histogram(f'stage:{stage}', STAGE_BUCKETS) for stage in stages}
+    
+    def daily(self, days):
+        """(day, count, total processing time) for the most recent days, oldest first"""
+        rows = self.connect().execute(
+            "SELECT key, count, total FROM aggregates WHERE kind = 'day' ORDER BY key DESC LIMIT ?",
+            (days,))
+        return [tuple(row) for row in reversed(rows.fetchall())]
+    
+    def save_job(self, job, keep=None):
+        """Insert or update a job record, dropping all but the `keep` newest finished jobs"""
+        result = json.dumps(job['result']) if job['result'] is not None else None
+        with self.connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO jobs (job_id, file_name, submitted_at, finished_at, result, error) '
+                         'VALUES (?, ?, ?, ?, ?, ?)',
+                         (job['job_id'], job['file_name'], job['submitted_at'], job['finished_at'], result, job['error']))
+            if keep is not None and job['finished_at'] is not None:
+                conn.execute('DELETE FROM jobs WHERE finished_at IS NOT NULL AND job_id NOT IN '
+                             '(SELECT job_id FROM jobs ORDER BY submitted_at DESC LIMIT ?)', (keep,))
+    
+    def set_job_stage(self, job_id, stage):
+        """Record the pipeline stage an unfinished job has reached"""
+        with self.connect() as conn:
+            conn.execute('UPDATE jobs SET stage = ? WHERE job_id = ? AND finished_at IS NULL', (stage, job_id))
+    
+    def get_job(self, job_id):
+        """A job record saved by any worker, or None"""
+        row = self.connect().execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+    
+    def add_delivery(self, automation_id, payload):
+        """Queue one outbound automation record"""
+        with self.connect() as conn:
+            conn.execute("INSERT INTO deliveries (automation_id, payload, status, next_attempt_at, created_at) "
+                         "VALUES (?, ?, 'queued', ?, ?)",
+                         (automation_id, json.dumps(payload), time.time(), datetime.now().isoformat()))
+    
+    def claim_deliveries(self, limit, lease):
+        """Mark up to `limit` due records as sending for `lease` seconds and return them
+        
+        A record whose sender died mid-delivery becomes due again once its
+        lease runs out, so another worker picks it up.
+        """
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute("SELECT automation_id, payload, attempts, created_at FROM deliveries "
+                                "WHERE status IN ('queued', 'sending') AND next_attempt_at <= ? "
+                                "ORDER BY next_attempt_at LIMIT ?", (now, limit)).fetchall()
+            conn.executemany("UPDATE deliveries SET status = 'sending', next_attempt_at = ? WHERE automation_id = ?",
+                             [(now + lease, row['automation_id']) for row in rows])
+        return [dict(row, payload=json.loads(row['payload'])) for row in rows]
+    
+    def finish_deliveries(self, automation_ids):
+        with self.connect() as conn:
+            conn.executemany("UPDATE deliveries SET status = 'delivered', attempts = attempts + 1, error = NULL, "
+                             "delivered_at = ? WHERE automation_id = ?",
+                             [(datetime.now().isoformat(), automation_id) for automation_id in automation_ids])
+    
+    def retry_deliveries(self, retries, error):
+        """Record a failed attempt; `retries` maps automation_id to its next attempt time, None to give up"""
+        with self.connect() as conn:
+            conn.executemany("UPDATE deliveries SET status = ?, attempts = attempts + 1, error = ?, "
+                             "next_attempt_at = COALESCE(?, next_attempt_at) WHERE automation_id = ?",
+                             [('failed' if at is None else 'queued', error, at, automation_id)
+                              for automation_id, at in retries.items()])
+    
+    def get_delivery(self, automation_id):
+        """Status of one outbound record, or None"""
+        row = self.connect().execute(
+            'SELECT automation_id, status, attempts, error, created_at, delivered_at FROM deliveries '
+            'WHERE automation_id = ?', (automation_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def pending_deliveries(self):
+        """Records not yet delivered or given up on"""
+        return self.connect().execute(
+            "SELECT COUNT(*) FROM deliveries WHERE status IN ('queued', 'sending')").fetchone()[0]
+    
+    def iter_documents(self, batch_size=500, start=None, end=None, document_type=None):
+        """Stored documents as dicts, fetched in batches
+        
+        `start` (inclusive) and `end` (exclusive) bound the ISO processing
+        timestamp, which is indexed.
+        """
+        clauses, params = [], []
+        if start:
+            clauses.append('timestamp >= ?')
+            params.append(start)
+        if end:
+            clauses.append('timestamp < ?')
+            params.append(end)
+        if document_type:
+            clauses.append('document_type = ?')
+            params.append(document_type)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        cursor = self.connect().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM documents {where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
+document_store = DocumentStore(app.config['DATABASE'])
+
+class OCRCache:
+    """Content-addressed OCR text cache with LRU eviction in memory and on disk"""
+    
+    def __init__(self, folder, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.folder = folder
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        # Kept current on every write and eviction so stats() never scans the folder
+        self.disk_bytes = sum(size for _, size, _ in self._disk_entries())
+    
+    @staticmethod
+    def make_key(content, settings):
+        """Hash of the document bytes plus every setting that changes the OCR output"""
+        digest = hashlib.sha256(content)
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.txt")
+    
+    def _remember(self, key, text):
+        with self.lock:
+            self.memory[key] = text
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+    
+    def get(self, key):
+        """Cached text for key, or None"""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+        
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            os.utime(path)  # mtime doubles as the disk LRU clock
+        except OSError:
+            return None
+        
+        self._remember(key, text)
+        return text
+    
+    def put(self, key, text):
+        """Store text in memory and on disk, evicting least recently used entries"""
+        self._remember(key, text)
+        
+        data = text.encode('utf-8')
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"OCR cache write error: {e}")
+            return
+        
+        with self.lock:
+            self.disk_bytes += len(data) - replaced
+            over_limit = self.disk_bytes > self.max_bytes
+        if over_limit:
+            self._evict_disk()
+    
+    def clear(self):
+        """Drop every entry, in memory and on disk"""
+        with self.lock:
+            self.memory.clear()
+            for _, _, path in self._disk_entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.disk_bytes = 0
+    
+    def stats(self):
+        """Entry count in memory and bytes held on disk, without touching the filesystem"""
+        with self.lock:
+            return {'memory_entries': len(self.memory), 'disk_bytes': self.disk_bytes}
+    
+    def _disk_entries(self):
+        entries = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.txt'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+    
+    def _evict_disk(self):
+        # Trim to 90% of the budget so we don't evict on every subsequent write
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self.lock:
+            self.disk_bytes = total
+
+ocr_cache = OCRCache(app.config['CACHE_FOLDER'],
+                     max_entries=app.config['CACHE_MEMORY_ENTRIES'],
+                     max_bytes=app.config['CACHE_DISK_BYTES'])
+
+class FieldExtractor:
+    """Regex field extraction with every pattern compiled once up front
+    
+    Each field tries its patterns in order and keeps the first match, exactly
+    like calling re.search per pattern, without per-call compile cache lookups.
+    """
+    
+    def __init__(self, patterns, flags=re.IGNORECASE | re.MULTILINE):
+        self.plan = []
+        for field, field_patterns in patterns.items():
+            searches = []
+            for pattern in field_patterns:
+                regex = re.compile(pattern, flags)
+                if regex.groups < 1:
+                    raise ValueError(f"Pattern for '{field}' needs a capture group: {pattern}")
+                searches.append(regex.search)
+            self.plan.append((field, tuple(searches)))
+    
+    def extract(self, text):
+        """First match per field as {field: value}; fields without a match are omitted"""
+        found = {}
+        for field, searches in self.plan:
+            for search in searches:
+                match = search(text)
+                if match:
+                    found[field] = match.group(1).strip()
+                    break
+        return found
+
+class DocumentClassifier:
+    """Keyword-weighted document type classifier over token counts
+    
+    Keyword counts are log-damped, so a heading outweighs a stray mention but
+    a word repeated down a page does not swamp the other evidence. Scoring is
+    one matrix-vector product with NumPy and plain sums without it.
+    """
+    
+    def __init__(self, keywords, min_score=CLASSIFIER_MIN_SCORE):
+        self.types = list(keywords)
+        self.vocabulary = {token: index for index, token in
+                           enumerate(sorted({token for weights in keywords.values() for token in weights}))}
+        rows = [[weights.get(token, 0) for token in self.vocabulary] for weights in keywords.values()]
+        self.weights = np.array(rows, dtype=np.float32) if NUMPY_AVAILABLE else rows
+        self.min_score = min_score
+    
+    def counts(self, text):
+        """Occurrences of each vocabulary token in the text"""
+        counts = [0] * len(self.vocabulary)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            index = self.vocabulary.get(token)
+            if index is not None:
+                counts[index] += 1
+        return counts
+    
+    def scores(self, text):
+        """{document type: score}"""
+        counts = self.counts(text)
+        if NUMPY_AVAILABLE:
+            totals = self.weights @ np.log1p(np.array(counts, dtype=np.float32))
         else:
-            return "Sample document text for demonstration purposes."
+            damped = [math.log1p(count) for count in counts]
+            totals = [sum(weight * count for weight, count in zip(row, damped)) for row in self.weights]
+        return {doc_type: float(total) for doc_type, total in zip(self.types, totals)}
+    
+    def classify(self, text):
+        """Best scoring type, or 'Unknown' when none reaches min_score"""
+        scores = self.scores(text)
+        best = max(self.types, key=scores.get)  # ties go to the type listed first
+        return best if scores[best] >= self.min_score else 'Unknown'
+
+class DocumentProcessor:
+    def __init__(self):
+        self.region_lock = threading.Lock()
+        self.region_pool = None  # (pid, executor) for OCRing text blocks
+        self.patterns = {
+            'invoice_number': [
+                r'(?:invoice|inv)[\s#:]*([A-Z0-9-]+)',
+                r'(?:no|number)[\s#:]*([A-Z0-9-]+)',
+                r'#([A-Z0-9-]+)'
+            ],
+            'company_name': [
+                r'^([A-Za-z\s&.,]+?)(?:\n|$)',
+                r'(?:from|bill\s*to)[\s:]*([A-Za-z\s&.,]+)',
+                r'^([A-Za-z\s&.,]+?)(?:\s+invoice|\s+receipt)'
+            ],
+            'date': [
+                r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+                r'(\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+\d{2,4})',
+                r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})'
+            ],
+            'amount': [
+                r'(?:total|amount|sum)[\s:]*[\$₹€£]?([\d,]+\.?\d*)',
+                r'[\$₹€£]([\d,]+\.?\d*)',
+                r'([\d,]+\.?\d*)\s*(?:dollars?|rupees?|euros?|pounds?)'
+            ],
+            'tax': [
+                r'(?:tax|vat|gst)[\s:]*[\$₹€£]?([\d,]+\.?\d*)',
+                r'(\d+\.?\d*%)\s*(?:tax|vat|gst)'
+            ]
+        }
+        # Per-type extraction plans; unclassified documents get every pattern.
+        # Receipts skip the invoice and bill-to patterns, forms trade invoice
+        # numbers and tax for their own header and contact fields.
+        self.plans = {
+            'Invoice': self.patterns,
+            'Receipt': {
+                'invoice_number': [
+                    r'receipt[\s#:]*([A-Z0-9-]+)',
+                    r'(?:no|number)[\s#:]*([A-Z0-9-]+)',
+                    r'#([A-Z0-9-]+)'
+                ],
+                'company_name': [
+                    r'^([A-Za-z\s&.,]+?)(?:\n|$)',
+                    r'^([A-Za-z\s&.,]+?)(?:\s+receipt)'
+                ],
+                'date': self.patterns['date'],
+                'amount': self.patterns['amount'],
+                'tax': self.patterns['tax']
+            },
+            'Form': {
+                'form_type': [r'^\s*([A-Za-z ]+?)\s+form\b'],
+                'company_name': [
+                    r'(?:company|organi[sz]ation)[\s:]*([A-Za-z\s&.,]+?)\s*$',
+                    r'^([A-Za-z\s&.,]+?)(?:\n|$)'
+                ],
+                'date': self.patterns['date'],
+                'amount': self.patterns['amount'],
+                'contact_name': [r'^\s*name[\s:]*([A-Za-z .]+?)\s*$'],
+                'email': [r'([\w.+-]+@[\w-]+(?:\.[\w-]+)+)'],
+                'phone': [r'(?:phone|tel)[\s:]*(\+?\d[\d ()-]{5,}\d)']
+            }
+        }
+        self.classifier = DocumentClassifier(DOCUMENT_KEYWORDS)
+        self.extractor = FieldExtractor(self.patterns)
+        self.extractors = {doc_type: FieldExtractor(patterns) for doc_type, patterns in self.plans.items()}
+    
+    def ocr_backend(self):
+        """The OCR backend this process routes documents to"""
+        return ocr_registry.select(self.preprocess_image)
+    
+    def ocr_engine(self):
+        """Name of the OCR engine extract_text will use"""
+        return self.ocr_backend().name
+    
+    def ocr_settings(self, profile=None):
+        """Settings that affect OCR output, used to key the OCR cache"""
+        profile = profile or app.config['PREPROCESS_PROFILE']
+        return {
+            'engine': self.ocr_engine(),
+            'preprocess': dict(PREPROCESS_PROFILES[profile], profile=profile) if OPENCV_AVAILABLE else 'none',
+            'languages': ['en'],
+            'regions': app.config['OCR_REGIONS'] and OPENCV_AVAILABLE,
+            # Banded OCR can stop early, so its text may end above the foot of the page
+            'bands': ((app.config['OCR_BANDS'], app.config['OCR_BAND_CONFIDENCE'])
+                      if app.config['OCR_BANDS'] > 1 and OPENCV_AVAILABLE else None)
+        }
+    
+    def extract_text(self, image, file_name=None):
+        """Extract text from image using OCR"""
+        return self.run_ocr(image, file_name)[0]
+    
+    def run_ocr(self, image, file_name=None):
+        """OCR an image, returning the text and the engine that produced it
+        
+        The image may be a decoded array, raw file bytes or a file path; both
+        engines read arrays directly, so nothing is written back to disk.
+        """
+        if file_name is None and isinstance(image, str):
+            file_name = image
+        
+        backend = self.ocr_backend()
+        try:
+            with backend.slot():
+                items = backend.read(image, file_name)
+            return self.escalate(backend, items, image, file_name)
+        except Exception as e:
+            print(f"OCR Error: {e}")
+            return self.mock_ocr_extraction(file_name or ''), 'mock'
     
-    def preprocess_image(self, image_path):
-        """Preprocess image for better OCR results"""
+    def escalate(self, backend, items, image, file_name):
+        """Text for OCR items, re-reading low-confidence pages with a more accurate backend"""
+        backend, items = self.escalated(backend, items, image, file_name)
+        return backend.text(items), backend.name
+    
+    def escalated(self, backend, items, image, file_name):
+        """(backend, items) after re-reading a low-confidence image with a more accurate backend"""
+        threshold = app.config['OCR_ESCALATE_CONFIDENCE']
+        if threshold and items:
+            stronger = ocr_registry.escalation(backend) if mean_confidence(items) < threshold else None
+            if stronger is not None:
+                with stronger.slot():
+                    backend, items = stronger, stronger.read(image, file_name)
+        return backend, items
+    
+    def mock_ocr_extraction(self, image_path):
+        """Mock OCR extraction for demo purposes when OCR is not available"""
+        return mock_ocr_text(image_path)
+    
+    def page_count(self, content):
+        """Number of pages in a PDF"""
+        if not PDF_AVAILABLE:
+            raise ValueError("PDF support requires PyMuPDF")
+        with fitz.open(stream=content, filetype='pdf') as pdf:
+            return pdf.page_count
+    
+    def rasterize(self, content, pages=None):
+        """Render PDF pages to PNG bytes at PDF_DPI: the given page indexes, or the first PDF_MAX_PAGES"""
+        if not PDF_AVAILABLE:
+            raise ValueError("PDF support requires PyMuPDF")
+        with fitz.open(stream=content, filetype='pdf') as pdf:
+            if pages is None:
+                pages = range(min(pdf.page_count, app.config['PDF_MAX_PAGES']))
+            return [pdf[index].get_pixmap(dpi=app.config['PDF_DPI']).tobytes('png') for index in pages]
+    
+    def load_image(self, source):
+        """Decode a document from raw bytes or a file path into a BGR array"""
+        content = read_document(source)
+        image = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Unsupported or corrupt image")
+        return image
+    
+    def preprocess_image(self, image, profile=None):
+        """Preprocess image for better OCR results
+        
+        Accepts a decoded array, raw bytes or a file path and returns the
+        binarized array in memory. profile picks a PREPROCESS_PROFILES tier
+        (default: PREPROCESS_PROFILE config). Without OpenCV the input is
+        returned as is.
+        """
         if not OPENCV_AVAILABLE:
-            return image_path
+            return image
+        settings = PREPROCESS_PROFILES[profile or app.config['PREPROCESS_PROFILE']]
             
         try:
-            image = cv2.imread(image_path)
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if not isinstance(image, np.ndarray):
+                image = self.load_image(image)
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            
+            # Downscale oversized scans before the per-pixel work
+            if settings['target_dpi']:
+                max_width = int(settings['target_dpi'] * PAGE_WIDTH_INCHES)
+                if gray.shape[1] > max_width:
+                    scale = max_width / gray.shape[1]
+                    gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
             
             # Apply denoising
-            denoised = cv2.fastNlMeansDenoising(gray)
+            if settings['denoise'] == 'median':
+                denoised = cv2.medianBlur(gray, 3)
+            elif settings['denoise'] == 'bilateral':
+                denoised = cv2.bilateralFilter(gray, 5, 50, 50)
+            else:
+                denoised = cv2.fastNlMeansDenoising(gray)
             
             # Apply thresholding
             _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
             
-            # Save processed image
-            processed_path = image_path.replace('.', '_processed.')
-            cv2.imwrite(processed_path, thresh)
-            
-            return processed_path
+            return thresh
         except Exception as e:
             print(f"Image preprocessing error: {e}")
-            return image_path
+            return image
     
     def extract_structured_data(self, text):
-        """Extract structured data using regex patterns"""
+        """Classify the document, then run that type's extraction plan"""
         extracted_data = {
             'document_type': 'Unknown',
             'company_name': '',
@@ -228,51 +1203,898 @@ class DocumentProcessor:
             'raw_text': text
         }
         
-        # Determine document type
-        text_lower = text.lower()
-        if 'invoice' in text_lower:
-            extracted_data['document_type'] = 'Invoice'
-        elif 'receipt' in text_lower:
-            extracted_data['document_type'] = 'Receipt'
-        elif 'form' in text_lower:
-            extracted_data['document_type'] = 'Form'
-        
-        # Extract fields using regex patterns
-        for field, patterns in self.patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                if match:
-                    extracted_data[field] = match.group(1).strip()
-                    break
+        document_type = self.classifier.classify(text)
+        extracted_data['document_type'] = document_type
+        
+        # Extract fields using the type's precompiled regex patterns
+        extracted_data.update(self.extractors.get(document_type, self.extractor).extract(text))
         
         return extracted_data
     
-    def process_document(self, image_path):
-        """Main document processing pipeline"""
-        start_time = datetime.now()
+    def detect_regions(self, image):
+        """Bounding boxes (x, y, w, h) of the text blocks on a page, in reading order
         
-        # Preprocess image
-        processed_path = self.preprocess_image(image_path)
+        Ink is merged into blocks with a morphological close wider than it is
+        tall, so words join into lines and close lines into paragraphs. Returns
+        None when block OCR would not pay off: no OpenCV, no blocks, too many
+        of them, or blocks covering more than OCR_REGION_MAX_COVERAGE of the page.
+        """
+        if not OPENCV_AVAILABLE or not isinstance(image, np.ndarray):
+            return None
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
         
-        # Extract text
-        text = self.extract_text(processed_path)
+        height, width = ink.shape
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, int(width * REGION_KERNEL[0])),
+                                                            max(3, int(height * REGION_KERNEL[1]))))
+        blocks = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, kernel)
+        contours, _ = cv2.findContours(blocks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        # Extract structured data
-        structured_data = self.extract_structured_data(text)
+        regions = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w < REGION_MIN_SIZE or h < REGION_MIN_SIZE:
+                continue  # specks of noise
+            left, top = max(0, x - REGION_MARGIN), max(0, y - REGION_MARGIN)
+            right, bottom = min(width, x + w + REGION_MARGIN), min(height, y + h + REGION_MARGIN)
+            regions.append((left, top, right - left, bottom - top))
         
-        # Calculate processing time
-        processing_time = (datetime.now() - start_time).total_seconds()
+        coverage = sum(w * h for _, _, w, h in regions) / float(width * height)
+        if not regions or len(regions) > REGION_MAX_BLOCKS or coverage > app.config['OCR_REGION_MAX_COVERAGE']:
+            return None
+        # Top to bottom; blocks starting above the middle of a line's first block join that line
+        lines = []
+        for region in sorted(regions, key=lambda region: region[1]):
+            if lines and region[1] < lines[-1][0][1] + lines[-1][0][3] // 2:
+                lines[-1].append(region)
+            else:
+                lines.append([region])
+        return [region for line in lines for region in sorted(line)]
+    
+    def region_executor(self):
+        """This process's thread pool for OCRing text blocks, created on first use"""
+        with self.region_lock:
+            # Threads do not survive a fork, so each worker process gets its own pool
+            if self.region_pool is None or self.region_pool[0] != os.getpid():
+                workers = max(1, app.config['OCR_CONCURRENCY'])
+                self.region_pool = (os.getpid(), ThreadPoolExecutor(max_workers=workers,
+                                                                    thread_name_prefix='ocr-region'))
+            return self.region_pool[1]
+    
+    def read_layout(self, image, file_name=None):
+        """OCR an image block by block, returning (text, engine, blocks)
+        
+        Only detected text blocks are OCR'd, in parallel, and each keeps its
+        page bounding box: {'bbox': [x, y, w, h], 'text': ...}. Blocks are
+        joined line by line in reading order. Falls back to whole-page
+        run_ocr, with no blocks, when OCR_REGIONS is off, the engine does not
+        read pixels or detect_regions finds nothing worth cropping.
+        """
+        regions = self.layout_regions(image)
+        if self.banded(image):
+            return self.read_bands(image, file_name, regions)
+        if not regions:
+            text, engine = self.run_ocr(image, file_name)
+            return text, engine, []
+        return self.read_regions(image, file_name, regions)
+    
+    def layout_regions(self, image):
+        """Text blocks to OCR separately, or None to OCR the whole page"""
+        if not app.config['OCR_REGIONS'] or not self.ocr_backend().reads_pixels:
+            return None
+        return self.detect_regions(image)
+    
+    def read_region(self, backend, image, region, file_name):
+        """OCR one block of an image, returning (text, engine, confidence)"""
+        x, y, w, h = region
+        crop = image[y:y + h, x:x + w]
+        with backend.slot():
+            items = backend.read(crop, file_name)
+        backend, items = self.escalated(backend, items, crop, file_name)
+        return backend.text(items), backend.name, mean_confidence(items)
+    
+    def read_regions(self, image, file_name, regions):
+        """OCR the given blocks of an image in parallel, returning (text, engine, blocks)"""
+        backend = self.ocr_backend()
+        try:
+            outcomes = list(self.region_executor().map(
+                lambda region: self.read_region(backend, image, region, file_name), regions))
+        except Exception as e:
+            print(f"Region OCR Error: {e}")
+            text, engine = self.run_ocr(image, file_name)
+            return text, engine, []
+        
+        blocks = [{'bbox': list(region), 'text': text}
+                  for region, (text, _, _) in zip(regions, outcomes) if text.strip()]
+        # Report the escalation engine if any block needed it
+        engine = next((engine for _, engine, _ in outcomes if engine != backend.name), backend.name)
+        return '\n'.join(block['text'] for block in blocks), engine, blocks
+    
+    def banded(self, image):
+        """Whether to OCR this image band by band with early exit"""
+        return (app.config['OCR_BANDS'] > 1 and OPENCV_AVAILABLE and isinstance(image, np.ndarray)
+                and self.ocr_backend().reads_pixels)
+    
+    def band_bounds(self, image, bands):
+        """(top, bottom) rows of horizontal strips, each cut at the blank row nearest an even split"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        blank = np.flatnonzero(~ink.any(axis=1))
+        height = ink.shape[0]
+        
+        cuts = [0]
+        for band in range(1, bands):
+            target = height * band // bands
+            # Cutting through a line of text would garble it in both strips
+            if blank.size:
+                nearest = int(blank[np.abs(blank - target).argmin()])
+                if abs(nearest - target) <= height // (2 * bands):
+                    target = nearest
+            if target > cuts[-1]:
+                cuts.append(target)
+        cuts.append(height)
+        return [(top, bottom) for top, bottom in zip(cuts, cuts[1:]) if bottom > top]
+    
+    def read_bands(self, image, file_name, regions=None):
+        """OCR an image top-down in OCR_BANDS bands, returning (text, engine, blocks)
+        
+        Text blocks (or full-width strips when the page has none worth
+        cropping) are grouped into bands by where they start. After each band
+        the text so far is classified and extracted, and reading stops once
+        every REQUIRED_FIELDS entry of the document type was found in bands
+        read with at least OCR_BAND_CONFIDENCE. Blocks of unread bands are
+        left out of the text and blocks.
+        """
+        bands = app.config['OCR_BANDS']
+        height, width = image.shape[:2]
+        if regions:
+            groups = [[] for _ in range(bands)]
+            for region in regions:
+                groups[min(bands - 1, region[1] * bands // height)].append(region)
+            groups = [group for group in groups if group]
+        else:
+            groups = [[(0, top, width, bottom - top)] for top, bottom in self.band_bounds(image, bands)]
+        
+        backend = self.ocr_backend()
+        blocks, engine, found = [], backend.name, {}
+        for group in groups:
+            try:
+                outcomes = list(self.region_executor().map(
+                    lambda region: self.read_region(backend, image, region, file_name), group))
+            except Exception as e:
+                print(f"Banded OCR Error: {e}")
+                text, engine = self.run_ocr(image, file_name)
+                return text, engine, []
+            
+            band_blocks = [{'bbox': list(region), 'text': text}
+                           for region, (text, _, _) in zip(group, outcomes) if text.strip()]
+            blocks.extend(band_blocks)
+            engine = next((name for _, name, _ in outcomes if name != backend.name), engine)
+            scores = [score for text, _, score in outcomes if text.strip()]
+            band_confidence = sum(scores) / len(scores) if scores else 0.0
+            
+            # A field is as trustworthy as the band its current value came from
+            data = self.extract_structured_data('\n'.join(block['text'] for block in blocks))
+            for field, value in data.items():
+                if value and found.get(field, (None,))[0] != value:
+                    found[field] = (value, band_confidence)
+            required = REQUIRED_FIELDS.get(data['document_type'])
+            if required and all(field in found and found[field][1] >= app.config['OCR_BAND_CONFIDENCE']
+                                for field in required):
+                break
+        return '\n'.join(block['text'] for block in blocks), engine, blocks
+    
+    def run_ocr_batch(self, images, file_names):
+        """OCR several images, batching engine calls where the engine allows it"""
+        backend = self.ocr_backend()
+        try:
+            with backend.slot():
+                results = backend.read_batch(images, file_names)
+        except Exception as e:
+            print(f"Batched OCR Error: {e}")
+            return [self.run_ocr(image, name) for image, name in zip(images, file_names)]
+        
+        return [self.escalate(backend, items, image, name)
+                for items, image, name in zip(results, images, file_names)]
+    
+    def cache_key(self, content, profile=None):
+        """OCR cache key for a document's bytes, or None when its OCR output should not be cached"""
+        settings = self.ocr_settings(profile)
+        # Mock OCR output depends on the file name, not the content
+        if settings['engine'] == 'mock':
+            return None
+        return OCRCache.make_key(content, settings)
+    
+    def build_result(self, file_name, text, processing_time, cache_status, timings=None, blocks=None):
+        """Structured data plus processing metadata for one document, with its text blocks if any"""
+        timings = timings if timings is not None else StageTimings()
+        with timings.measure('extraction'):
+            structured_data = self.extract_structured_data(text)
         
         # Add metadata
         structured_data['processing_time'] = processing_time
         structured_data['timestamp'] = datetime.now().isoformat()
-        structured_data['file_name'] = os.path.basename(image_path)
+        structured_data['file_name'] = file_name
+        structured_data['ocr_cache'] = cache_status
+        structured_data['timings'] = dict(timings)
+        if blocks:
+            structured_data['blocks'] = blocks
         
         return structured_data
+    
+    def merge_pages(self, file_name, page_texts, processing_time, cache_statuses, timings=None,
+                    page_blocks=None, page_count=None):
+        """One structured record for a multi-page document, keeping each page's text and blocks
+        
+        page_count is the document's length when only its first pages were
+        OCR'd; the record is then flagged as truncated.
+        """
+        # A document is a cache hit only if every page was
+        statuses = set(cache_statuses)
+        cache_status = statuses.pop() if len(statuses) == 1 else 'miss'
+        result = self.build_result(file_name, '\n\n'.join(page_texts), processing_time, cache_status,
+                                   timings)
+        result['page_count'] = max(page_count or 0, len(page_texts))
+        result['truncated'] = result['page_count'] > len(page_texts)
+        result['pages'] = [{'page': number, 'text': text}
+                           for number, text in enumerate(page_texts, 1)]
+        for page, blocks in zip(result['pages'], page_blocks or []):
+            if blocks:
+                page['blocks'] = blocks
+        return result
+    
+    def decode(self, content):
+        """Decoded array for preprocessing; undecodable input is passed through as is"""
+        if not OPENCV_AVAILABLE:
+            return content
+        try:
+            return self.load_image(content)
+        except ValueError:
+            return content
+    
+    def cached_ocr(self, key):
+        """(text, blocks) from the OCR cache, or None"""
+        text = ocr_cache.get(key) if key else None
+        if text is None:
+            return None
+        layout = ocr_cache.get(f"{key}-layout")
+        return text, json.loads(layout) if layout else []
+    
+    def cache_ocr(self, key, text, blocks):
+        ocr_cache.put(key, text)
+        if blocks:
+            ocr_cache.put(f"{key}-layout", json.dumps(blocks))
+    
+    def ocr_page(self, content, file_name, profile=None, timings=None):
+        """Cached OCR of one image, returning (text, cache status, text blocks)
+        
+        Time spent decoding, preprocessing and OCRing is added to `timings`.
+        """
+        timings = timings if timings is not None else StageTimings()
+        # Duplicate uploads skip preprocessing and OCR entirely
+        key = self.cache_key(content, profile)
+        cached = self.cached_ocr(key)
+        if cached is not None:
+            return cached[0], 'hit', cached[1]
+        
+        with timings.measure('decode'):
+            image = self.decode(content)
+        
+        # Preprocess image
+        with timings.measure('preprocess'):
+            processed = self.preprocess_image(image, profile)
+        
+        # Extract text
+        with timings.measure('ocr'):
+            text, engine, blocks = self.read_layout(processed, file_name)
+        if key and engine != 'mock':
+            self.cache_ocr(key, text, blocks)
+        return text, 'miss' if key else 'bypass', blocks
+    
+    def process_document(self, source, file_name=None, profile=None, on_stage=None):
+        """Main document processing pipeline
+        
+        source is a file path or the raw bytes of an upload; the image is read
+        once and stays in memory through preprocessing and OCR. profile
+        selects the preprocessing tier, and on_stage is called as each stage
+        starts. PDFs are rasterized and their pages OCR'd one after another
+        here; JobQueue runs PDF pages in parallel.
+        """
+        start = time.perf_counter()
+        timings = StageTimings()
+        timings.on_stage = on_stage
+        if file_name is None:
+            file_name = os.path.basename(source)
+        with timings.measure('decode'):
+            content = read_document(source)
+        
+        if is_pdf(content):
+            with timings.measure('decode'):
+                page_count = self.page_count(content)
+                page_images = self.rasterize(content)
+            pages = [self.ocr_page(page, file_name, profile, timings) for page in page_images]
+            processing_time = time.perf_counter() - start
+            return self.merge_pages(file_name, [text for text, _, _ in pages], processing_time,
+                                    [status for _, status, _ in pages], timings,
+                                    [blocks for _, _, blocks in pages], page_count)
+        
+        text, cache_status, blocks = self.ocr_page(content, file_name, profile, timings)
+        
+        # Calculate processing time
+        processing_time = time.perf_counter() - start
+        
+        # Extract structured data
+        return self.build_result(file_name, text, processing_time, cache_status, timings, blocks)
+    
+    def process_batch(self, documents, profile=None):
+        """Run the pipeline over (file_name, source) pairs with batched OCR calls"""
+        documents = [(file_name, read_document(source)) for file_name, source in documents]
+        pdfs = {i for i, (_, content) in enumerate(documents) if is_pdf(content)}
+        if pdfs:
+            # Multi-page PDFs don't fit the one-image-per-document batch; run each on its own
+            images = iter(self.process_batch(
+                [document for i, document in enumerate(documents) if i not in pdfs], profile))
+            return [self.process_document(content, file_name, profile) if i in pdfs else next(images)
+                    for i, (file_name, content) in enumerate(documents)]
+        if not documents:
+            return []
+        
+        start = time.perf_counter()
+        
+        file_names = [file_name for file_name, _ in documents]
+        contents = [content for _, content in documents]
+        timings = [StageTimings() for _ in documents]
+        keys = [self.cache_key(content, profile) for content in contents]
+        cached = [self.cached_ocr(key) for key in keys]
+        texts = [entry[0] if entry else None for entry in cached]
+        blocks = [entry[1] if entry else [] for entry in cached]
+        statuses = ['hit' if text is not None else ('miss' if key else 'bypass')
+                    for key, text in zip(keys, texts)]
+        
+        misses = [i for i, text in enumerate(texts) if text is None]
+        images = []
+        for i in misses:
+            with timings[i].measure('decode'):
+                image = self.decode(contents[i])
+            with timings[i].measure('preprocess'):
+                images.append(self.preprocess_image(image, profile))
+        
+        ocr_start = time.perf_counter()
+        names = [file_names[i] for i in misses]
+        # Banded pages and pages with detected text blocks go through read_layout; the rest in one batch
+        regions = [self.layout_regions(image) for image in images]
+        whole = [i for i, (image, page_regions) in enumerate(zip(images, regions))
+                 if not page_regions and not self.banded(image)]
+        outcomes = [None] * len(images)
+        batched = self.run_ocr_batch([images[i] for i in whole], [names[i] for i in whole]) if whole else []
+        for i, (text, engine) in zip(whole, batched):
+            outcomes[i] = (text, engine, [])
+        for i, (image, page_regions) in enumerate(zip(images, regions)):
+            if self.banded(image):
+                outcomes[i] = self.read_bands(image, names[i], page_regions)
+            elif page_regions:
+                outcomes[i] = self.read_regions(image, names[i], page_regions)
+        ocr_share = (time.perf_counter() - ocr_start) / max(len(misses), 1)
+        for index, (text, engine, page_blocks) in zip(misses, outcomes):
+            texts[index] = text
+            blocks[index] = page_blocks
+            timings[index]['ocr'] = ocr_share
+            if keys[index] and engine != 'mock':
+                self.cache_ocr(keys[index], text, page_blocks)
+        
+        # OCR time is shared by the batch, so each document gets an equal slice
+        processing_time = (time.perf_counter() - start) / max(len(documents), 1)
+        
+        return [self.build_result(file_name, text, processing_time, status, document_timings, page_blocks)
+                for file_name, text, status, document_timings, page_blocks
+                in zip(file_names, texts, statuses, timings, blocks)]
+
+def read_document(source):
+    """Raw bytes of a document given as bytes or a file path"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    with open(source, 'rb') as f:
+        return f.read()
+
+def is_pdf(content):
+    """Whether document bytes are a PDF"""
+    return content[:5] == b'%PDF-'
 
 # Initialize document processor
 processor = DocumentProcessor()
 
+def record_result(result):
+    """Store a finished document for analytics"""
+    try:
+        document_store.add(result)
+    except sqlite3.Error as e:
+        print(f"Failed to store {result.get('file_name')}: {e}")
+
+def get_cache_stats():
+    """OCR cache hit/miss counts for the analytics payload"""
+    counts = document_store.cache_counts()
+    hits, misses = counts.get('hit', 0), counts.get('miss', 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups * 100, 1) if lookups else 0
+    }
+
+def init_ocr_worker(preload):
+    """OCR pool initializer: optionally load and select engines before the first job arrives"""
+    if preload:
+        ocr_registry.warm_up()
+        processor.ocr_backend()
+
+def stage_reporter(job_id):
+    """on_stage callback recording a job's progress in the document store, where any worker can read it"""
+    last = [None]
+    
+    def report(stage):
+        if job_id is None or stage == last[0]:
+            return
+        last[0] = stage
+        try:
+            document_store.set_job_stage(job_id, stage)
+        except sqlite3.Error as e:
+            print(f"Failed to record progress of job {job_id}: {e}")
+    return report
+
+def run_extraction_job(filepath, profile=None, job_id=None):
+    """Worker entry point: run the processing pipeline inside the OCR pool"""
+    return processor.process_document(filepath, profile=profile, on_stage=stage_reporter(job_id))
+
+def run_page_count_job(filepath, job_id=None):
+    """Worker entry point: count a PDF's pages, timing the work"""
+    stage_reporter(job_id)('decode')
+    start = time.perf_counter()
+    page_count = processor.page_count(read_document(filepath))
+    return page_count, time.perf_counter() - start
+
+def run_page_job(filepath, page, profile=None, job_id=None):
+    """Worker entry point: render and OCR one PDF page, returning (text, cache status, blocks, timings)
+    
+    The page is rendered here from the file, so only its text crosses back
+    to the parent, never page images.
+    """
+    timings = StageTimings()
+    timings.on_stage = stage_reporter(job_id)
+    with timings.measure('decode'):
+        content = processor.rasterize(read_document(filepath), [page])[0]
+    text, cache_status, blocks = processor.ocr_page(content, os.path.basename(filepath), profile, timings)
+    return text, cache_status, blocks, dict(timings)
+
+def run_batch_job(documents, profile=None):
+    """Worker entry point: process a chunk of (file_name, source) documents with batched OCR"""
+    return processor.process_batch(documents, profile=profile)
+
+class JobQueue:
+    """Extraction jobs drained by a pool of OCR workers, decoupled from HTTP requests
+    
+    Job records live in memory for the worker that accepted them and are
+    mirrored to the document store, so any worker can answer a status poll.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.executor = None
+        self.batch_pending = 0
+
+    def _get_executor(self):
+        # Created on first use so importing the app never forks OCR workers
+        with self.lock:
+            if self.executor is None:
+                workers = max(1, self.config['OCR_WORKERS'])
+                initargs = (self.config['OCR_PRELOAD'],)
+                if self.config['OCR_POOL'] == 'thread':
+                    self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr',
+                                                       initializer=init_ocr_worker, initargs=initargs)
+                else:
+                    self.executor = ProcessPoolExecutor(max_workers=workers,
+                                                        initializer=init_ocr_worker, initargs=initargs)
+            return self.executor
+
+    def submit(self, filepath, on_complete=None, profile=None):
+        """Enqueue a document and return its job record immediately"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'file_name': os.path.basename(filepath),
+            'submitted_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'result': None,
+            'error': None,
+            'future': None
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+            self._prune()
+        self._save(job)
+
+        executor = self._get_executor()
+        with open(filepath, 'rb') as f:
+            pdf = is_pdf(f.read(5))
+        if pdf:
+            # Count the pages first, then render and OCR them in parallel across the pool
+            future = executor.submit(run_page_count_job, filepath, job_id)
+            callback = lambda f: self._fan_out_pages(job, executor, f, filepath, on_complete, profile)
+        else:
+            future = executor.submit(run_extraction_job, filepath, profile, job_id)
+            callback = lambda f: self._finish(job, executor, f, on_complete)
+        job['future'] = future
+        future.add_done_callback(callback)
+        return self.get(job_id)
+
+    def _finish(self, job, executor, future, on_complete):
+        try:
+            result = future.result()
+        except Exception as e:
+            self._fail(job, executor, e)
+        else:
+            self._complete(job, result, on_complete)
+
+    def _fail(self, job, executor, error):
+        print(f"Job {job['job_id']} failed: {error}")
+        job['error'] = str(error) or error.__class__.__name__
+        self._discard_broken(executor, error)
+        job['finished_at'] = datetime.now().isoformat()
+        self._save(job)
+
+    def _discard_broken(self, executor, error):
+        if isinstance(error, BrokenProcessPool):
+            # A crashed worker poisons the pool; start a fresh one on next submit
+            with self.lock:
+                if self.executor is executor:
+                    self.executor = None
+
+    def _complete(self, job, result, on_complete):
+        job['result'] = result
+        if on_complete:
+            on_complete(result)
+        job['finished_at'] = datetime.now().isoformat()
+        self._save(job)
+
+    def _save(self, job):
+        try:
+            document_store.save_job(job, keep=self.config['MAX_JOBS'])
+        except sqlite3.Error as e:
+            print(f"Failed to store job {job['job_id']}: {e}")
+
+    def _fan_out_pages(self, job, executor, future, filepath, on_complete, profile):
+        """Submit one task per page, up to PDF_MAX_PAGES, and merge them when the last finishes"""
+        try:
+            page_count, count_time = future.result()
+            if not page_count:
+                raise ValueError("PDF has no pages")
+            page_futures = [executor.submit(run_page_job, filepath, page, profile, job['job_id'])
+                            for page in range(min(page_count, self.config['PDF_MAX_PAGES']))]
+        except Exception as e:
+            self._fail(job, executor, e)
+            return
+        
+        start = time.perf_counter()
+        job['future'] = page_futures[0]
+        remaining = [len(page_futures)]
+        lock = threading.Lock()
+        
+        def page_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                outcomes = [page_future.result() for page_future in page_futures]
+                processing_time = count_time + time.perf_counter() - start
+                # Stage timings add up the work done for every page
+                timings = StageTimings(decode=count_time)
+                for _, _, _, page_timings in outcomes:
+                    for stage, elapsed in page_timings.items():
+                        timings[stage] = timings.get(stage, 0) + elapsed
+                result = processor.merge_pages(job['file_name'], [text for text, _, _, _ in outcomes],
+                                               processing_time, [status for _, status, _, _ in outcomes],
+                                               timings, [blocks for _, _, blocks, _ in outcomes],
+                                               page_count)
+            except Exception as e:
+                self._fail(job, executor, e)
+            else:
+                self._complete(job, result, on_complete)
+        
+        for page_future in page_futures:
+            page_future.add_done_callback(page_done)
+
+    def submit_batch(self, documents, on_complete=None, profile=None):
+        """Process (file_name, read) documents in OCR batches, yielding one outcome per document
+        
+        Each read() returns the document bytes straight from the request buffer.
+        Only a small window of chunks is read and in flight at a time, so memory
+        stays bounded however many documents the request carries. A document
+        whose read() raises, or a chunk the pool cannot take, gets a failed
+        outcome and the rest of the batch carries on.
+        """
+        size = max(1, self.config['OCR_BATCH_SIZE'])
+        chunks = iter([documents[i:i + size] for i in range(0, len(documents), size)])
+        window = 2 * max(1, self.config['OCR_WORKERS'])
+        in_flight = {}  # future -> (file names, executor)
+        
+        def failed(file_name, error):
+            return {'success': False, 'file_name': file_name, 'error': str(error) or error.__class__.__name__}
+        
+        def submit_next_chunk():
+            """Submit the next chunk with readable documents, returning failed outcomes along the way"""
+            failures = []
+            for chunk in chunks:
+                payload = []
+                for file_name, read in chunk:
+                    try:
+                        payload.append((file_name, read()))
+                    except Exception as e:
+                        failures.append(failed(file_name, e))
+                if not payload:
+                    continue
+                
+                # Fetched per chunk, so a pool replaced after a crash is picked up
+                executor = self._get_executor()
+                with self.lock:
+                    self.batch_pending += len(payload)
+                try:
+                    future = executor.submit(run_batch_job, payload, profile)
+                except Exception as e:
+                    print(f"Batch chunk not submitted: {e}")
+                    self._batch_done(len(payload))
+                    self._discard_broken(executor, e)
+                    failures += [failed(file_name, e) for file_name, _ in payload]
+                    continue
+                # Runs however the chunk ends: finished, failed or cancelled, with or without a client
+                future.add_done_callback(lambda _, count=len(payload): self._batch_done(count))
+                in_flight[future] = ([file_name for file_name, _ in payload], executor)
+                break
+            return failures
+        
+        try:
+            for _ in range(window):
+                yield from submit_next_chunk()
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_names, executor = in_flight.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        print(f"Batch chunk failed: {e}")
+                        self._discard_broken(executor, e)
+                        for file_name in file_names:
+                            yield failed(file_name, e)
+                    else:
+                        for result in results:
+                            if on_complete:
+                                on_complete(result)
+                            yield {'success': True, 'file_name': result['file_name'], 'data': result}
+                    yield from submit_next_chunk()
+        finally:
+            # Client went away: drop chunks that have not started yet
+            for future in in_flight:
+                future.cancel()
+    
+    def _batch_done(self, count):
+        with self.lock:
+            self.batch_pending -= count
+    
+    def _prune(self):
+        # Drop the oldest finished jobs once we hold more than MAX_JOBS
+        excess = len(self.jobs) - self.config['MAX_JOBS']
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id]['finished_at'] is not None:
+                del self.jobs[job_id]
+                excess -= 1
+
+    @staticmethod
+    def _status(job):
+        if job['finished_at'] is not None:
+            return 'failed' if job['error'] else 'done'
+        if job['future'] is not None and job['future'].running():
+            return 'running'
+        return 'queued'
+
+    def get(self, job_id):
+        """Public view of a job, or None if unknown or already pruned"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+        stored = None
+        if job is None or job['finished_at'] is None:
+            # Unknown here (accepted by another worker or pruned), or running: workers report stages to the store
+            try:
+                stored = document_store.get_job(job_id)
+            except sqlite3.Error as e:
+                print(f"Failed to load job {job_id}: {e}")
+        if job is None:
+            if stored is None:
+                return None
+            job = dict(stored, future=None)
+        stage = stored['stage'] if stored and job['finished_at'] is None else None
+
+        status = self._status(job)
+        if status == 'queued' and stage:
+            status = 'running'  # its worker has started, even if it is not this process's
+        view = {
+            'job_id': job['job_id'],
+            'status': status,
+            'file_name': job['file_name'],
+            'submitted_at': job['submitted_at'],
+            'finished_at': job['finished_at']
+        }
+        if stage:
+            view['stage'] = stage
+        if status == 'done':
+            view['data'] = job['result']
+        elif status == 'failed':
+            view['error'] = job['error']
+        return view
+
+    def depth(self):
+        """Number of jobs waiting for or occupying an OCR worker"""
+        with self.lock:
+            pending = sum(1 for job in self.jobs.values() if job['finished_at'] is None)
+            return pending + self.batch_pending
+
+job_queue = JobQueue(app.config)
+
+class DeliverySink:
+    """Destination for automation records; send() raises to have the batch retried"""
+    
+    def send(self, records):
+        raise NotImplementedError
+
+class FileSink(DeliverySink):
+    """Appends each record as a JSON line, standing in for the automation framework"""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def send(self, records):
+        lines = ''.join(json.dumps(record) + '\n' for record in records)
+        # One append per batch, so batches from several workers never interleave
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+
+class HTTPSink(DeliverySink):
+    """POSTs each batch as {"records": [...]}; any non-2xx response is retried"""
+    
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+    
+    def send(self, records):
+        request = urllib.request.Request(self.url, data=json.dumps({'records': records}).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+def make_sink(config):
+    """The sink named by AUTOMATION_SINK"""
+    spec = config['AUTOMATION_SINK']
+    if spec.startswith(('http://', 'https://')):
+        return HTTPSink(spec, config['AUTOMATION_TIMEOUT'])
+    if spec.startswith('file:'):
+        return FileSink(spec[len('file:'):])
+    raise ValueError(f"Unsupported AUTOMATION_SINK: {spec}")
+
+class DeliveryQueue:
+    """Outbound automation records, delivered in batches with retries
+    
+    Records are queued in the document store, so any worker can accept one
+    and report on it. Each worker process runs a dispatcher thread, started
+    on its first request when records are pending, or else on first use. It
+    claims due records in batches of AUTOMATION_BATCH_SIZE and backs off
+    exponentially (with jitter) after a failed send, giving up after
+    AUTOMATION_MAX_ATTEMPTS.
+    """
+    
+    POLL_INTERVAL = 1.0  # seconds between checks for retries that have come due
+    
+    def __init__(self, config, sink=None):
+        self.config = config
+        self.sink = sink
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.dispatcher = None  # (pid, thread)
+        self.resumed_pid = None
+    
+    def enqueue(self, payload):
+        """Queue a record for delivery and return its status immediately"""
+        automation_id = f'AUTO_{uuid.uuid4().hex[:12].upper()}'
+        document_store.add_delivery(automation_id, payload)
+        self.start()
+        self.wakeup.set()
+        return self.get(automation_id)
+    
+    def get(self, automation_id):
+        return document_store.get_delivery(automation_id)
+    
+    def backoff(self, attempts):
+        """Seconds to wait before retrying a record that has failed `attempts` times"""
+        delay = min(self.config['AUTOMATION_RETRY_MAX'], self.config['AUTOMATION_RETRY_BASE'] * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+    
+    def flush(self):
+        """Deliver one batch of due records; returns how many were delivered"""
+        records = document_store.claim_deliveries(self.config['AUTOMATION_BATCH_SIZE'],
+                                                  self.config['AUTOMATION_TIMEOUT'])
+        if not records:
+            return 0
+        
+        batch = [{'automation_id': record['automation_id'], 'created_at': record['created_at'],
+                  'data': record['payload']} for record in records]
+        try:
+            if self.sink is None:
+                self.sink = make_sink(self.config)
+            self.sink.send(batch)
+        except Exception as e:
+            print(f"Automation delivery of {len(records)} records failed: {e}")
+            now = time.time()
+            retries = {}
+            for record in records:
+                attempts = record['attempts'] + 1
+                retries[record['automation_id']] = (None if attempts >= self.config['AUTOMATION_MAX_ATTEMPTS']
+                                                    else now + self.backoff(attempts))
+            document_store.retry_deliveries(retries, str(e) or e.__class__.__name__)
+            return 0
+        
+        document_store.finish_deliveries([record['automation_id'] for record in records])
+        return len(records)
+    
+    def resume(self):
+        """Once per process, start the dispatcher if records left by an earlier run are still pending"""
+        with self.lock:
+            if self.resumed_pid == os.getpid():
+                return
+            self.resumed_pid = os.getpid()
+        if document_store.pending_deliveries():
+            self.start()
+    
+    def start(self):
+        """Start this process's dispatcher thread if it is not running"""
+        with self.lock:
+            if self.dispatcher is None or self.dispatcher[0] != os.getpid() or not self.dispatcher[1].is_alive():
+                self.stopping.clear()
+                thread = threading.Thread(target=self._run, name='automation-delivery', daemon=True)
+                self.dispatcher = (os.getpid(), thread)
+                thread.start()
+    
+    def stop(self, timeout=None):
+        """Stop this process's dispatcher after its current batch; undelivered records stay queued"""
+        with self.lock:
+            dispatcher, self.dispatcher = self.dispatcher, None
+        if dispatcher is not None and dispatcher[0] == os.getpid():
+            self.stopping.set()
+            self.wakeup.set()
+            dispatcher[1].join(timeout)
+    
+    def _run(self):
+        while not self.stopping.is_set():
+            self.wakeup.clear()
+            try:
+                delivered = self.flush()
+            except Exception as e:
+                print(f"Automation dispatcher error: {e}")
+                delivered = 0
+            # Keep draining while full batches go out; otherwise wait for new work or due retries
+            if delivered < self.config['AUTOMATION_BATCH_SIZE']:
+                self.wakeup.wait(self.POLL_INTERVAL)
+
+delivery_queue = DeliveryQueue(app.config)
+
+@app.before_request
+def resume_deliveries():
+    # Web workers only: OCR pool processes and scripts importing the app never serve requests
+    delivery_queue.resume()
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -287,35 +2109,286 @@ def upload_file():
         return jsonify({'error': 'No file selected'}), 400
     
     if file:
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        filepath = save_upload(file.filename, file.stream)
         
-        return jsonify({'filename': unique_filename, 'filepath': filepath})
+        return jsonify({'filename': os.path.basename(filepath), 'filepath': filepath})
+
+def save_upload(filename, stream):
+    """Store an uploaded stream in the upload folder under a content-addressed name"""
+    return save_blocks(filename, iter(lambda: stream.read(1024 * 1024), b''))
+
+def save_blocks(filename, blocks, sha256=None):
+    """Write byte blocks to the upload folder under a content-addressed name
+    
+    Raises ValueError, keeping nothing, if `sha256` is given and the content
+    does not match it.
+    """
+    # Identical re-uploads land on the same file instead of piling up copies
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(app.config['UPLOAD_FOLDER'], f".{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'wb') as f:
+        for block in blocks:
+            digest.update(block)
+            f.write(block)
+    
+    if sha256 and digest.hexdigest() != sha256.lower():
+        os.remove(tmp_path)
+        raise ValueError("Checksum mismatch")
+    
+    unique_filename = f"{digest.hexdigest()[:32]}_{secure_filename(filename)}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+    os.replace(tmp_path, filepath)
+    return filepath
+
+class ChunkedUploads:
+    """Resumable uploads sent as fixed-size chunks and assembled on completion
+    
+    Each chunk is streamed to its own file, so chunks can arrive in any order,
+    be retried, and land on any worker process. The session lives entirely
+    on disk under `folder`.
+    """
+    
+    ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+    
+    def __init__(self, folder, config):
+        self.folder = folder
+        self.config = config
+    
+    def _dir(self, upload_id):
+        if not self.ID_PATTERN.match(upload_id):
+            raise KeyError(upload_id)
+        path = os.path.join(self.folder, upload_id)
+        if not os.path.isdir(path):
+            raise KeyError(upload_id)
+        return path
+    
+    def _meta(self, upload_id):
+        with open(os.path.join(self._dir(upload_id), 'meta.json')) as f:
+            return json.load(f)
+    
+    def _chunk_path(self, upload_id, index):
+        return os.path.join(self._dir(upload_id), f'{index}.part')
+    
+    def _expire(self):
+        # Drop sessions nobody has touched within UPLOAD_EXPIRY
+        cutoff = time.time() - self.config['UPLOAD_EXPIRY']
+        for entry in os.scandir(self.folder):
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+    
+    def create(self, filename, size, sha256=None):
+        """Start an upload of `size` bytes and return its status"""
+        if not filename or size <= 0:
+            raise ValueError("filename and a positive size are required")
+        if size > self.config['MAX_UPLOAD_SIZE']:
+            raise ValueError(f"Upload exceeds {self.config['MAX_UPLOAD_SIZE']} bytes")
+        os.makedirs(self.folder, exist_ok=True)
+        self._expire()
+        
+        upload_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.folder, upload_id))
+        chunk_size = self.config['UPLOAD_CHUNK_SIZE']
+        meta = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'size': size,
+            'sha256': sha256,
+            'chunk_size': chunk_size,
+            'chunks': -(-size // chunk_size)
+        }
+        with open(os.path.join(self.folder, upload_id, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        return self.status(upload_id)
+    
+    def status(self, upload_id):
+        """Upload metadata plus the chunk indexes received so far"""
+        meta = self._meta(upload_id)
+        meta['received'] = [index for index in range(meta['chunks'])
+                            if os.path.exists(self._chunk_path(upload_id, index))]
+        return meta
+    
+    def write_chunk(self, upload_id, index, stream, sha256=None):
+        """Stream one chunk to disk, replacing any earlier attempt at it"""
+        meta = self._meta(upload_id)
+        if not 0 <= index < meta['chunks']:
+            raise ValueError(f"Chunk index must be between 0 and {meta['chunks'] - 1}")
+        expected = min(meta['chunk_size'], meta['size'] - index * meta['chunk_size'])
+        
+        path = self._chunk_path(upload_id, index)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        digest = hashlib.sha256()
+        written = 0
+        with open(tmp_path, 'wb') as f:
+            for block in iter(lambda: stream.read(1024 * 1024), b''):
+                digest.update(block)
+                written += len(block)
+                f.write(block)
+        
+        if written != expected or (sha256 and digest.hexdigest() != sha256.lower()):
+            os.remove(tmp_path)
+            raise ValueError(f"Chunk {index} is corrupt: expected {expected} bytes"
+                             + (" matching its checksum" if sha256 else ""))
+        os.replace(tmp_path, path)
+    
+    def complete(self, upload_id):
+        """Assemble the chunks into the upload folder and return the stored path"""
+        meta = self.status(upload_id)
+        missing = meta['chunks'] - len(meta['received'])
+        if missing:
+            raise ValueError(f"{missing} chunks are still missing")
+        
+        def blocks():
+            for index in range(meta['chunks']):
+                with open(self._chunk_path(upload_id, index), 'rb') as f:
+                    yield from iter(lambda: f.read(1024 * 1024), b'')
+        
+        filepath = save_blocks(meta['filename'], blocks(), meta['sha256'])
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+        return filepath
+
+chunked_uploads = ChunkedUploads(os.path.join(app.config['UPLOAD_FOLDER'], '.chunks'), app.config)
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a chunked upload: {filename, size, sha256?}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = chunked_uploads.create(data.get('filename'), int(data.get('size') or 0), data.get('sha256'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(upload), 201
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Chunks received so far, so an interrupted client can resume"""
+    try:
+        return jsonify(chunked_uploads.status(upload_id))
+    except KeyError:
+        return jsonify({'error': 'Unknown upload'}), 404
+
+@app.route('/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Store one raw chunk; X-Chunk-SHA256 optionally verifies it"""
+    try:
+        chunked_uploads.write_chunk(upload_id, index, request.stream, request.headers.get('X-Chunk-SHA256'))
+    except KeyError:
+        return jsonify({'error': 'Unknown upload'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'upload_id': upload_id, 'index': index})
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """Assemble the chunks and verify the whole-file checksum"""
+    try:
+        filepath = chunked_uploads.complete(upload_id)
+    except KeyError:
+        return jsonify({'error': 'Unknown upload'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'filename': os.path.basename(filepath), 'filepath': filepath})
+
+def zip_members(content):
+    """(file_name, read) pairs for the supported documents in an uploaded zip
+    
+    Members are decompressed lazily, one batch at a time. A member that would
+    expand past MAX_CONTENT_LENGTH raises from its read() instead.
+    """
+    archive = zipfile.ZipFile(io.BytesIO(content))
+    limit = app.config['MAX_CONTENT_LENGTH']
+    
+    def read(member):
+        # Reads stop at the declared size, so checking it bounds what is decompressed
+        if member.file_size > limit:
+            raise ValueError(f'Expands to {member.file_size} bytes, over the {limit} byte limit')
+        return archive.read(member)
+    
+    documents = []
+    for member in archive.infolist():
+        name = os.path.basename(member.filename)
+        if member.is_dir() or name.startswith('.'):
+            continue
+        if os.path.splitext(name)[1].lower() not in app.config['ALLOWED_EXTENSIONS']:
+            continue
+        documents.append((secure_filename(name), lambda member=member: read(member)))
+    return documents
+
+@app.route('/batch_extract', methods=['POST'])
+def batch_extract():
+    """Process many documents (or zips of documents) in one request, streaming NDJSON results"""
+    files = [f for f in request.files.getlist('files') + request.files.getlist('file') if f.filename]
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
+    
+    # Documents are decoded straight from the request buffers, never written to uploads/.
+    # Request files are closed once the view returns, so take their bytes now
+    # (bounded by MAX_CONTENT_LENGTH).
+    try:
+        documents = []
+        for file in files:
+            content = file.read()
+            if file.filename.lower().endswith('.zip'):
+                documents.extend(zip_members(content))
+            else:
+                documents.append((secure_filename(file.filename), lambda content=content: content))
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'Invalid zip archive'}), 400
+    
+    if not documents:
+        return jsonify({'error': 'No supported documents found'}), 400
+    
+    profile = request.form.get('profile') or app.config['PREPROCESS_PROFILE']
+    if profile not in PREPROCESS_PROFILES:
+        return jsonify({'error': f'Unknown preprocessing profile: {profile}'}), 400
+    
+    def generate():
+        for outcome in job_queue.submit_batch(documents, on_complete=record_result, profile=profile):
+            yield json.dumps(outcome) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def extraction_request(data):
+    """(filepath, profile) from an /extract request body; raises ValueError if invalid"""
+    filepath = data.get('filepath')
+    if not filepath or not os.path.exists(filepath):
+        raise ValueError('File not found')
+    
+    profile = data.get('profile') or app.config['PREPROCESS_PROFILE']
+    if profile not in PREPROCESS_PROFILES:
+        raise ValueError(f'Unknown preprocessing profile: {profile}')
+    return filepath, profile
 
 @app.route('/extract', methods=['POST'])
 def extract_data():
     data = request.get_json()
-    filepath = data.get('filepath')
-    
-    if not filepath or not os.path.exists(filepath):
-        return jsonify({'error': 'File not found'}), 400
+    try:
+        filepath, profile = extraction_request(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
-        # Process document
-        result = processor.process_document(filepath)
-        
-        # Store in global analytics
-        processed_documents.append(result)
+        # Hand the document to the OCR pool; results are stored in global analytics on completion
+        job = job_queue.submit(filepath, on_complete=record_result, profile=profile)
         
         return jsonify({
             'success': True,
-            'data': result
-        })
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'status_url': url_for('get_job', job_id=job['job_id']),
+            'events_url': url_for('job_events', job_id=job['job_id'])
+        }), 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Status and, once finished, results of an extraction job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job)
+
 @app.route('/dashboard')
 def dashboard():
     return render_template('dashboard.html')
@@ -323,107 +2396,424 @@ def dashboard():
 @app.route('/analytics')
 def get_analytics():
     """Get analytics data for dashboard"""
-    if not processed_documents:
-        return jsonify({
+    return jsonify(analytics_payload())
+
+def analytics_payload():
+    """Dashboard figures, computed from the stored aggregates"""
+    total_docs, avg_processing_time = document_store.summary()
+    if not total_docs:
+        return {
             'total_documents': 0,
             'average_processing_time': 0,
             'time_saved': 0,
             'efficiency_gain': 0,
             'monthly_impact': 0,
             'error_reduction': 85,
+            'cache': get_cache_stats(),
             'chart_data': {}
-        })
+        }
     
-    total_docs = len(processed_documents)
-    avg_processing_time = sum(doc['processing_time'] for doc in processed_documents) / total_docs
     time_saved_per_doc = manual_processing_time - (avg_processing_time / 60)  # Convert to minutes
     total_time_saved = time_saved_per_doc * total_docs
     efficiency_gain = (time_saved_per_doc / manual_processing_time) * 100
     monthly_impact = total_docs * 30  # Assuming 30 days
     
     # Create chart data
-    chart_data = {
-        'document_types': {},
-        'processing_times': [doc['processing_time'] for doc in processed_documents],
-        'dates': [doc['timestamp'][:10] for doc in processed_documents]
-    }
-    
-    for doc in processed_documents:
-        doc_type = doc['document_type']
-        chart_data['document_types'][doc_type] = chart_data['document_types'].get(doc_type, 0) + 1
+    daily = document_store.daily(app.config['ANALYTICS_DAYS'])
+    chart_data = downsample(daily, app.config['ANALYTICS_CHART_POINTS'])
+    chart_data['document_types'] = document_store.type_counts()
+    chart_data['latency_histogram'] = document_store.latency_histogram()
     
-    return jsonify({
+    return {
         'total_documents': total_docs,
         'average_processing_time': round(avg_processing_time, 2),
         'time_saved': round(total_time_saved, 2),
         'efficiency_gain': round(efficiency_gain, 1),
         'monthly_impact': monthly_impact,
         'error_reduction': 85,
+        'cache': get_cache_stats(),
         'chart_data': chart_data
-    })
+    }
 
-@app.route('/export_csv')
-def export_csv():
-    """Export processed documents as CSV"""
-    if not processed_documents:
-        return jsonify({'error': 'No data to export'}), 400
+# Server-sent events: comment sent on idle streams so proxies keep them open, and
+# how long browsers wait before reconnecting a closed stream
+SSE_KEEPALIVE = 15
+SSE_RETRY_MS = 2000
+
+# Share of the work done once a job reaches each stage, for progress bars
+JOB_PROGRESS = {'queued': 0.0, 'running': 0.05, 'decode': 0.1, 'preprocess': 0.25, 'ocr': 0.4,
+                'extraction': 0.9, 'done': 1.0, 'failed': 1.0}
+
+def sse(event, data):
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class JobFeed:
+    """Events for one extraction job: progress whenever its stage changes, then its outcome"""
     
-    if PANDAS_AVAILABLE:
-        df = pd.DataFrame(processed_documents)
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_data = csv_buffer.getvalue()
-    else:
-        # Manual CSV creation without pandas
-        if not processed_documents:
-            return jsonify({'error': 'No data to export'}), 400
-        
-        # Get all unique keys from all documents
-        all_keys = set()
-        for doc in processed_documents:
-            all_keys.update(doc.keys())
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.last = None
+    
+    def poll(self):
+        """(message or None, whether the stream is finished)"""
+        job = job_queue.get(self.job_id)
+        if job is None:
+            return sse('failed', {'job_id': self.job_id, 'error': 'Job not found'}), True
+        if job['status'] in ('done', 'failed'):
+            return sse(job['status'], job), True
         
-        # Create CSV header
-        csv_data = ','.join(all_keys) + '\n'
+        stage = job.get('stage') or job['status']
+        if stage == self.last:
+            return None, False
+        self.last = stage
+        return sse('progress', {'job_id': self.job_id, 'status': job['status'], 'stage': stage,
+                                'progress': JOB_PROGRESS.get(stage, 0.0)}), False
+
+def analytics_delta(old, new):
+    """The figures and chart series of `new` that differ from `old`"""
+    delta = {key: value for key, value in new.items() if key != 'chart_data' and old.get(key) != value}
+    charts = {key: value for key, value in new['chart_data'].items() if old['chart_data'].get(key) != value}
+    if charts:
+        delta['chart_data'] = charts
+    return delta
+
+class AnalyticsFeed:
+    """Events for the dashboard: one full snapshot, then a delta whenever documents are recorded"""
+    
+    def __init__(self):
+        self.last = None
+        self.count = None
+    
+    def poll(self):
+        """(message or None, whether the stream is finished)"""
+        # One aggregate row tells whether anything changed, in any worker
+        count = document_store.summary()[0]
+        if self.last is not None and count == self.count:
+            return None, False
         
-        # Create CSV rows
-        for doc in processed_documents:
+        payload = analytics_payload()
+        message = sse('snapshot', payload) if self.last is None else sse('delta', analytics_delta(self.last, payload))
+        self.last, self.count = payload, count
+        return message, False
+
+def event_stream(feed, seconds):
+    """Poll a feed every SSE_INTERVAL, yielding its events until it finishes or `seconds` pass"""
+    deadline = time.monotonic() + seconds
+    last_sent = time.monotonic()
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    while time.monotonic() < deadline:
+        message, finished = feed.poll()
+        if message:
+            yield message
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent > SSE_KEEPALIVE:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        if finished:
+            return
+        time.sleep(app.config['SSE_INTERVAL'])
+
+def event_response(feed):
+    seconds = app.config['SSE_STREAM_SECONDS']
+    # A single-threaded worker (gunicorn's sync workers) serves nothing else while a
+    # stream is open and is killed once it overruns its timeout, so keep its streams short
+    if not request.environ.get('wsgi.multithread'):
+        seconds = min(seconds, app.config['SSE_SYNC_STREAM_SECONDS'])
+    return Response(stream_with_context(event_stream(feed, seconds)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent progress events for an extraction job"""
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return event_response(JobFeed(job_id))
+
+@app.route('/analytics/events')
+def analytics_events():
+    """Server-sent analytics: a snapshot, then deltas as documents are processed"""
+    return event_response(AnalyticsFeed())
+
+def prometheus_labels(labels):
+    """Render a label dict in Prometheus exposition syntax"""
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+def prometheus_histogram(name, histogram, labels=None):
+    """Exposition lines for a stored histogram; stored buckets are not cumulative"""
+    labels = labels or {}
+    lines, cumulative = [], 0
+    for bucket, count in zip(histogram['buckets'], histogram['counts']):
+        cumulative += count
+        lines.append(f"{name}_bucket{prometheus_labels(dict(labels, le=bucket))} {cumulative}")
+    lines.append(f"{name}_sum{prometheus_labels(labels)} {histogram['sum']}")
+    lines.append(f"{name}_count{prometheus_labels(labels)} {cumulative}")
+    return lines
+
+@app.route('/metrics')
+def metrics():
+    """Pipeline metrics in Prometheus text format, aggregated across every worker"""
+    lines = [
+        '# HELP idp_documents_processed_total Documents processed, by document type',
+        '# TYPE idp_documents_processed_total counter'
+    ]
+    for doc_type, count in sorted(document_store.type_counts().items()):
+        lines.append(f"idp_documents_processed_total{prometheus_labels({'document_type': doc_type})} {count}")
+    
+    lines += [
+        '# HELP idp_processing_seconds End-to-end processing time per document',
+        '# TYPE idp_processing_seconds histogram'
+    ]
+    lines += prometheus_histogram('idp_processing_seconds', document_store.latency_histogram())
+    
+    lines += [
+        '# HELP idp_stage_seconds Time per document spent in each pipeline stage',
+        '# TYPE idp_stage_seconds histogram'
+    ]
+    for stage, histogram in document_store.stage_histograms().items():
+        lines += prometheus_histogram('idp_stage_seconds', histogram, {'stage': stage})
+    
+    lines += [
+        '# HELP idp_ocr_cache_documents_total Documents by OCR cache outcome',
+        '# TYPE idp_ocr_cache_documents_total counter'
+    ]
+    for status, count in sorted(document_store.cache_counts().items()):
+        lines.append(f"idp_ocr_cache_documents_total{prometheus_labels({'result': status})} {count}")
+    
+    lines += [
+        '# HELP idp_ocr_cache_disk_bytes Bytes held by the on-disk OCR cache',
+        '# TYPE idp_ocr_cache_disk_bytes gauge',
+        f"idp_ocr_cache_disk_bytes {ocr_cache.stats()['disk_bytes']}",
+        '# HELP idp_job_queue_depth Documents queued or being processed by this process',
+        '# TYPE idp_job_queue_depth gauge',
+        f'idp_job_queue_depth {job_queue.depth()}'
+    ]
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+def export_filters(args):
+    """Document filters from export query parameters
+    
+    `start` and `end` are inclusive YYYY-MM-DD dates. Raises ValueError on
+    malformed dates.
+    """
+    filters = {'document_type': args.get('document_type') or None}
+    if args.get('start'):
+        filters['start'] = datetime.strptime(args['start'], '%Y-%m-%d').date().isoformat()
+    if args.get('end'):
+        end = datetime.strptime(args['end'], '%Y-%m-%d') + timedelta(days=1)
+        filters['end'] = end.date().isoformat()
+    return filters
+
+def csv_chunks(documents, columns, batch_size=500):
+    """Encode documents as CSV text, one chunk per batch of rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for i, doc in enumerate(documents, 1):
+        writer.writerow(doc)
+        if i % batch_size == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+# Formats the date pattern can capture; day-first, as on the sample documents
+DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%d %b %Y', '%d %B %Y',
+                '%d %b %y', '%Y-%m-%d', '%Y/%m/%d')
+
+# Column order of the typed (Parquet/XLSX) exports
+TYPED_COLUMNS = ['document_type', 'company_name', 'invoice_number', 'date', 'amount', 'tax',
+                 'tax_rate', 'form_type', 'contact_name', 'email', 'phone', 'raw_text', 'processing_time', 'timestamp', 'file_name', 'ocr_cache']
+
+def parse_amount(value):
+    """Extracted money string ('1,234.50') as a float, or None"""
+    try:
+        return float(value.replace(',', '')) if value else None
+    except ValueError:
+        return None
+
+def parse_date(value):
+    """Extracted date string as a date, or None"""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format).date()
+        except (AttributeError, ValueError):
+            continue
+    return None
+
+def normalize_document(doc):
+    """Stored document with typed amounts and dates for columnar exports
+    
+    Percentage taxes ('10%') go to tax_rate as a fraction; tax holds amounts.
+    """
+    tax = doc.get('tax') or ''
+    rate = parse_amount(tax[:-1]) if tax.endswith('%') else None
+    typed = dict(doc)
+    typed['date'] = parse_date(doc.get('date'))
+    typed['amount'] = parse_amount(doc.get('amount'))
+    typed['tax'] = None if tax.endswith('%') else parse_amount(tax)
+    typed['tax_rate'] = rate / 100 if rate is not None else None
+    typed['timestamp'] = datetime.fromisoformat(doc['timestamp'])
+    return typed
+
+def batched(iterable, size):
+    """Lists of up to `size` items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            break
+        yield batch
+
+def write_parquet(documents, output, chunk_rows):
+    """Write documents to a typed Parquet file, one row group per chunk"""
+    schema = pa.schema([
+        ('document_type', pa.string()), ('company_name', pa.string()),
+        ('invoice_number', pa.string()), ('date', pa.date32()), ('amount', pa.float64()),
+        ('tax', pa.float64()), ('tax_rate', pa.float64()), ('form_type', pa.string()),
+        ('contact_name', pa.string()), ('email', pa.string()), ('phone', pa.string()),
+        ('raw_text', pa.string()),
+        ('processing_time', pa.float64()), ('timestamp', pa.timestamp('us')),
+        ('file_name', pa.string()), ('ocr_cache', pa.string())
+    ])
+    with pq.ParquetWriter(output, schema, compression='zstd') as writer:
+        for batch in batched(map(normalize_document, documents), chunk_rows):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+def write_xlsx(documents, output, chunk_rows):
+    """Write documents to an XLSX workbook in write-only (streaming) mode"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Documents')
+    sheet.append(TYPED_COLUMNS)
+    for batch in batched(map(normalize_document, documents), chunk_rows):
+        for doc in batch:
             row = []
-            for key in all_keys:
-                value = doc.get(key, '')
-                # Escape commas and quotes
-                if ',' in str(value) or '"' in str(value):
-                    value = f'"{str(value).replace('"', '""')}"'
-                row.append(str(value))
-            csv_data += ','.join(row) + '\n'
-    
-    # Create file response
-    output = io.BytesIO()
-    output.write(csv_data.encode('utf-8'))
-    output.seek(0)
+            for column in TYPED_COLUMNS:
+                value = doc.get(column)
+                if isinstance(value, str):
+                    # Excel rejects control characters and caps cells at 32,767 characters
+                    value = ILLEGAL_CHARACTERS_RE.sub('', value)[:32767]
+                row.append(value)
+            sheet.append(row)
+    workbook.save(output)
+
+def gzip_chunks(chunks):
+    """Incrementally gzip a stream of byte chunks"""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def csv_export(args):
+    """(chunks, file name, mimetype) for a CSV export of the documents matching `args`
+    
+    Raises ValueError for malformed dates or when nothing matches. The chunks
+    read from this thread's database connection, so they must be consumed on
+    the calling thread.
+    """
+    try:
+        filters = export_filters(args)
+    except ValueError:
+        raise ValueError('Dates must be formatted as YYYY-MM-DD') from None
+    
+    documents = document_store.iter_documents(**filters)
+    first = next(documents, None)
+    if first is None:
+        raise ValueError('No data to export')
+    
+    chunks = csv_chunks(itertools.chain([first], documents), DocumentStore.COLUMNS)
+    file_name = f'extracted_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    mimetype = 'text/csv'
+    if args.get('gzip', '').lower() in ('1', 'true', 'yes'):
+        chunks = gzip_chunks(chunks)
+        file_name += '.gz'
+        mimetype = 'application/gzip'
+    return chunks, file_name, mimetype
+
+@app.route('/export_csv')
+def export_csv():
+    """Stream processed documents as CSV, optionally filtered and gzipped"""
+    try:
+        chunks, file_name, mimetype = csv_export(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={file_name}'}
+    )
+
+def export_typed(writer, extension, mimetype):
+    """Write filtered documents with `writer` to a temporary file and send it"""
+    try:
+        filters = export_filters(request.args)
+    except ValueError:
+        return jsonify({'error': 'Dates must be formatted as YYYY-MM-DD'}), 400
     
+    documents = document_store.iter_documents(**filters)
+    first = next(documents, None)
+    if first is None:
+        return jsonify({'error': 'No data to export'}), 400
+    
+    output = tempfile.TemporaryFile()
+    writer(itertools.chain([first], documents), output, app.config['EXPORT_CHUNK_ROWS'])
+    output.seek(0)
     return send_file(
         output,
-        mimetype='text/csv',
+        mimetype=mimetype,
         as_attachment=True,
-        download_name=f'extracted_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        download_name=f'extracted_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
     )
 
+@app.route('/export_parquet')
+def export_parquet():
+    """Export processed documents as typed Parquet"""
+    if not PYARROW_AVAILABLE:
+        return jsonify({'error': 'Parquet export requires pyarrow'}), 501
+    return export_typed(write_parquet, 'parquet', 'application/vnd.apache.parquet')
+
+@app.route('/export_xlsx')
+def export_xlsx():
+    """Export processed documents as an Excel workbook"""
+    if not OPENPYXL_AVAILABLE:
+        return jsonify({'error': 'Excel export requires openpyxl'}), 501
+    return export_typed(write_xlsx, 'xlsx',
+                        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
 @app.route('/simulate_automation', methods=['POST'])
 def simulate_automation():
-    """Simulate sending data to automation system"""
-    data = request.get_json()
+    """Queue extracted data for delivery to the automation system"""
+    data = request.get_json(silent=True) or {}
     
-    # Simulate processing delay
-    import time
-    time.sleep(1)
+    try:
+        delivery = delivery_queue.enqueue(data)
+    except sqlite3.Error as e:
+        return jsonify({'success': False, 'message': f'Could not queue data: {e}'}), 503
     
     return jsonify({
         'success': True,
-        'message': 'Data successfully sent to Innovo Automation Framework',
-        'automation_id': f'AUTO_{uuid.uuid4().hex[:8].upper()}',
-        'status': 'Queued for processing'
-    })
+        'message': 'Data queued for the Innovo Automation Framework',
+        'automation_id': delivery['automation_id'],
+        'status': delivery['status'],
+        'status_url': url_for('get_automation', automation_id=delivery['automation_id'])
+    }), 202
+
+@app.route('/automations/<automation_id>')
+def get_automation(automation_id):
+    """Delivery status of data sent to the automation system"""
+    delivery = delivery_queue.get(automation_id)
+    if delivery is None:
+        return jsonify({'error': 'Automation not found'}), 404
+    return jsonify(delivery)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point: serve the app on an event loop
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+/upload, /extract, /jobs/<job_id>, /analytics, /export_csv and the event
+streams run as async routes: request bodies and responses stream on the event
+loop, and file, database and OCR pool work is offloaded to threads, so a slow
+client costs a coroutine rather than an OS thread. Every other route is served
+by the Flask app through a WSGI bridge, keeping the route surface identical.
+"""
+
+import asyncio
+import contextlib
+import os
+import queue
+import threading
+import time
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import (app as flask_app, AnalyticsFeed, JobFeed, SSE_KEEPALIVE, SSE_RETRY_MS, analytics_payload,
+                 csv_export, delivery_queue, extraction_request, job_queue, record_result, save_upload)
+
+# Chunks an export may run ahead of a slow client
+EXPORT_BUFFER_CHUNKS = 8
+
+
+async def upload_file(request):
+    length = request.headers.get('content-length')
+    if length and int(length) > flask_app.config['MAX_CONTENT_LENGTH']:
+        return JSONResponse({'error': 'File too large'}, status_code=413)
+
+    form = await request.form()
+    try:
+        file = form.get('file')
+        if not isinstance(file, UploadFile):
+            return JSONResponse({'error': 'No file uploaded'}, status_code=400)
+        if not file.filename:
+            return JSONResponse({'error': 'No file selected'}, status_code=400)
+        filepath = await run_in_threadpool(save_upload, file.filename, file.file)
+    finally:
+        await form.close()
+    return JSONResponse({'filename': os.path.basename(filepath), 'filepath': filepath})
+
+
+async def extract_data(request):
+    try:
+        data = await request.json()
+        filepath, profile = extraction_request(data)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    try:
+        job = await run_in_threadpool(job_queue.submit, filepath, on_complete=record_result, profile=profile)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+    return JSONResponse({
+        'success': True,
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'status_url': request.app.url_path_for('get_job', job_id=job['job_id']),
+        'events_url': request.app.url_path_for('job_events', job_id=job['job_id'])
+    }, status_code=202)
+
+
+async def get_job(request):
+    """Status and, once finished, results of an extraction job"""
+    job = await run_in_threadpool(job_queue.get, request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({'error': 'Job not found'}, status_code=404)
+    return JSONResponse(job)
+
+
+async def get_analytics(request):
+    return JSONResponse(await run_in_threadpool(analytics_payload))
+
+
+def produce_export(args, output, stop):
+    """Thread body: run a CSV export, passing its header and chunks through `output`
+
+    The database cursor behind an export belongs to the thread that opened
+    it, so the whole export runs on this one thread. It blocks while the
+    client is slow and gives up once `stop` is set.
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        chunks, file_name, mimetype = csv_export(args)
+    except Exception as e:
+        put(('error', e))
+        return
+    if not put(('start', (file_name, mimetype))):
+        return
+    try:
+        for chunk in chunks:
+            if not put(('chunk', chunk)):
+                return
+    except Exception as e:
+        print(f"CSV export failed: {e}")
+    put(('end', None))
+
+
+async def export_csv(request):
+    """Stream processed documents as CSV, optionally filtered and gzipped"""
+    output, stop = queue.Queue(maxsize=EXPORT_BUFFER_CHUNKS), threading.Event()
+    threading.Thread(target=produce_export, args=(request.query_params, output, stop),
+                     name='csv-export', daemon=True).start()
+
+    kind, value = await run_in_threadpool(output.get)
+    if kind == 'error':
+        stop.set()
+        return JSONResponse({'error': str(value)}, status_code=400 if isinstance(value, ValueError) else 500)
+    file_name, mimetype = value
+
+    async def body():
+        try:
+            while True:
+                kind, value = await run_in_threadpool(output.get)
+                if kind != 'chunk':
+                    break
+                yield value
+        finally:
+            stop.set()  # also reached when the client disconnects
+
+    return StreamingResponse(body(), media_type=mimetype,
+                             headers={'Content-Disposition': f'attachment; filename={file_name}'})
+
+
+async def event_stream(feed, request):
+    """Async counterpart of app.event_stream; a waiting client holds no thread"""
+    config = flask_app.config
+    deadline = time.monotonic() + config['SSE_STREAM_SECONDS']
+    last_sent = time.monotonic()
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    while time.monotonic() < deadline and not await request.is_disconnected():
+        message, finished = await run_in_threadpool(feed.poll)
+        if message:
+            yield message
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent > SSE_KEEPALIVE:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        if finished:
+            return
+        await asyncio.sleep(config['SSE_INTERVAL'])
+
+
+def event_response(feed, request):
+    return StreamingResponse(event_stream(feed, request), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def job_events(request):
+    """Server-sent progress events for an extraction job"""
+    job_id = request.path_params['job_id']
+    if await run_in_threadpool(job_queue.get, job_id) is None:
+        return JSONResponse({'error': 'Job not found'}, status_code=404)
+    return event_response(JobFeed(job_id), request)
+
+
+async def analytics_events(request):
+    return event_response(AnalyticsFeed(), request)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Deliver automation records a previous run left pending, without waiting for a bridged request
+    await run_in_threadpool(delivery_queue.resume)
+    yield
+
+
+app = Starlette(lifespan=lifespan, routes=[
+    Route('/upload', upload_file, methods=['POST'], name='upload_file'),
+    Route('/extract', extract_data, methods=['POST'], name='extract_data'),
+    Route('/jobs/{job_id}', get_job, name='get_job'),
+    Route('/jobs/{job_id}/events', job_events, name='job_events'),
+    Route('/analytics', get_analytics, name='get_analytics'),
+    Route('/analytics/events', analytics_events, name='analytics_events'),
+    Route('/export_csv', export_csv, name='export_csv'),
+    Mount('/', app=WSGIMiddleware(flask_app))
+])
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi:app', host='0.0.0.0', port=int(os.environ.get('PORT', 5001)))
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Benchmark the document pipeline stage by stage and end to end through the Flask routes.
+Reports throughput, p50/p95/p99 latency and peak RSS as JSON for comparison across commits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Benchmark runs use a scratch document store and OCR cache, so results are not
+# skewed by earlier runs and the real analytics stay untouched
+SCRATCH = tempfile.mkdtemp(prefix='idp-benchmark-')
+os.environ.setdefault('DATABASE', os.path.join(SCRATCH, 'benchmark.sqlite3'))
+os.environ.setdefault('CACHE_FOLDER', os.path.join(SCRATCH, 'cache'))
+
+from app import app, processor, record_result, job_queue, document_store, ocr_cache, PIPELINE_STAGES
+from create_sample_docs import generate_corpus
+
+
+def load_corpus(args):
+    """Manifest entries of the corpus to benchmark, generating one unless --corpus is given"""
+    folder = args.corpus
+    if folder is None:
+        folder = os.path.join(SCRATCH, 'corpus')
+        start = time.perf_counter()
+        generate_corpus(folder, args.documents, seed=args.seed, multipage=args.multipage)
+        print(f"Generated {args.documents} documents in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    with open(os.path.join(folder, 'manifest.json')) as f:
+        documents = json.load(f)['documents'][:args.documents]
+    for entry in documents:
+        entry['path'] = os.path.join(folder, entry['file_name'])
+    return documents
+
+
+def field_matches(expected, actual):
+    """Whether an extracted value matches the ground truth, ignoring case and thousands separators"""
+    normalize = lambda value: (value or '').strip().lower().replace(',', '')
+    return normalize(expected) == normalize(actual)
+
+
+def summarize(latencies, wall_time=None):
+    """Throughput and p50/p95/p99 (milliseconds) for a list of latencies in seconds"""
+    if not latencies:
+        return {}
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0]
+    elapsed = wall_time if wall_time is not None else sum(latencies)
+    return {
+        'count': len(latencies),
+        'throughput_per_s': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50_ms': round(p50 * 1000, 2),
+        'p95_ms': round(p95 * 1000, 2),
+        'p99_ms': round(p99 * 1000, 2)
+    }
+
+
+def run_stages(documents, profile):
+    """Run DocumentProcessor in-process, collecting per-stage timings and accuracy against the manifest"""
+    stages = {stage: [] for stage in PIPELINE_STAGES}
+    totals = []
+    type_hits = field_hits = field_total = 0
+    for entry in documents:
+        start = time.perf_counter()
+        result = processor.process_document(entry['path'], profile=profile)
+        persist_start = time.perf_counter()
+        record_result(result)
+        end = time.perf_counter()
+        for stage, elapsed in result['timings'].items():
+            stages[stage].append(elapsed)
+        stages['persistence'].append(end - persist_start)
+        totals.append(end - start)
+
+        type_hits += result['document_type'] == entry['document_type']
+        for field, expected in entry['fields'].items():
+            field_hits += field_matches(expected, result.get(field))
+            field_total += 1
+    report = {stage: summarize(latencies) for stage, latencies in stages.items() if latencies}
+    report['total'] = summarize(totals)
+    report['accuracy'] = {
+        'document_type': round(type_hits / len(documents), 3) if documents else None,
+        'fields': round(field_hits / field_total, 3) if field_total else None
+    }
+    return report
+
+
+def run_end_to_end(client, paths, profile, timeout):
+    """Upload and queue every document through the routes, then poll the jobs to completion"""
+    start = time.perf_counter()
+    submitted = {}
+    for path in paths:
+        submit_time = time.perf_counter()
+        with open(path, 'rb') as f:
+            upload = client.post('/upload', data={'file': (f, os.path.basename(path))}).get_json()
+        job = client.post('/extract', json={'filepath': upload['filepath'], 'profile': profile}).get_json()
+        submitted[job['job_id']] = submit_time
+
+    latencies, failures = [], 0
+    deadline = time.perf_counter() + timeout
+    while submitted and time.perf_counter() < deadline:
+        for job_id in list(submitted):
+            status = client.get(f'/jobs/{job_id}').get_json()['status']
+            if status in ('done', 'failed'):
+                latencies.append(time.perf_counter() - submitted.pop(job_id))
+                failures += status == 'failed'
+        time.sleep(0.01)
+
+    report = summarize(latencies, time.perf_counter() - start)
+    report.update({'failed': failures, 'timed_out': len(submitted)})
+    return report
+
+
+def run_batch(client, paths, profile):
+    """POST every document to /batch_extract and time each streamed result line"""
+    files = [(open(path, 'rb'), os.path.basename(path)) for path in paths]
+    start = time.perf_counter()
+    try:
+        response = client.post('/batch_extract', data={'files': files, 'profile': profile})
+        latencies, failures = [], 0
+        for line in response.response:
+            for record in filter(None, line.decode('utf-8').splitlines()):
+                latencies.append(time.perf_counter() - start)
+                failures += not json.loads(record)['success']
+    finally:
+        for f, _ in files:
+            f.close()
+    report = summarize(latencies, time.perf_counter() - start)
+    report['failed'] = failures
+    return report
+
+
+def fresh_cache():
+    """Empty the OCR cache and restart the OCR pool, so a phase never reads OCR done by an earlier one"""
+    ocr_cache.clear()
+    # Pool workers keep their own in-memory cache
+    if job_queue.executor is not None:
+        job_queue.executor.shutdown(wait=True)
+        job_queue.executor = None
+    return document_store.cache_counts()
+
+
+def cache_outcomes(before):
+    """OCR cache outcomes recorded since `before` (a cache_counts() snapshot)"""
+    after = document_store.cache_counts()
+    return {outcome: after.get(outcome, 0) - before.get(outcome, 0)
+            for outcome in ('hit', 'miss', 'bypass')}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its finished children, in MB"""
+    if resource is None:
+        return None, None
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--documents', type=int, default=30, help='synthetic documents to generate')
+    parser.add_argument('--seed', type=int, default=0, help='corpus random seed')
+    parser.add_argument('--multipage', type=float, default=0.0, help='share of invoices generated as multi-page PDFs')
+    parser.add_argument('--corpus', help='benchmark an existing create_sample_docs.py --corpus directory instead')
+    parser.add_argument('--profile', default=app.config['PREPROCESS_PROFILE'], help='preprocessing tier')
+    parser.add_argument('--skip', nargs='*', default=[], choices=['stages', 'end_to_end', 'batch'],
+                        help='benchmarks to leave out')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds to wait for queued jobs')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    documents = load_corpus(args)
+    paths = [entry['path'] for entry in documents]
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'ocr_engine': processor.ocr_engine(),
+        'profile': args.profile,
+        'documents': len(paths),
+        'seed': args.seed,
+        'ocr_workers': app.config['OCR_WORKERS'],
+        'ocr_pool': app.config['OCR_POOL']
+    }
+    client = app.test_client()
+    phases = [
+        ('stages', "Running pipeline stages in-process...", lambda: run_stages(documents, args.profile)),
+        ('end_to_end', "Running /upload + /extract end to end...",
+         lambda: run_end_to_end(client, paths, args.profile, args.timeout)),
+        ('batch', "Running /batch_extract...", lambda: run_batch(client, paths, args.profile))
+    ]
+    for phase, message, run in phases:
+        if phase in args.skip:
+            continue
+        print(message, file=sys.stderr)
+        before = fresh_cache()
+        report[phase] = run()
+        report[phase]['ocr_cache'] = cache_outcomes(before)
+
+    # Workers only report their peak RSS once they have exited
+    if job_queue.executor is not None:
+        job_queue.executor.shutdown(wait=True)
+    report['peak_rss_mb'], report['peak_rss_workers_mb'] = peak_rss_mb()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"Report written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
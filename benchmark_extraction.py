@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for regex field extraction: FieldExtractor vs the original re.search loop
+"""
+
+import argparse
+import re
+import sys
+import timeit
+
+from app import DocumentProcessor
+
+
+def legacy_extract(patterns, text):
+    """The original per-field, per-pattern re.search loop"""
+    found = {}
+    for field, field_patterns in patterns.items():
+        for pattern in field_patterns:
+            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+            if match:
+                found[field] = match.group(1).strip()
+                break
+    return found
+
+
+def build_corpus(processor, pages):
+    """Multi-page OCR-like text for each sample document type"""
+    return {
+        doc_type: '\n'.join([processor.mock_ocr_extraction(f"{doc_type}.png")] * pages)
+        for doc_type in ('invoice', 'receipt', 'form')
+    }
+
+
+def time_call(func, text, number):
+    """Best-of-five average time per call in microseconds"""
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 5, 20],
+                        help='document lengths to benchmark, in pages')
+    parser.add_argument('--number', type=int, default=200, help='calls per timing run')
+    args = parser.parse_args()
+
+    processor = DocumentProcessor()
+    extractor = processor.extractor
+
+    print(f"{'document':<10}{'pages':>6}{'legacy (us)':>14}{'compiled (us)':>16}{'speedup':>10}")
+    for pages in args.pages:
+        for doc_type, text in build_corpus(processor, pages).items():
+            expected = legacy_extract(processor.patterns, text)
+            if extractor.extract(text) != expected:
+                print(f"Mismatch on {doc_type} x{pages}: results differ from the legacy loop")
+                return 1
+
+            legacy = time_call(lambda t: legacy_extract(processor.patterns, t), text, args.number)
+            compiled = time_call(extractor.extract, text, args.number)
+            print(f"{doc_type:<10}{pages:>6}{legacy:>14.1f}{compiled:>16.1f}{legacy / compiled:>9.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the preprocessing tiers on the sample documents: latency and extraction accuracy
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+from app import DocumentProcessor, PREPROCESS_PROFILES, OPENCV_AVAILABLE, read_document
+
+FIELDS = ['company_name', 'invoice_number', 'date', 'amount', 'tax']
+REFERENCE_PROFILE = 'quality'
+
+
+def expected_type(file_name):
+    """Document type implied by a sample document's file name"""
+    for prefix, doc_type in (('invoice', 'Invoice'), ('receipt', 'Receipt'), ('form', 'Form')):
+        if os.path.basename(file_name).startswith(prefix):
+            return doc_type
+    return 'Unknown'
+
+
+def run_tier(processor, documents, profile, repeat):
+    """Median preprocessing latency and extraction results for one tier"""
+    latencies = []
+    results = {}
+    for path, content in documents.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            processed = processor.preprocess_image(content, profile)
+            timings.append(time.perf_counter() - start)
+        latencies.append(statistics.median(timings))
+
+        start = time.perf_counter()
+        text = processor.extract_text(processed, os.path.basename(path))
+        ocr_time = time.perf_counter() - start
+        results[path] = (processor.extract_structured_data(text), ocr_time)
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', default='static/sample_docs', help='directory of sample images')
+    parser.add_argument('--repeat', type=int, default=3, help='preprocessing runs per document')
+    parser.add_argument('--json', dest='json_path', help='also write the report to this file')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.docs, '*.png')))
+    if not paths:
+        print(f"No sample documents found in {args.docs}; run create_sample_docs.py first")
+        return 1
+    if not OPENCV_AVAILABLE:
+        print("OpenCV is not installed; every tier is a no-op")
+
+    processor = DocumentProcessor()
+    documents = {path: read_document(path) for path in paths}
+    print(f"OCR engine: {processor.ocr_engine()}, {len(paths)} documents\n")
+
+    tiers = {profile: run_tier(processor, documents, profile, args.repeat)
+             for profile in PREPROCESS_PROFILES}
+    reference = tiers[REFERENCE_PROFILE][1]
+
+    report = {'ocr_engine': processor.ocr_engine(), 'documents': len(paths), 'tiers': {}}
+    print(f"{'tier':<10}{'preprocess p50 (ms)':>21}{'ocr mean (ms)':>15}{'type acc':>10}{'field agreement':>17}")
+    for profile, (latencies, results) in tiers.items():
+        type_hits = sum(result['document_type'] == expected_type(path)
+                        for path, (result, _) in results.items())
+        field_hits = sum(result[field] == reference[path][0][field]
+                         for path, (result, _) in results.items() for field in FIELDS)
+        summary = {
+            'preprocess_p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'ocr_mean_ms': round(statistics.mean(t for _, t in results.values()) * 1000, 2),
+            'document_type_accuracy': round(type_hits / len(results), 3),
+            'field_agreement_with_quality': round(field_hits / (len(results) * len(FIELDS)), 3)
+        }
+        report['tiers'][profile] = summary
+        print(f"{profile:<10}{summary['preprocess_p50_ms']:>21.2f}{summary['ocr_mean_ms']:>15.2f}"
+              f"{summary['document_type_accuracy']:>10.0%}{summary['field_agreement_with_quality']:>17.0%}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json_path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,229 +1,404 @@
 #!/usr/bin/env python3
 """
 Script to create sample documents for testing the IDP system
+
+Without arguments it draws the nine demo documents into static/sample_docs.
+With --corpus it generates a large, varied synthetic corpus in parallel, plus a
+ground-truth manifest of the fields each document should yield.
 """
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageChops
+import numpy as np
+import argparse
+import glob
+import json
 import os
 import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
-def create_sample_invoice(invoice_num, company_name, amount, date, output_path):
-    """Create a sample invoice image"""
-    # Create image
+COMPANIES = [
+    "ABC Traders Pty Ltd",
+    "Sydney Tech Solutions",
+    "Melbourne Business Co",
+    "Perth Digital Services",
+    "Brisbane Innovation Hub"
+]
+STORES = ["Coffee Corner", "Quick Mart", "City Cafe"]
+FORM_TYPES = ["Project Request", "Expense Report", "Timesheet"]
+
+# Layout of the original demo documents; corpus documents vary these
+DEFAULT_STYLE = {'font': "/System/Library/Fonts/Arial.ttf", 'font_scale': 1.0,
+                 'margin': 50, 'top': 0, 'column': None}
+
+FONT_DIRS = ['/usr/share/fonts', '/Library/Fonts', '/System/Library/Fonts', 'C:/Windows/Fonts']
+_fonts = None
+
+def available_fonts():
+    """TrueType fonts installed on this machine (looked up once per process)"""
+    global _fonts
+    if _fonts is None:
+        _fonts = sorted(path for folder in FONT_DIRS
+                        for path in glob.glob(os.path.join(folder, '**', '*.ttf'), recursive=True))
+    return _fonts
+
+def load_fonts(style, sizes):
+    """Fonts at each size for a style, falling back to Pillow's built-in font"""
+    scaled = [max(8, int(size * style['font_scale'])) for size in sizes]
+    try:
+        return [ImageFont.truetype(style['font'], size) for size in scaled]
+    except (OSError, TypeError):
+        try:
+            return [ImageFont.load_default(size) for size in scaled]
+        except TypeError:  # Pillow < 10.1 has a single fixed-size default font
+            return [ImageFont.load_default() for _ in scaled]
+
+def draw_invoice(invoice_num, company_name, amount, date, style=None):
+    """Draw an invoice page and return the image"""
+    style = dict(DEFAULT_STYLE, **(style or {}))
     width, height = 800, 1000
     image = Image.new('RGB', (width, height), 'white')
     draw = ImageDraw.Draw(image)
-    
-    # Try to use a default font, fallback to basic if not available
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 24)
-        header_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 18)
-        body_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 14)
-        small_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 12)
-    except:
-        title_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        body_font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
-    
+    title_font, header_font, body_font, small_font = load_fonts(style, (24, 18, 14, 12))
+    x, top, column = style['margin'], style['top'], style['column'] or 400
+
     # Colors
     blue = (37, 99, 235)
     dark_gray = (31, 41, 55)
     gray = (107, 114, 128)
-    
+
     # Header
-    draw.text((50, 50), "INVOICE", fill=blue, font=title_font)
-    draw.text((50, 90), f"Invoice #: {invoice_num}", fill=dark_gray, font=header_font)
-    draw.text((50, 120), f"Date: {date}", fill=dark_gray, font=body_font)
-    
+    draw.text((x, top + 50), "INVOICE", fill=blue, font=title_font)
+    draw.text((x, top + 90), f"Invoice #: {invoice_num}", fill=dark_gray, font=header_font)
+    draw.text((x, top + 120), f"Date: {date}", fill=dark_gray, font=body_font)
+
     # Company info
-    draw.text((50, 200), f"Bill To: {company_name}", fill=dark_gray, font=header_font)
-    draw.text((50, 230), "123 Business Street", fill=gray, font=body_font)
-    draw.text((50, 250), "Sydney, NSW 2000", fill=gray, font=body_font)
-    draw.text((50, 270), "Australia", fill=gray, font=body_font)
-    
+    draw.text((x, top + 200), f"Bill To: {company_name}", fill=dark_gray, font=header_font)
+    draw.text((x, top + 230), "123 Business Street", fill=gray, font=body_font)
+    draw.text((x, top + 250), "Sydney, NSW 2000", fill=gray, font=body_font)
+    draw.text((x, top + 270), "Australia", fill=gray, font=body_font)
+
     # Invoice details
-    y_pos = 350
-    draw.text((50, y_pos), "Description", fill=dark_gray, font=header_font)
-    draw.text((400, y_pos), "Amount", fill=dark_gray, font=header_font)
-    
+    y_pos = top + 350
+    draw.text((x, y_pos), "Description", fill=dark_gray, font=header_font)
+    draw.text((column, y_pos), "Amount", fill=dark_gray, font=header_font)
+
     # Line
-    draw.line([(50, y_pos + 30), (750, y_pos + 30)], fill=gray, width=1)
-    
+    draw.line([(x, y_pos + 30), (width - x, y_pos + 30)], fill=gray, width=1)
+
     # Items
     items = [
         ("Professional Services", f"${amount:.2f}"),
         ("GST (10%)", f"${amount * 0.1:.2f}"),
     ]
-    
+
     y_pos += 50
     for desc, amt in items:
-        draw.text((50, y_pos), desc, fill=dark_gray, font=body_font)
-        draw.text((400, y_pos), amt, fill=dark_gray, font=body_font)
+        draw.text((x, y_pos), desc, fill=dark_gray, font=body_font)
+        draw.text((column, y_pos), amt, fill=dark_gray, font=body_font)
         y_pos += 30
-    
+
     # Total
-    draw.line([(50, y_pos), (750, y_pos)], fill=gray, width=2)
+    draw.line([(x, y_pos), (width - x, y_pos)], fill=gray, width=2)
     y_pos += 20
     total = amount * 1.1
-    draw.text((50, y_pos), "TOTAL", fill=blue, font=header_font)
-    draw.text((400, y_pos), f"${total:.2f}", fill=blue, font=header_font)
-    
+    draw.text((x, y_pos), "TOTAL", fill=blue, font=header_font)
+    draw.text((column, y_pos), f"${total:.2f}", fill=blue, font=header_font)
+
     # Footer
-    draw.text((50, height - 100), "Thank you for your business!", fill=gray, font=body_font)
-    draw.text((50, height - 80), "Payment due within 30 days", fill=gray, font=small_font)
-    
-    # Save image
-    image.save(output_path, 'PNG')
-    print(f"Created invoice: {output_path}")
+    draw.text((x, height - 100), "Thank you for your business!", fill=gray, font=body_font)
+    draw.text((x, height - 80), "Payment due within 30 days", fill=gray, font=small_font)
 
-def create_sample_receipt(receipt_num, store_name, amount, date, output_path):
-    """Create a sample receipt image"""
+    return image
+
+def draw_continuation(invoice_num, page, pages, style=None):
+    """Draw a terms-and-conditions page that follows an invoice"""
+    style = dict(DEFAULT_STYLE, **(style or {}))
+    image = Image.new('RGB', (800, 1000), 'white')
+    draw = ImageDraw.Draw(image)
+    header_font, body_font = load_fonts(style, (18, 14))
+    x, top = style['margin'], style['top']
+    gray = (107, 114, 128)
+
+    draw.text((x, top + 50), f"Terms and Conditions ({invoice_num})", fill=gray, font=header_font)
+    for line in range(12):
+        draw.text((x, top + 100 + line * 40), f"{page}.{line + 1} Goods remain the property of the supplier "
+                  "until paid in full.", fill=gray, font=body_font)
+    draw.text((x, 920), f"Page {page} of {pages}", fill=gray, font=body_font)
+    return image
+
+def draw_receipt(receipt_num, store_name, amount, date, style=None):
+    """Draw a receipt and return the image"""
+    style = dict(DEFAULT_STYLE, **(style or {}))
     width, height = 400, 600
     image = Image.new('RGB', (width, height), 'white')
     draw = ImageDraw.Draw(image)
-    
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 20)
-        header_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 16)
-        body_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 12)
-        small_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 10)
-    except:
-        title_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        body_font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
-    
+    title_font, header_font, body_font, small_font = load_fonts(style, (20, 16, 12, 10))
+    x, top, column = style['margin'], style['top'], style['column'] or 300
+    column = min(column, width - 100)
+
     # Colors
     green = (16, 185, 129)
     dark_gray = (31, 41, 55)
     gray = (107, 114, 128)
-    
+
     # Header
-    draw.text((50, 30), store_name, fill=green, font=title_font)
-    draw.text((50, 60), f"Receipt #{receipt_num}", fill=dark_gray, font=header_font)
-    draw.text((50, 85), f"Date: {date}", fill=dark_gray, font=body_font)
-    
+    draw.text((x, top + 30), store_name, fill=green, font=title_font)
+    draw.text((x, top + 60), f"Receipt #{receipt_num}", fill=dark_gray, font=header_font)
+    draw.text((x, top + 85), f"Date: {date}", fill=dark_gray, font=body_font)
+
     # Items
-    y_pos = 150
+    y_pos = top + 150
     items = [
         ("Coffee", f"${amount * 0.6:.2f}"),
         ("Sandwich", f"${amount * 0.4:.2f}"),
     ]
-    
+
     for desc, amt in items:
-        draw.text((50, y_pos), desc, fill=dark_gray, font=body_font)
-        draw.text((300, y_pos), amt, fill=dark_gray, font=body_font)
+        draw.text((x, y_pos), desc, fill=dark_gray, font=body_font)
+        draw.text((column, y_pos), amt, fill=dark_gray, font=body_font)
         y_pos += 25
-    
+
     # Total
-    draw.line([(50, y_pos + 10), (350, y_pos + 10)], fill=gray, width=1)
+    draw.line([(x, y_pos + 10), (width - x, y_pos + 10)], fill=gray, width=1)
     y_pos += 30
-    draw.text((50, y_pos), "TOTAL", fill=green, font=header_font)
-    draw.text((300, y_pos), f"${amount:.2f}", fill=green, font=header_font)
-    
+    draw.text((x, y_pos), "TOTAL", fill=green, font=header_font)
+    draw.text((column, y_pos), f"${amount:.2f}", fill=green, font=header_font)
+
     # Footer
-    draw.text((50, height - 80), "Thank you for visiting!", fill=gray, font=body_font)
-    draw.text((50, height - 60), "Have a great day!", fill=gray, font=small_font)
-    
-    image.save(output_path, 'PNG')
-    print(f"Created receipt: {output_path}")
+    draw.text((x, height - 80), "Thank you for visiting!", fill=gray, font=body_font)
+    draw.text((x, height - 60), "Have a great day!", fill=gray, font=small_font)
 
-def create_sample_form(form_type, company_name, date, output_path):
-    """Create a sample form image"""
+    return image
+
+def draw_form(form_type, company_name, date, style=None):
+    """Draw a form and return the image"""
+    style = dict(DEFAULT_STYLE, **(style or {}))
     width, height = 800, 1000
     image = Image.new('RGB', (width, height), 'white')
     draw = ImageDraw.Draw(image)
-    
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 24)
-        header_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 18)
-        body_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 14)
-        small_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 12)
-    except:
-        title_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        body_font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
-    
+    title_font, header_font, body_font, small_font = load_fonts(style, (24, 18, 14, 12))
+    x, top, column = style['margin'], style['top'], style['column'] or 300
+
     # Colors
     blue = (37, 99, 235)
     dark_gray = (31, 41, 55)
     gray = (107, 114, 128)
-    
+
     # Header
-    draw.text((50, 50), f"{form_type} FORM", fill=blue, font=title_font)
-    draw.text((50, 90), f"Date: {date}", fill=dark_gray, font=body_font)
-    
+    draw.text((x, top + 50), f"{form_type} FORM", fill=blue, font=title_font)
+    draw.text((x, top + 90), f"Date: {date}", fill=dark_gray, font=body_font)
+
     # Company info
-    draw.text((50, 150), f"Company: {company_name}", fill=dark_gray, font=header_font)
-    draw.text((50, 180), "Contact Information:", fill=dark_gray, font=body_font)
-    draw.text((50, 210), "Name: John Smith", fill=gray, font=body_font)
-    draw.text((50, 230), "Email: john@company.com", fill=gray, font=body_font)
-    draw.text((50, 250), "Phone: +61 2 1234 5678", fill=gray, font=body_font)
-    
+    draw.text((x, top + 150), f"Company: {company_name}", fill=dark_gray, font=header_font)
+    draw.text((x, top + 180), "Contact Information:", fill=dark_gray, font=body_font)
+    draw.text((x, top + 210), "Name: John Smith", fill=gray, font=body_font)
+    draw.text((x, top + 230), "Email: john@company.com", fill=gray, font=body_font)
+    draw.text((x, top + 250), "Phone: +61 2 1234 5678", fill=gray, font=body_font)
+
     # Form fields
-    y_pos = 320
+    y_pos = top + 320
     fields = [
         ("Project Name:", "Website Redesign"),
         ("Budget:", "$15,000"),
         ("Timeline:", "3 months"),
         ("Status:", "In Progress"),
     ]
-    
+
     for field, value in fields:
-        draw.text((50, y_pos), field, fill=dark_gray, font=body_font)
-        draw.text((300, y_pos), value, fill=gray, font=body_font)
+        draw.text((x, y_pos), field, fill=dark_gray, font=body_font)
+        draw.text((column, y_pos), value, fill=gray, font=body_font)
         y_pos += 30
-    
+
     # Signature
-    draw.text((50, height - 150), "Signature:", fill=dark_gray, font=body_font)
-    draw.line([(200, height - 120), (400, height - 120)], fill=gray, width=1)
-    draw.text((200, height - 100), "John Smith", fill=gray, font=small_font)
-    
-    image.save(output_path, 'PNG')
+    draw.text((x, height - 150), "Signature:", fill=dark_gray, font=body_font)
+    draw.line([(x + 150, height - 120), (x + 350, height - 120)], fill=gray, width=1)
+    draw.text((x + 150, height - 100), "John Smith", fill=gray, font=small_font)
+
+    return image
+
+def create_sample_invoice(invoice_num, company_name, amount, date, output_path, style=None):
+    """Create a sample invoice image"""
+    draw_invoice(invoice_num, company_name, amount, date, style).save(output_path, 'PNG')
+    print(f"Created invoice: {output_path}")
+
+def create_sample_receipt(receipt_num, store_name, amount, date, output_path, style=None):
+    """Create a sample receipt image"""
+    draw_receipt(receipt_num, store_name, amount, date, style).save(output_path, 'PNG')
+    print(f"Created receipt: {output_path}")
+
+def create_sample_form(form_type, company_name, date, output_path, style=None):
+    """Create a sample form image"""
+    draw_form(form_type, company_name, date, style).save(output_path, 'PNG')
     print(f"Created form: {output_path}")
 
-def main():
-    """Create sample documents"""
+def degrade(image, rng, noise, rotation):
+    """Scanner artefacts: speckle noise, slight blur and skew"""
+    if noise:
+        # Dark specks where Gaussian noise falls far below the mean
+        cutoff = 128 - int(48 / noise)
+        # Noise drawn at half resolution is much cheaper and gives 2px specks. It is
+        # seeded from the document's rng, not PIL's process-wide C rand()
+        half = (image.width // 2, image.height // 2)
+        values = np.random.RandomState(rng.getrandbits(32)).normal(128, 64, (half[1], half[0]))
+        specks = Image.fromarray(np.where(values < cutoff, 0, 255).astype(np.uint8), 'L')
+        specks = specks.resize(image.size, Image.NEAREST)
+        image = ImageChops.darker(image, specks.convert('RGB'))
+        image = image.filter(ImageFilter.GaussianBlur(radius=rng.uniform(0, 0.8 * noise)))
+    if rotation:
+        image = image.rotate(rotation, resample=Image.BICUBIC, expand=True, fillcolor='white')
+    return image
+
+def generate_document(index, folder, seed, options):
+    """Draw corpus document number `index` and return its manifest entry
+
+    Every random choice comes from a generator seeded by (seed, index), so a
+    corpus is identical however its documents are spread across workers.
+    """
+    rng = random.Random(f'{seed}:{index}')
+    kind = ('invoice', 'receipt', 'form')[index % 3]
+    fonts = available_fonts()
+    style = {
+        'font': rng.choice(fonts) if fonts else DEFAULT_STYLE['font'],
+        'font_scale': rng.uniform(0.85, 1.2),
+        'margin': rng.randint(30, 90),
+        'top': rng.randint(0, 60),
+        'column': rng.randint(300, 520)
+    }
+    date = (datetime(2024, 12, 31) - timedelta(days=rng.randint(0, 730))).strftime(
+        rng.choice(["%d/%m/%Y", "%d-%m-%Y", "%d %b %Y"]))
+    noise = rng.uniform(0, options['noise'])
+    rotation = round(rng.uniform(-options['rotation'], options['rotation']), 2)
+
+    if kind == 'invoice':
+        number = f"INV-{rng.randint(2020, 2024)}-{index:06d}"
+        company = rng.choice(COMPANIES)
+        amount = round(rng.uniform(500, 5000), 2)
+        pages = [draw_invoice(number, company, amount, date, style)]
+        fields = {'invoice_number': number, 'company_name': company, 'date': date,
+                  'amount': f"{amount * 1.1:.2f}", 'tax': f"{amount * 0.1:.2f}"}
+        if rng.random() < options['multipage']:
+            count = rng.randint(2, options['max_pages'])
+            pages += [draw_continuation(number, page, count, style) for page in range(2, count + 1)]
+        document_type = 'Invoice'
+    elif kind == 'receipt':
+        number = f"RCP-{index:06d}"
+        company = rng.choice(STORES)
+        amount = round(rng.uniform(10, 100), 2)
+        pages = [draw_receipt(number, company, amount, date, style)]
+        fields = {'invoice_number': number, 'company_name': company, 'date': date,
+                  'amount': f"{amount:.2f}"}
+        document_type = 'Receipt'
+    else:
+        company = rng.choice(COMPANIES)
+        pages = [draw_form(rng.choice(FORM_TYPES), company, date, style)]
+        fields = {'company_name': company, 'date': date}
+        document_type = 'Form'
+
+    pages = [degrade(page, rng, noise, rotation) for page in pages]
+    if len(pages) > 1:
+        file_name = f"{kind}_{index:06d}.pdf"
+        pages[0].save(os.path.join(folder, file_name), 'PDF', save_all=True,
+                      append_images=pages[1:], resolution=100)
+    else:
+        file_name = f"{kind}_{index:06d}.png"
+        # Fast compression: corpus generation is bound by PNG encoding otherwise
+        pages[0].save(os.path.join(folder, file_name), 'PNG', compress_level=1)
+
+    return {
+        'file_name': file_name,
+        'document_type': document_type,
+        'pages': len(pages),
+        'fields': fields,
+        'variation': {'font': os.path.basename(style['font']), 'font_scale': round(style['font_scale'], 2),
+                      'noise': round(noise, 2), 'rotation': rotation}
+    }
+
+def _generate_range(args):
+    start, stop, folder, seed, options = args
+    return [generate_document(index, folder, seed, options) for index in range(start, stop)]
+
+def generate_corpus(folder, count, seed=0, workers=None, noise=1.0, rotation=3.0,
+                    multipage=0.1, max_pages=5, chunk=50):
+    """Generate `count` documents across `workers` processes and write manifest.json
+
+    Returns the manifest: one entry per document with its file name, type,
+    page count, expected fields and the variations applied.
+    """
+    os.makedirs(folder, exist_ok=True)
+    options = {'noise': noise, 'rotation': rotation, 'multipage': multipage, 'max_pages': max_pages}
+    ranges = [(start, min(start + chunk, count), folder, seed, options) for start in range(0, count, chunk)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        documents = [entry for batch in map(_generate_range, ranges) for entry in batch]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            documents = [entry for batch in executor.map(_generate_range, ranges) for entry in batch]
+
+    manifest = {'seed': seed, 'count': count, 'options': options, 'documents': documents}
+    with open(os.path.join(folder, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+def create_demo_documents():
+    """Create the nine demo documents in static/sample_docs"""
     # Create sample_docs directory
     os.makedirs('static/sample_docs', exist_ok=True)
-    
-    # Sample data
-    companies = [
-        "ABC Traders Pty Ltd",
-        "Sydney Tech Solutions",
-        "Melbourne Business Co",
-        "Perth Digital Services",
-        "Brisbane Innovation Hub"
-    ]
-    
+
     # Create invoices
     for i in range(3):
         invoice_num = f"INV-2024-{1000 + i}"
-        company = random.choice(companies)
+        company = random.choice(COMPANIES)
         amount = random.uniform(500, 5000)
         date = (datetime.now() - timedelta(days=random.randint(1, 30))).strftime("%d/%m/%Y")
         create_sample_invoice(invoice_num, company, amount, date, f"static/sample_docs/invoice_{i+1}.png")
-    
+
     # Create receipts
     for i in range(3):
         receipt_num = f"RCP-{1000 + i}"
-        store = random.choice(["Coffee Corner", "Quick Mart", "City Cafe"])
+        store = random.choice(STORES)
         amount = random.uniform(10, 100)
         date = (datetime.now() - timedelta(days=random.randint(1, 7))).strftime("%d/%m/%Y")
         create_sample_receipt(receipt_num, store, amount, date, f"static/sample_docs/receipt_{i+1}.png")
-    
+
     # Create forms
-    form_types = ["Project Request", "Expense Report", "Timesheet"]
-    for i, form_type in enumerate(form_types):
-        company = random.choice(companies)
+    for i, form_type in enumerate(FORM_TYPES):
+        company = random.choice(COMPANIES)
         date = (datetime.now() - timedelta(days=random.randint(1, 14))).strftime("%d/%m/%Y")
         create_sample_form(form_type, company, date, f"static/sample_docs/form_{i+1}.png")
-    
+
     print("\nSample documents created successfully!")
     print("Files created in static/sample_docs/")
 
+def main():
+    """Create sample documents"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='generate a synthetic corpus into this directory')
+    parser.add_argument('-n', '--count', type=int, default=1000, help='corpus size')
+    parser.add_argument('--seed', type=int, default=0, help='corpus random seed')
+    parser.add_argument('--workers', type=int, help='generator processes (default: all cores)')
+    parser.add_argument('--noise', type=float, default=1.0, help='maximum noise level, 0 to disable')
+    parser.add_argument('--rotation', type=float, default=3.0, help='maximum skew in degrees')
+    parser.add_argument('--multipage', type=float, default=0.1, help='share of invoices that are multi-page PDFs')
+    parser.add_argument('--max-pages', type=int, default=5, help='pages in the longest multi-page invoice')
+    args = parser.parse_args()
+
+    if not args.corpus:
+        create_demo_documents()
+        return 0
+
+    start = time.perf_counter()
+    manifest = generate_corpus(args.corpus, args.count, seed=args.seed, workers=args.workers,
+                               noise=args.noise, rotation=args.rotation,
+                               multipage=args.multipage, max_pages=args.max_pages)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {manifest['count']} documents in {elapsed:.1f}s "
+          f"({manifest['count'] / elapsed:.0f}/s) into {args.corpus}")
+    print(f"Ground truth: {os.path.join(args.corpus, 'manifest.json')}")
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Load-test the /upload -> /extract flow against a running instance or the in-process Flask app.
+Reports throughput, error rate and latency percentiles overall and per time interval as JSON.
+"""
+
+import argparse
+import asyncio
+import glob
+import io
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+
+class HTTPTarget:
+    """A running instance, driven with aiohttp"""
+
+    def __init__(self, base_url, concurrency):
+        self.base_url = base_url.rstrip('/')
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency))
+
+    async def request(self, method, path, json_body=None, file=None):
+        data = None
+        if file is not None:
+            data = aiohttp.FormData()
+            data.add_field('file', file[1], filename=file[0])
+        async with self.session.request(method, self.base_url + path, json=json_body, data=data) as response:
+            try:
+                body = await response.json(content_type=None)
+            except ValueError:
+                body = None
+            return response.status, body
+
+    async def close(self):
+        await self.session.close()
+
+
+class FlaskTarget:
+    """The app in this process, driven through Flask test clients on a thread pool"""
+
+    def __init__(self, concurrency):
+        # Scratch store so load tests don't pollute the real analytics
+        os.environ.setdefault('DATABASE', os.path.join(tempfile.mkdtemp(prefix='idp-load-'), 'load.sqlite3'))
+        from app import app
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='load')
+
+    def _call(self, method, path, json_body, file):
+        kwargs = {'json': json_body} if json_body is not None else {}
+        if file is not None:
+            kwargs['data'] = {'file': (io.BytesIO(file[1]), file[0])}
+        response = self.app.test_client().open(path, method=method, **kwargs)
+        return response.status_code, response.get_json(silent=True)
+
+    async def request(self, method, path, json_body=None, file=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call, method, path, json_body, file)
+
+    async def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def load_documents(corpus):
+    """(file_name, bytes) for every document in a corpus directory or the sample docs"""
+    paths = sorted(path for path in glob.glob(os.path.join(corpus, '*'))
+                   if os.path.splitext(path)[1].lower() in ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.pdf'))
+    documents = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            documents.append((os.path.basename(path), f.read()))
+    return documents
+
+
+def bust_cache(document):
+    """The document with a unique trailer after its data, so uploads and the OCR cache see new content
+
+    PNG, JPEG, TIFF and PDF readers all ignore bytes past the end of the file's data.
+    """
+    file_name, content = document
+    return file_name, content + f'\n%load-test-{uuid.uuid4().hex}\n'.encode('ascii')
+
+
+async def upload_and_extract(target, document, poll_interval, timeout):
+    """One user flow: upload, queue extraction, poll until the job finishes
+
+    Returns (error or None, the job's OCR cache outcome or None).
+    """
+    status, body = await target.request('POST', '/upload', file=document)
+    if status != 200:
+        return f'upload {status}', None
+    status, body = await target.request('POST', '/extract', json_body={'filepath': body['filepath']})
+    if status != 202:
+        return f'extract {status}', None
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status, job = await target.request('GET', body['status_url'])
+        if status != 200:
+            return f'job {status}', None
+        if job['status'] == 'done':
+            return None, (job.get('data') or {}).get('ocr_cache')
+        if job['status'] == 'failed':
+            return 'job failed', None
+        await asyncio.sleep(poll_interval)
+    return 'job timeout', None
+
+
+async def run_load(target, documents, args):
+    """Send flows at the configured arrival rate (or back to back), at most `concurrency` at once"""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rng = random.Random(args.seed)
+    corpus = itertools.cycle(documents)
+    samples = []  # (completed_at, latency, error, OCR cache outcome)
+    start = time.monotonic()
+
+    async def flow(document):
+        # Latency counts from arrival, so time spent waiting for a slot isn't hidden
+        began = time.monotonic()
+        async with semaphore:
+            if args.cache_bust:
+                document = bust_cache(document)
+            try:
+                error, cache = await upload_and_extract(target, document, args.poll_interval, args.job_timeout)
+            except Exception as e:
+                error, cache = e.__class__.__name__, None
+            finished = time.monotonic()
+            samples.append((finished - start, finished - began, error, cache))
+
+    tasks = []
+    sent = 0
+    while time.monotonic() - start < args.duration and (args.requests is None or sent < args.requests):
+        if args.rate:
+            # Open loop: Poisson arrivals, independent of how fast responses come back
+            tasks.append(asyncio.create_task(flow(next(corpus))))
+            await asyncio.sleep(rng.expovariate(args.rate))
+        else:
+            # Closed loop: start a flow whenever a concurrency slot frees up
+            await semaphore.acquire()
+            semaphore.release()
+            tasks.append(asyncio.create_task(flow(next(corpus))))
+            await asyncio.sleep(0)
+        sent += 1
+    await asyncio.gather(*tasks)
+    return samples, time.monotonic() - start
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {}
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0]
+    return {'p50_ms': round(p50 * 1000, 1), 'p95_ms': round(p95 * 1000, 1), 'p99_ms': round(p99 * 1000, 1)}
+
+
+def summarize(samples, elapsed):
+    """Throughput, error rate, OCR cache hit ratio and latency percentiles for a set of completed flows"""
+    errors = [error for _, _, error, _ in samples if error]
+    ok = [latency for _, latency, error, _ in samples if not error]
+    # Bypassed lookups (engines whose output is not cached) count neither way
+    lookups = [cache for _, _, error, cache in samples if not error and cache in ('hit', 'miss')]
+    summary = {
+        'requests': len(samples),
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(samples), 4) if samples else 0,
+        'throughput_per_s': round(len(ok) / elapsed, 2) if elapsed else 0,
+        'cache_hit_ratio': round(lookups.count('hit') / len(lookups), 4) if lookups else None
+    }
+    summary.update(percentiles(ok))
+    return summary
+
+
+def build_report(samples, elapsed, interval):
+    """Overall summary plus one summary per `interval` seconds, by completion time"""
+    timeline = []
+    for bucket in range(int(elapsed // interval) + 1):
+        window = [sample for sample in samples if bucket * interval <= sample[0] < (bucket + 1) * interval]
+        if window:
+            timeline.append(dict(start_s=bucket * interval,
+                                 **summarize(window, min(interval, elapsed - bucket * interval))))
+    errors = {}
+    for _, _, error, _ in samples:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+    return {'overall': summarize(samples, elapsed), 'error_kinds': errors, 'timeline': timeline}
+
+
+async def main_async(args):
+    documents = load_documents(args.corpus)
+    if not documents:
+        print(f"No documents found in {args.corpus}", file=sys.stderr)
+        return 1
+
+    if args.url:
+        if not AIOHTTP_AVAILABLE:
+            print("Load testing a URL requires aiohttp (pip install aiohttp)", file=sys.stderr)
+            return 1
+        target = HTTPTarget(args.url, args.concurrency)
+    else:
+        target = FlaskTarget(args.concurrency)
+
+    try:
+        samples, elapsed = await run_load(target, documents, args)
+    finally:
+        await target.close()
+
+    report = {
+        'target': args.url or 'flask-test-client',
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'documents': len(documents),
+        'cache_bust': args.cache_bust
+    }
+    report.update(build_report(samples, elapsed, args.interval))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    return 0 if report['overall']['requests'] else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', help='base URL of a running instance (default: in-process test client)')
+    parser.add_argument('--corpus', default='static/sample_docs', help='directory of documents to replay')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='maximum flows in flight')
+    parser.add_argument('-r', '--rate', type=float, help='arrivals per second (default: closed loop)')
+    parser.add_argument('-d', '--duration', type=float, default=30, help='seconds to keep sending')
+    parser.add_argument('-n', '--requests', type=int, help='stop after this many flows')
+    parser.add_argument('--interval', type=float, default=5, help='timeline bucket width in seconds')
+    parser.add_argument('--poll-interval', type=float, default=0.2, help='seconds between job polls')
+    parser.add_argument('--job-timeout', type=float, default=120, help='seconds before a job counts as failed')
+    parser.add_argument('--seed', type=int, default=0, help='arrival process random seed')
+    parser.add_argument('--no-cache-bust', dest='cache_bust', action='store_false',
+                        help='replay documents byte for byte, letting repeats hit the upload and OCR caches')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,17 @@
 // Dashboard JavaScript for Analytics and Visualizations
 
 let analyticsData = null;
+let analyticsStream = null;
 let charts = {};
 
 // Initialize dashboard
 document.addEventListener('DOMContentLoaded', function() {
     initializeDashboard();
-    loadAnalytics();
+    if (window.EventSource) {
+        streamAnalytics();
+    } else {
+        loadAnalytics();
+    }
     setupROICalculator();
     setupChartControls();
 });
@@ -38,6 +43,39 @@ function loadAnalytics() {
         });
 }
 
+function streamAnalytics() {
+    // A snapshot arrives first, then only the figures that changed
+    analyticsStream = new EventSource('/analytics/events');
+    
+    analyticsStream.addEventListener('snapshot', event => {
+        analyticsData = JSON.parse(event.data);
+        updateMetrics(analyticsData);
+        updateCharts(analyticsData);
+        updateActivityTable(analyticsData);
+        removeLoadingStates();
+    });
+    
+    analyticsStream.addEventListener('delta', event => {
+        const delta = JSON.parse(event.data);
+        const chartDelta = delta.chart_data || {};
+        delete delta.chart_data;
+        analyticsData = Object.assign({}, analyticsData, delta, {
+            chart_data: Object.assign({}, analyticsData.chart_data, chartDelta)
+        });
+        
+        updateMetrics(analyticsData);
+        if ('document_types' in chartDelta) {
+            updateDocumentTypesChart(analyticsData);
+        }
+        if ('processing_times' in chartDelta || 'dates' in chartDelta || 'document_counts' in chartDelta) {
+            updateProcessingTimeChart(analyticsData);
+        }
+        if ('total_documents' in delta) {
+            updateActivityTable(analyticsData);
+        }
+    });
+}
+
 function updateMetrics(data) {
     // Update total documents
     document.getElementById('totalDocuments').textContent = data.total_documents || 0;
@@ -151,8 +189,10 @@ function updateDocumentTypesChart(data) {
 
 function updateProcessingTimeChart(data) {
     const chartData = data.chart_data || {};
+    // Daily averages, already downsampled by the server
     const processingTimes = chartData.processing_times || [];
     const dates = chartData.dates || [];
+    const documentCounts = chartData.document_counts || [];
     
     if (processingTimes.length === 0) {
         // Show empty state
@@ -179,6 +219,7 @@ function updateProcessingTimeChart(data) {
     const trace = {
         x: xData,
         y: processingTimes,
+        customdata: documentCounts,
         type: 'scatter',
         mode: 'lines+markers',
         line: {
@@ -189,7 +230,7 @@ function updateProcessingTimeChart(data) {
             color: '#2563eb',
             size: 6
         },
-        hovertemplate: '<b>Processing Time</b><br>Time: %{y:.2f}s<br>Document: %{x}<extra></extra>',
+        hovertemplate: '<b>Average Processing Time</b><br>Time: %{y:.2f}s<br>Date: %{x}<br>Documents: %{customdata}<extra></extra>',
         fill: 'tonexty'
     };
     
@@ -203,7 +244,7 @@ function updateProcessingTimeChart(data) {
             gridcolor: '#f1f5f9'
         },
         yaxis: {
-            title: 'Processing Time (seconds)',
+            title: 'Average Processing Time (seconds)',
             gridcolor: '#f1f5f9'
         },
         margin: { t: 40, b: 60, l: 60, r: 40 },
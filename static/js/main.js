@@ -2,6 +2,7 @@
 
 // Global variables
 let currentFile = null;
+let currentResult = null;
 let isProcessing = false;
 
 // DOM elements
@@ -89,14 +90,18 @@ function processFile(file) {
         return;
     }
     
-    // Validate file size (16MB max)
-    if (file.size > 16 * 1024 * 1024) {
-        showError('File size must be less than 16MB');
+    // Validate file size (1GB max through chunked uploads)
+    if (file.size > MAX_UPLOAD_SIZE) {
+        showError('File size must be less than 1GB');
         return;
     }
     
     currentFile = file;
-    uploadFile(file);
+    if (file.size > CHUNK_SIZE) {
+        uploadFileChunked(file);
+    } else {
+        uploadFile(file);
+    }
 }
 
 function uploadFile(file) {
@@ -127,6 +132,82 @@ function uploadFile(file) {
     });
 }
 
+// Files above the single-request limit go up in resumable chunks
+const CHUNK_SIZE = 8 * 1024 * 1024;
+const MAX_UPLOAD_SIZE = 1024 * 1024 * 1024;
+const CHUNK_RETRIES = 3;
+
+function uploadFileChunked(file) {
+    showLoading();
+    
+    fetch('/uploads', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size })
+    })
+    .then(response => response.json())
+    .then(upload => {
+        if (upload.error) {
+            throw new Error(upload.error);
+        }
+        return sendChunks(file, upload);
+    })
+    .then(data => {
+        showPreview(file);
+        extractData(data.filepath);
+    })
+    .catch(error => {
+        hideLoading();
+        showError(error.message);
+    });
+}
+
+async function sendChunks(file, upload, attempt = 0) {
+    const received = new Set(upload.received);
+    try {
+        for (let index = 0; index < upload.chunks; index++) {
+            if (received.has(index)) {
+                continue;
+            }
+            const chunk = file.slice(index * upload.chunk_size, (index + 1) * upload.chunk_size);
+            const buffer = await chunk.arrayBuffer();
+            const headers = {};
+            // crypto.subtle only exists on HTTPS and localhost
+            if (window.crypto && crypto.subtle) {
+                const digest = await crypto.subtle.digest('SHA-256', buffer);
+                headers['X-Chunk-SHA256'] = Array.from(new Uint8Array(digest))
+                    .map(byte => byte.toString(16).padStart(2, '0')).join('');
+            }
+            
+            const response = await fetch(`/uploads/${upload.upload_id}/chunks/${index}`, {
+                method: 'PUT',
+                headers: headers,
+                body: buffer
+            });
+            if (!response.ok) {
+                throw new Error((await response.json()).error || 'Chunk upload failed');
+            }
+        }
+        
+        const response = await fetch(`/uploads/${upload.upload_id}/complete`, { method: 'POST' });
+        const data = await response.json();
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        return data;
+    } catch (error) {
+        if (attempt >= CHUNK_RETRIES) {
+            throw error;
+        }
+        // Resume from whatever the server already has
+        const status = await fetch(`/uploads/${upload.upload_id}`).then(response => response.json());
+        if (status.error) {
+            throw error;
+        }
+        return sendChunks(file, status, attempt + 1);
+    }
+}
+
 function extractData(filepath) {
     showProcessing();
     
@@ -143,8 +224,12 @@ function extractData(filepath) {
             throw new Error(data.error);
         }
         
+        // Extraction runs in the background; follow its progress until it finishes
+        return window.EventSource ? watchJob(data.events_url) : pollJob(data.status_url);
+    })
+    .then(job => {
         hideLoading();
-        showResults(data.data);
+        showResults(job.data);
         showSuccess('Document processed successfully!');
     })
     .catch(error => {
@@ -153,6 +238,47 @@ function extractData(filepath) {
     });
 }
 
+function watchJob(eventsUrl) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(eventsUrl);
+        
+        source.addEventListener('progress', event => {
+            const update = JSON.parse(event.data);
+            showProgress(update.stage, update.progress);
+        });
+        source.addEventListener('done', event => {
+            source.close();
+            showProgress('done', 1);
+            resolve(JSON.parse(event.data));
+        });
+        source.addEventListener('failed', event => {
+            source.close();
+            reject(new Error(JSON.parse(event.data).error || 'Processing failed'));
+        });
+        // The browser reconnects dropped streams itself; CLOSED means it gave up
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED) {
+                reject(new Error('Lost connection to the server'));
+            }
+        };
+    });
+}
+
+function pollJob(statusUrl, interval = 500) {
+    return fetch(statusUrl)
+        .then(response => response.json())
+        .then(job => {
+            if (job.error) {
+                throw new Error(job.error);
+            }
+            if (job.status === 'done') {
+                return job;
+            }
+            return new Promise(resolve => setTimeout(resolve, interval))
+                .then(() => pollJob(statusUrl, interval));
+        });
+}
+
 function showPreview(file) {
     const reader = new FileReader();
     reader.onload = function(e) {
@@ -168,45 +294,28 @@ function showProcessing() {
     processingSection.style.display = 'block';
     processingSection.classList.add('fade-in');
     
-    // Animate progress
-    animateProgress();
+    showProgress('queued', 0);
 }
 
-function animateProgress() {
-    const progressFill = document.getElementById('progressFill');
-    const steps = document.querySelectorAll('.step');
-    
-    let progress = 0;
-    let currentStep = 0;
+// Processing step highlighted while the job is in each pipeline stage
+const STAGE_STEPS = {
+    queued: 0, running: 0, decode: 0,
+    preprocess: 1, ocr: 1,
+    extraction: 2,
+    done: 3
+};
+
+function showProgress(stage, progress) {
+    document.getElementById('progressFill').style.width = `${Math.round(progress * 100)}%`;
     
-    const interval = setInterval(() => {
-        progress += Math.random() * 15;
-        if (progress > 100) progress = 100;
-        
-        progressFill.style.width = progress + '%';
-        
-        // Update steps
-        if (progress > 25 && currentStep === 0) {
-            steps[0].classList.remove('active');
-            steps[1].classList.add('active');
-            currentStep = 1;
-        } else if (progress > 50 && currentStep === 1) {
-            steps[1].classList.remove('active');
-            steps[2].classList.add('active');
-            currentStep = 2;
-        } else if (progress > 75 && currentStep === 2) {
-            steps[2].classList.remove('active');
-            steps[3].classList.add('active');
-            currentStep = 3;
-        }
-        
-        if (progress >= 100) {
-            clearInterval(interval);
-        }
-    }, 200);
+    const current = STAGE_STEPS[stage] || 0;
+    document.querySelectorAll('.step').forEach((step, index) => {
+        step.classList.toggle('active', index === current);
+    });
 }
 
 function showResults(data) {
+    currentResult = data;
     resultsSection.style.display = 'block';
     resultsSection.classList.add('fade-in');
     
@@ -223,6 +332,16 @@ function showResults(data) {
         { label: 'Tax', value: data.tax, confidence: '87%' }
     ];
     
+    // Fields only some document types extract, e.g. form headers and contacts
+    [
+        { label: 'Form Type', value: data.form_type, confidence: '90%' },
+        { label: 'Contact Name', value: data.contact_name, confidence: '88%' },
+        { label: 'Email', value: data.email, confidence: '93%' },
+        { label: 'Phone', value: data.phone, confidence: '90%' }
+    ].forEach(field => {
+        if (field.value !== undefined) fields.push(field);
+    });
+    
     fields.forEach(field => {
         const row = document.createElement('tr');
         row.innerHTML = `
@@ -307,7 +426,7 @@ function exportCSV() {
 }
 
 function sendToAutomation() {
-    if (!currentFile) {
+    if (!currentResult) {
         showError('No data to send');
         return;
     }
@@ -319,13 +438,13 @@ function sendToAutomation() {
         headers: {
             'Content-Type': 'application/json',
         },
-        body: JSON.stringify({})
+        body: JSON.stringify(currentResult)
     })
     .then(response => response.json())
     .then(data => {
         hideLoading();
         if (data.success) {
-            showSuccess(`Data sent to automation system! ID: ${data.automation_id}`);
+            showSuccess(`Data queued for the automation system! ID: ${data.automation_id}`);
         } else {
             showError(data.message || 'Failed to send data');
         }
@@ -5,6 +5,16 @@ Test script for the Innovo IDP application
 
 import sys
 import os
+import io
+import json
+import time
+import itertools
+import zipfile
+import tempfile
+
+# Keep test runs out of the real document store
+os.environ.setdefault('DATABASE', os.path.join(tempfile.mkdtemp(), 'test.sqlite3'))
+os.environ.setdefault('AUTOMATION_SINK', 'file:' + os.path.join(tempfile.mkdtemp(), 'deliveries.jsonl'))
 
 def test_imports():
     """Test if all required modules can be imported"""
@@ -87,6 +97,1323 @@ def test_flask_routes():
         print(f"❌ Flask routes test failed: {e}")
         return False
 
+def wait_for_job(client, job_id, timeout=60):
+    """Poll a job until it leaves the queue"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f'/jobs/{job_id}').get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.1)
+    return job
+
+def test_job_queue():
+    """Test asynchronous extraction through the job queue"""
+    print("\nTesting job queue...")
+    
+    try:
+        from app import app
+        
+        with app.test_client() as client:
+            sample = os.path.join('static', 'sample_docs', 'invoice_1.png')
+            with open(sample, 'rb') as f:
+                response = client.post('/upload', data={'file': (f, 'invoice_1.png')})
+            filepath = response.get_json()['filepath']
+            
+            response = client.post('/extract', json={'filepath': filepath})
+            if response.status_code != 202:
+                print(f"❌ Extract did not enqueue a job: {response.status_code}")
+                return False
+            job_id = response.get_json()['job_id']
+            print("✅ Extract returns a job ID immediately")
+            
+            job = wait_for_job(client, job_id)
+            if job['status'] != 'done':
+                print(f"❌ Job did not complete: {job}")
+                return False
+            print(f"✅ Job completed: {job['data']['document_type']}")
+            
+            leftovers = [name for name in os.listdir(app.config['UPLOAD_FOLDER']) if '_processed' in name]
+            if leftovers:
+                print(f"❌ Preprocessing wrote temp files: {leftovers}")
+                return False
+            print("✅ Preprocessing stays in memory")
+            
+            response = client.get('/jobs/unknown')
+            if response.status_code != 404:
+                print(f"❌ Unknown job returned {response.status_code}")
+                return False
+            print("✅ Unknown job returns 404")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Job queue test failed: {e}")
+        return False
+
+def test_batch_extract():
+    """Test multi-file batch extraction with NDJSON streaming"""
+    print("\nTesting batch extraction...")
+    
+    try:
+        from app import app
+        
+        sample_dir = os.path.join('static', 'sample_docs')
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.write(os.path.join(sample_dir, 'form_1.png'), 'scans/form_1.png')
+            zf.writestr('notes.txt', 'not a document')
+        archive.seek(0)
+        
+        with app.test_client() as client:
+            with open(os.path.join(sample_dir, 'invoice_1.png'), 'rb') as invoice, \
+                    open(os.path.join(sample_dir, 'receipt_1.png'), 'rb') as receipt:
+                response = client.post('/batch_extract', data={
+                    'files': [(invoice, 'invoice_1.png'), (receipt, 'receipt_1.png'),
+                              (archive, 'backlog.zip')]
+                })
+            
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            if response.status_code != 200 or len(lines) != 3:
+                print(f"❌ Batch returned {response.status_code} with {len(lines)} results")
+                return False
+            if not all(line['success'] for line in lines):
+                print(f"❌ Batch had failures: {lines}")
+                return False
+            types = sorted(line['data']['document_type'] for line in lines)
+            print(f"✅ Batch streamed {len(lines)} NDJSON results: {', '.join(types)}")
+        
+        # A member that would decompress past MAX_CONTENT_LENGTH fails on its own
+        bomb = io.BytesIO()
+        with zipfile.ZipFile(bomb, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('huge.png', bytes(app.config['MAX_CONTENT_LENGTH'] + 1))
+            zf.write(os.path.join(sample_dir, 'receipt_1.png'), 'receipt_1.png')
+        bomb.seek(0)
+        with app.test_client() as client:
+            response = client.post('/batch_extract', data={'files': [(bomb, 'bomb.zip')]})
+            lines = {line['file_name']: line for line in map(json.loads, response.get_data(as_text=True).splitlines())}
+        if lines['huge.png']['success'] or 'limit' not in lines['huge.png']['error'] or \
+                not lines['receipt_1.png']['success']:
+            print(f"❌ Oversized zip member should fail alone: {lines}")
+            return False
+        print("✅ Oversized zip members are rejected per file, before decompressing")
+        
+        # A pool that cannot take work yields an error line per document instead of ending the stream
+        from app import JobQueue
+        queue = JobQueue(dict(app.config, OCR_WORKERS=1, OCR_BATCH_SIZE=1))
+        queue._get_executor().shutdown()
+        outcomes = list(queue.submit_batch([(f'doc_{i}.png', lambda: b'') for i in range(3)]))
+        if [outcome['success'] for outcome in outcomes] != [False] * 3 or queue.depth() != 0:
+            print(f"❌ Unsubmittable chunks should fail per document: {outcomes}")
+            return False
+        print("✅ Chunks the pool rejects fail per document")
+        
+        # A client that disconnects after the first line leaves no queue depth behind
+        queue = JobQueue(dict(app.config, OCR_WORKERS=1, OCR_BATCH_SIZE=1))
+        with open(os.path.join(sample_dir, 'invoice_1.png'), 'rb') as f:
+            content = f.read()
+        stream = queue.submit_batch([(f'invoice_{i}.png', lambda: content) for i in range(4)])
+        next(stream)
+        stream.close()
+        queue.executor.shutdown(wait=True)
+        if queue.depth() != 0:
+            print(f"❌ Queue depth stuck at {queue.depth()} after the client went away")
+            return False
+        print("✅ Abandoned batches give their queue depth back")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Batch extraction test failed: {e}")
+        return False
+
+def test_ocr_cache():
+    """Test the content-addressed OCR cache"""
+    print("\nTesting OCR cache...")
+    
+    try:
+        from app import app, OCRCache
+        
+        with tempfile.TemporaryDirectory() as folder:
+            cache = OCRCache(folder, max_entries=2, max_bytes=1000)
+            settings = {'engine': 'tesseract'}
+            key = OCRCache.make_key(b'same invoice', settings)
+            if key != OCRCache.make_key(b'same invoice', settings) or \
+                    key == OCRCache.make_key(b'same invoice', {'engine': 'easyocr'}):
+                print("❌ Cache keys must depend on content and settings")
+                return False
+            
+            cache.put(key, 'INVOICE #1')
+            if OCRCache(folder).get(key) != 'INVOICE #1':
+                print("❌ Cached text not persisted to disk")
+                return False
+            print("✅ Cache keyed by content and settings, persisted to disk")
+            
+            for i in range(5):
+                cache.put(OCRCache.make_key(str(i).encode(), settings), 'x' * 300)
+            cache.put(OCRCache.make_key(b'4', settings), 'y' * 300)  # overwrites count once
+            on_disk = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+            stats = cache.stats()
+            if stats['memory_entries'] != 2 or stats['disk_bytes'] > 1000:
+                print("❌ Cache exceeded its memory or disk bounds")
+                return False
+            if stats['disk_bytes'] != on_disk or OCRCache(folder).stats()['disk_bytes'] != on_disk:
+                print(f"❌ Tracked disk size {stats['disk_bytes']} differs from the {on_disk} bytes on disk")
+                return False
+            print("✅ LRU eviction keeps memory and disk within bounds, tracked without scanning")
+            
+            cache.put(key, 'INVOICE #1')
+            cache.clear()
+            if cache.get(key) is not None or OCRCache(folder).get(key) is not None or cache.stats()['disk_bytes']:
+                print("❌ Cleared cache still returned text")
+                return False
+            print("✅ clear() empties memory and disk")
+        
+        with app.test_client() as client:
+            cache_stats = client.get('/analytics').get_json()['cache']
+            if not {'hits', 'misses', 'hit_rate'} <= set(cache_stats):
+                print(f"❌ Analytics missing cache stats: {cache_stats}")
+                return False
+            print("✅ Analytics reports cache hits and misses")
+        
+        return True
+    except Exception as e:
+        print(f"❌ OCR cache test failed: {e}")
+        return False
+
+def test_field_extractor():
+    """Test the precompiled field extractor against per-pattern re.search"""
+    print("\nTesting field extractor...")
+    
+    try:
+        import re
+        from app import DocumentProcessor, FieldExtractor
+        processor = DocumentProcessor()
+        
+        for name in ('invoice.png', 'receipt.png', 'form.png', 'other.png'):
+            text = processor.mock_ocr_extraction(name) * 3
+            expected = {}
+            for field, patterns in processor.patterns.items():
+                for pattern in patterns:
+                    match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+                    if match:
+                        expected[field] = match.group(1).strip()
+                        break
+            if processor.extractor.extract(text) != expected:
+                print(f"❌ Extractor disagrees with re.search on {name}")
+                return False
+        print("✅ Extractor matches per-pattern re.search results")
+        
+        try:
+            FieldExtractor({'amount': [r'total [\d.]+']})
+            print("❌ Pattern without a capture group was accepted")
+            return False
+        except ValueError:
+            print("✅ Patterns without a capture group are rejected up front")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Field extractor test failed: {e}")
+        return False
+
+def test_document_classifier():
+    """Test classification and per-type extraction plans"""
+    print("\nTesting document classifier...")
+    
+    try:
+        from app import DocumentProcessor
+        processor = DocumentProcessor()
+        
+        expected = {'invoice.png': 'Invoice', 'receipt.png': 'Receipt', 'form.png': 'Form', 'other.png': 'Unknown'}
+        for name, document_type in expected.items():
+            if processor.classifier.classify(processor.mock_ocr_extraction(name)) != document_type:
+                print(f"❌ {name} not classified as {document_type}")
+                return False
+        # Words, not substrings: 'information' and 'platform' don't make a form
+        if processor.classifier.classify("Contact information for the platform team") != 'Unknown':
+            print("❌ Substrings of keywords counted as keywords")
+            return False
+        # A receipt mentioning an invoice once still reads as a receipt
+        if processor.classifier.classify("RECEIPT\nCashier: Anna\nCash paid\nReceipt #R-1\nAsk for a tax invoice") != 'Receipt':
+            print("❌ A single stray keyword outweighed the document's heading")
+            return False
+        print("✅ Documents classified by weighted keyword counts")
+        
+        receipt = processor.extract_structured_data("Corner Store\nReceipt #RCP-7\nPaid by cash\nInvoice queries: see counter\nTOTAL $9.50")
+        if receipt['document_type'] != 'Receipt' or receipt['invoice_number'] != 'RCP-7':
+            print(f"❌ Receipt used invoice-only patterns: {receipt['invoice_number']}")
+            return False
+        form = processor.extract_structured_data(processor.mock_ocr_extraction('form.png'))
+        if (form['company_name'], form['form_type'], form['email'], form['amount']) != \
+                ('Sydney Tech Solutions', 'Project Request', 'john@company.com', '15,000'):
+            print(f"❌ Unexpected form fields: {form}")
+            return False
+        if 'form_type' in processor.extract_structured_data(processor.mock_ocr_extraction('invoice.png')):
+            print("❌ Form fields extracted from an invoice")
+            return False
+        print("✅ Each type runs its own extraction plan")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Document classifier test failed: {e}")
+        return False
+
+def test_preprocess_profiles():
+    """Test the preprocessing quality tiers"""
+    print("\nTesting preprocessing profiles...")
+    
+    try:
+        from app import app, DocumentProcessor, PREPROCESS_PROFILES, OPENCV_AVAILABLE
+        processor = DocumentProcessor()
+        sample = os.path.join('static', 'sample_docs', 'receipt_1.png')
+        
+        if OPENCV_AVAILABLE:
+            for profile in PREPROCESS_PROFILES:
+                image = processor.preprocess_image(sample, profile)
+                if image.ndim != 2 or set(image.ravel().tolist()) - {0, 255}:
+                    print(f"❌ Profile {profile} did not produce a binary image")
+                    return False
+            print(f"✅ Profiles produce binary images: {', '.join(PREPROCESS_PROFILES)}")
+        
+        with app.test_client() as client:
+            response = client.post('/extract', json={'filepath': sample, 'profile': 'turbo'})
+            if response.status_code != 400:
+                print(f"❌ Unknown profile returned {response.status_code}")
+                return False
+            response = client.post('/extract', json={'filepath': sample, 'profile': 'fast'})
+            job = wait_for_job(client, response.get_json()['job_id'])
+            if job['status'] != 'done':
+                print(f"❌ Fast profile job did not complete: {job}")
+                return False
+            print("✅ Profile selectable per request")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Preprocessing profile test failed: {e}")
+        return False
+
+def test_ocr_registry():
+    """Test lazy OCR backend loading and automatic backend selection"""
+    print("\nTesting OCR backend registry...")
+    
+    try:
+        from app import (OCRBackend, OCREngineRegistry, MockBackend, ocr_registry,
+                         OCR_BENCHMARK_WORDS)
+        
+        if ocr_registry.loaded:
+            print(f"❌ OCR engines loaded at import: {sorted(ocr_registry.loaded)}")
+            return False
+        print("✅ No OCR engine loaded at import")
+        
+        class FakeBackend(OCRBackend):
+            def __init__(self, name, delay, words, broken=False):
+                self.name, self.delay, self.words, self.broken = name, delay, words, broken
+                self.loads = 0
+            
+            def load(self):
+                self.loads += 1
+                if self.broken:
+                    raise RuntimeError('no model weights')
+            
+            def read(self, image, file_name=None):
+                time.sleep(self.delay)
+                return [(None, ' '.join(self.words), 0.9)]
+        
+        backends = [FakeBackend('accurate', 0.05, OCR_BENCHMARK_WORDS),
+                    FakeBackend('quick', 0.0, OCR_BENCHMARK_WORDS[:-2]),
+                    FakeBackend('sloppy', 0.0, []),
+                    FakeBackend('broken', 0.0, [], broken=True),
+                    MockBackend()]
+        registry = OCREngineRegistry(backends, {'OCR_BACKEND': 'auto', 'OCR_MIN_ACCURACY': 0.8, 'OCR_CONCURRENCY': 2})
+        selected = registry.select(lambda content: content)
+        if selected.name != 'quick' or registry.select(None) is not selected:
+            print(f"❌ Expected the fastest accurate backend, got {selected.name}: {registry.benchmarks}")
+            return False
+        print(f"✅ Self-benchmark selects the fastest accurate backend: {selected.name}")
+        
+        if backends[0].loads != 1 or 'accurate' not in registry.load_times:
+            print("❌ Backends should load exactly once with a recorded load time")
+            return False
+        if registry.get('broken') is not None or registry.get('missing') is not None:
+            print("❌ Unavailable backends should return None")
+            return False
+        if registry.escalation(selected).name != 'accurate':
+            print("❌ Low-confidence pages should escalate to the most accurate backend")
+            return False
+        print("✅ Backends load once, failures are skipped, escalation targets the most accurate")
+        
+        return True
+    except Exception as e:
+        print(f"❌ OCR registry test failed: {e}")
+        return False
+
+def test_document_store():
+    """Test that processed documents persist in SQLite and are visible to other connections"""
+    print("\nTesting document store...")
+    
+    try:
+        import sqlite3
+        from app import DocumentStore, processor, record_result, document_store
+        
+        store = DocumentStore(os.path.join(tempfile.mkdtemp(), 'store.sqlite3'))
+        text = processor.mock_ocr_extraction('invoice_1.png')
+        for i, cache_status in enumerate(['miss', 'hit', 'bypass']):
+            store.add(processor.build_result(f'invoice_{i}.png', text, 1.0 + i, cache_status))
+        
+        if store.summary() != (3, 2.0) or store.type_counts() != {'Invoice': 3}:
+            print(f"❌ Unexpected aggregates: {store.summary()}, {store.type_counts()}")
+            return False
+        if store.cache_counts() != {'miss': 1, 'hit': 1, 'bypass': 1}:
+            print(f"❌ Unexpected cache counts: {store.cache_counts()}")
+            return False
+        print("✅ Summary, type and cache aggregates come from SQL")
+        
+        # A fresh connection (as another worker would open) sees the same rows
+        conn = sqlite3.connect(store.path)
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        rows = conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list('documents')")}
+        conn.close()
+        if journal_mode != 'wal' or rows != 3:
+            print(f"❌ Expected 3 rows in WAL mode, got {rows} in {journal_mode}")
+            return False
+        if not {'idx_documents_timestamp', 'idx_documents_document_type'} <= indexes:
+            print(f"❌ Missing indexes: {indexes}")
+            return False
+        print("✅ Rows are shared across connections, WAL and indexes are in place")
+        
+        documents = list(store.iter_documents(batch_size=2))
+        if [doc['file_name'] for doc in documents] != ['invoice_0.png', 'invoice_1.png', 'invoice_2.png']:
+            print("❌ iter_documents should return every row in insertion order")
+            return False
+        
+        before = document_store.summary()[0]
+        record_result(processor.build_result('stored.png', text, 0.5, 'bypass'))
+        if document_store.summary()[0] != before + 1:
+            print("❌ record_result should write through to the document store")
+            return False
+        print("✅ Results are written through and read back in batches")
+        
+        form = processor.build_result('form_1.png', processor.mock_ocr_extraction('form_1.png'), 1.0, 'miss')
+        store.add(form)
+        stored = list(store.iter_documents(document_type='Form'))
+        fields = ('form_type', 'contact_name', 'email', 'phone', 'amount')
+        if len(stored) != 1 or any(stored[0][field] != form[field] for field in fields):
+            print(f"❌ Form fields lost in the store: {stored}")
+            return False
+        
+        # Stores created before form fields existed gain their columns
+        legacy = os.path.join(tempfile.mkdtemp(), 'legacy.sqlite3')
+        conn = sqlite3.connect(legacy)
+        conn.execute('''CREATE TABLE documents (id INTEGER PRIMARY KEY, document_type TEXT NOT NULL,
+                        company_name TEXT, invoice_number TEXT, date TEXT, amount TEXT, tax TEXT,
+                        raw_text TEXT, processing_time REAL NOT NULL, timestamp TEXT NOT NULL,
+                        file_name TEXT, ocr_cache TEXT)''')
+        conn.commit()
+        conn.close()
+        migrated = DocumentStore(legacy)
+        migrated.add(form)
+        if next(migrated.iter_documents())['email'] != 'john@company.com':
+            print("❌ Legacy store did not gain the form columns")
+            return False
+        print("✅ Form fields round-trip through the store, old stores are migrated")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Document store test failed: {e}")
+        return False
+
+def test_analytics_aggregates():
+    """Test incremental analytics aggregates and downsampled chart series"""
+    print("\nTesting analytics aggregates...")
+    
+    try:
+        from app import DocumentStore, processor, downsample
+        
+        path = os.path.join(tempfile.mkdtemp(), 'aggregates.sqlite3')
+        store = DocumentStore(path)
+        text = processor.mock_ocr_extraction('receipt_1.png')
+        for day in range(1, 11):
+            for seconds in (0.2, 3.0):
+                result = processor.build_result(f'receipt_{day}.png', text, seconds, 'miss')
+                result['timestamp'] = f'2024-01-{day:02d}T12:00:00'
+                store.add(result)
+        
+        count, average = store.summary()
+        if count != 20 or abs(average - 1.6) > 1e-9 or store.type_counts() != {'Receipt': 20}:
+            print(f"❌ Unexpected running totals: {count}, {average}, {store.type_counts()}")
+            return False
+        histogram = store.latency_histogram()
+        counts = dict(zip(histogram['buckets'], histogram['counts']))
+        if counts['0.25'] != 10 or counts['5'] != 10 or sum(histogram['counts']) != 20:
+            print(f"❌ Unexpected latency histogram: {histogram}")
+            return False
+        print("✅ Totals, type counts and latency histogram are kept incrementally")
+        
+        daily = store.daily(7)
+        if len(daily) != 7 or daily[0][0] != '2024-01-04' or daily[-1] != ('2024-01-10', 2, 3.2):
+            print(f"❌ Unexpected daily buckets: {daily}")
+            return False
+        series = downsample(store.daily(10), 4)
+        if len(series['dates']) != 4 or sum(series['document_counts']) != 20:
+            print(f"❌ Unexpected downsampled series: {series}")
+            return False
+        print(f"✅ Daily buckets downsample to {len(series['dates'])} chart points")
+        
+        # Aggregates are rebuilt for databases written before they existed
+        store.connect().execute('DELETE FROM aggregates')
+        store.connect().commit()
+        if DocumentStore(path).summary()[0] != 20:
+            print("❌ Aggregates should be backfilled from existing documents")
+            return False
+        print("✅ Aggregates are backfilled from existing documents")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Analytics aggregates test failed: {e}")
+        return False
+
+def test_export_csv():
+    """Test the streaming CSV export, its filters and gzip option"""
+    print("\nTesting CSV export...")
+    
+    try:
+        import csv
+        import gzip
+        import app as app_module
+        from app import app, DocumentStore, processor
+        
+        original_store = app_module.document_store
+        app_module.document_store = store = DocumentStore(os.path.join(tempfile.mkdtemp(), 'export.sqlite3'))
+        try:
+            client = app.test_client()
+            if client.get('/export_csv').status_code != 400:
+                print("❌ Exporting an empty store should return 400")
+                return False
+            
+            for day, name in ((1, 'invoice_1.png'), (2, 'receipt_1.png'), (3, 'invoice_2.png')):
+                text = processor.mock_ocr_extraction(name)
+                result = processor.build_result(name, text, 1.0, 'miss')
+                result['timestamp'] = f'2024-03-{day:02d}T09:30:00'
+                store.add(result)
+            
+            response = client.get('/export_csv')
+            streamed = response.is_streamed
+            rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+            if not streamed or rows[0] != DocumentStore.COLUMNS or len(rows) != 4:
+                print(f"❌ Expected a streamed CSV with a stable header and 3 rows, got {rows[:1]}")
+                return False
+            print("✅ Export streams every document with a stable column order")
+            
+            response = client.get('/export_csv?start=2024-03-02&end=2024-03-03&document_type=Invoice')
+            rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+            if [row['file_name'] for row in rows] != ['invoice_2.png']:
+                print(f"❌ Filters returned {[row['file_name'] for row in rows]}")
+                return False
+            if client.get('/export_csv?start=March').status_code != 400:
+                print("❌ Malformed dates should be rejected")
+                return False
+            print("✅ Date range and document type filters apply")
+            
+            response = client.get('/export_csv?gzip=1')
+            rows = list(csv.reader(io.StringIO(gzip.decompress(response.data).decode('utf-8'))))
+            if response.mimetype != 'application/gzip' or len(rows) != 4:
+                print("❌ gzip export should decompress to the same CSV")
+                return False
+            print("✅ gzip export decompresses to the full CSV")
+        finally:
+            app_module.document_store = original_store
+        
+        return True
+    except Exception as e:
+        print(f"❌ CSV export test failed: {e}")
+        return False
+
+def test_typed_exports():
+    """Test amount/date normalization and the Parquet and XLSX exports"""
+    print("\nTesting typed exports...")
+    
+    try:
+        from datetime import date
+        import app as app_module
+        from app import (app, DocumentStore, processor, normalize_document,
+                         PYARROW_AVAILABLE, OPENPYXL_AVAILABLE)
+        
+        text = processor.mock_ocr_extraction('invoice_1.png')
+        result = processor.build_result('invoice_1.png', text, 1.5, 'miss')
+        result.update({'date': '15/12/2024', 'amount': '1,650.00', 'tax': '10%'})
+        typed = normalize_document(result)
+        if (typed['date'] != date(2024, 12, 15) or typed['amount'] != 1650.0
+                or typed['tax'] is not None or typed['tax_rate'] != 0.1):
+            print(f"❌ Unexpected normalization: {typed['date']}, {typed['amount']}, {typed['tax']}, {typed['tax_rate']}")
+            return False
+        if normalize_document(dict(result, date='sometime', amount='n/a'))['date'] is not None:
+            print("❌ Unparseable dates should normalize to None")
+            return False
+        print("✅ Amounts, dates and tax rates are normalized")
+        
+        original_store = app_module.document_store
+        app_module.document_store = store = DocumentStore(os.path.join(tempfile.mkdtemp(), 'typed.sqlite3'))
+        try:
+            for i in range(3):
+                store.add(processor.build_result(f'invoice_{i}.png', text, 1.0, 'miss'))
+            client = app.test_client()
+            
+            response = client.get('/export_parquet')
+            if not PYARROW_AVAILABLE:
+                if response.status_code != 501:
+                    print("❌ Parquet export without pyarrow should return 501")
+                    return False
+                print("⚠️  pyarrow not installed, Parquet export reports 501")
+            else:
+                import pyarrow.parquet as pq
+                table = pq.read_table(io.BytesIO(response.data))
+                if table.num_rows != 3 or str(table.schema.field('amount').type) != 'double':
+                    print(f"❌ Unexpected Parquet table: {table.schema}")
+                    return False
+                print("✅ Parquet export has typed columns")
+            
+            response = client.get('/export_xlsx')
+            if not OPENPYXL_AVAILABLE:
+                if response.status_code != 501:
+                    print("❌ Excel export without openpyxl should return 501")
+                    return False
+                print("⚠️  openpyxl not installed, Excel export reports 501")
+            else:
+                from openpyxl import load_workbook
+                rows = list(load_workbook(io.BytesIO(response.data)).active.values)
+                if len(rows) != 4 or rows[0][4] != 'amount' or not isinstance(rows[1][4], (int, float)):
+                    print(f"❌ Unexpected workbook rows: {rows[:2]}")
+                    return False
+                print("✅ Excel export has a header and typed rows")
+        finally:
+            app_module.document_store = original_store
+        
+        return True
+    except Exception as e:
+        print(f"❌ Typed export test failed: {e}")
+        return False
+
+def test_pdf_extraction():
+    """Test multi-page PDF rasterization with page-parallel OCR"""
+    print("\nTesting PDF extraction...")
+    
+    try:
+        from PIL import Image
+        from app import app, processor, PDF_AVAILABLE
+        
+        pages = [Image.open(os.path.join('static', 'sample_docs', name)).convert('RGB')
+                 for name in ('invoice_1.png', 'invoice_2.png', 'receipt_1.png')]
+        buffer = io.BytesIO()
+        pages[0].save(buffer, format='PDF', save_all=True, append_images=pages[1:])
+        
+        with app.test_client() as client:
+            response = client.post('/upload', data={'file': (io.BytesIO(buffer.getvalue()), 'invoice_pages.pdf')})
+            filepath = response.get_json()['filepath']
+            job = wait_for_job(client, client.post('/extract', json={'filepath': filepath}).get_json()['job_id'])
+        
+        if not PDF_AVAILABLE:
+            if job['status'] != 'failed' or 'PyMuPDF' not in job['error']:
+                print(f"❌ PDF jobs without PyMuPDF should fail clearly: {job}")
+                return False
+            print("⚠️  PyMuPDF not installed, PDF jobs fail with a clear error")
+            return True
+        
+        if job['status'] != 'done':
+            print(f"❌ PDF job did not complete: {job}")
+            return False
+        data = job['data']
+        if data['page_count'] != 3 or [page['page'] for page in data['pages']] != [1, 2, 3]:
+            print(f"❌ Expected 3 pages in order, got {data.get('pages')}")
+            return False
+        if data['document_type'] != 'Invoice' or not all(page['text'] for page in data['pages']):
+            print(f"❌ Unexpected merged record: {data['document_type']}")
+            return False
+        print(f"✅ PDF pages OCR'd in parallel and merged: {data['page_count']} pages")
+        
+        serial = processor.process_document(buffer.getvalue(), 'invoice_pages.pdf')
+        if [page['text'] for page in serial['pages']] != [page['text'] for page in data['pages']]:
+            print("❌ Serial and page-parallel PDF text differ")
+            return False
+        print("✅ Page-parallel text matches serial processing")
+        
+        if data['truncated']:
+            print("❌ A PDF within PDF_MAX_PAGES was flagged as truncated")
+            return False
+        max_pages = app.config['PDF_MAX_PAGES']
+        app.config['PDF_MAX_PAGES'] = 2
+        try:
+            with app.test_client() as client:
+                job = wait_for_job(client, client.post('/extract', json={'filepath': filepath}).get_json()['job_id'])
+            serial = processor.process_document(buffer.getvalue(), 'invoice_pages.pdf')
+        finally:
+            app.config['PDF_MAX_PAGES'] = max_pages
+        for record in (job.get('data') or {}, serial):
+            if (record.get('page_count'), record.get('truncated'), len(record.get('pages', []))) != (3, True, 2):
+                print(f"❌ Expected 2 of 3 pages and a truncation flag: {job}")
+                return False
+        print("✅ PDFs over PDF_MAX_PAGES report their page count and truncation")
+        
+        return True
+    except Exception as e:
+        print(f"❌ PDF extraction test failed: {e}")
+        return False
+
+def test_chunked_upload():
+    """Test resumable chunked uploads with checksum verification"""
+    print("\nTesting chunked uploads...")
+    
+    try:
+        import hashlib
+        from app import app
+        
+        with open(os.path.join('static', 'sample_docs', 'invoice_1.png'), 'rb') as f:
+            content = f.read()
+        sha256 = hashlib.sha256(content).hexdigest()
+        chunk_size = app.config['UPLOAD_CHUNK_SIZE']
+        app.config['UPLOAD_CHUNK_SIZE'] = 16 * 1024
+        try:
+            client = app.test_client()
+            upload = client.post('/uploads', json={'filename': 'invoice_1.png', 'size': len(content),
+                                                   'sha256': sha256}).get_json()
+            upload_id, size = upload['upload_id'], upload['chunk_size']
+            chunks = [content[i:i + size] for i in range(0, len(content), size)]
+            if upload['chunks'] != len(chunks) or upload['received']:
+                print(f"❌ Unexpected upload session: {upload}")
+                return False
+            
+            # Send every other chunk, as if the connection dropped midway
+            for index in range(0, len(chunks), 2):
+                client.put(f'/uploads/{upload_id}/chunks/{index}', data=chunks[index])
+            received = client.get(f'/uploads/{upload_id}').get_json()['received']
+            if received != list(range(0, len(chunks), 2)):
+                print(f"❌ Status should list received chunks: {received}")
+                return False
+            if client.post(f'/uploads/{upload_id}/complete').status_code != 400:
+                print("❌ Completing with missing chunks should fail")
+                return False
+            print(f"✅ Interrupted upload reports {len(received)}/{len(chunks)} chunks for resume")
+            
+            response = client.put(f'/uploads/{upload_id}/chunks/1', data=chunks[1],
+                                  headers={'X-Chunk-SHA256': '0' * 64})
+            if response.status_code != 400:
+                print("❌ A chunk failing its checksum should be rejected")
+                return False
+            for index in range(1, len(chunks), 2):
+                client.put(f'/uploads/{upload_id}/chunks/{index}', data=chunks[index],
+                           headers={'X-Chunk-SHA256': hashlib.sha256(chunks[index]).hexdigest()})
+            
+            response = client.post(f'/uploads/{upload_id}/complete')
+            filepath = response.get_json().get('filepath')
+            with open(filepath, 'rb') as f:
+                if response.status_code != 200 or f.read() != content:
+                    print("❌ Assembled upload differs from the original")
+                    return False
+            if client.get(f'/uploads/{upload_id}').status_code != 404:
+                print("❌ Completed uploads should be cleaned up")
+                return False
+            print("✅ Resumed upload assembles and verifies its checksum")
+            
+            upload_id = client.post('/uploads', json={'filename': 'invoice_1.png', 'size': len(content),
+                                                      'sha256': '0' * 64}).get_json()['upload_id']
+            for index, chunk in enumerate(chunks):
+                client.put(f'/uploads/{upload_id}/chunks/{index}', data=chunk)
+            if client.post(f'/uploads/{upload_id}/complete').status_code != 400:
+                print("❌ A whole-file checksum mismatch should be rejected")
+                return False
+            print("✅ Checksum mismatches are rejected")
+        finally:
+            app.config['UPLOAD_CHUNK_SIZE'] = chunk_size
+        
+        return True
+    except Exception as e:
+        print(f"❌ Chunked upload test failed: {e}")
+        return False
+
+def test_metrics():
+    """Test per-stage timings and the Prometheus metrics endpoint"""
+    print("\nTesting metrics...")
+    
+    try:
+        import app as app_module
+        from app import app, DocumentStore, processor, record_result, prometheus_labels
+        
+        sample = os.path.join('static', 'sample_docs', 'invoice_1.png')
+        result = processor.process_document(sample)
+        if not {'decode', 'preprocess', 'ocr', 'extraction'} <= set(result['timings']):
+            print(f"❌ Missing stage timings: {result['timings']}")
+            return False
+        print(f"✅ Stages timed: {', '.join(result['timings'])}")
+        
+        original_store = app_module.document_store
+        app_module.document_store = DocumentStore(os.path.join(tempfile.mkdtemp(), 'metrics.sqlite3'))
+        try:
+            record_result(result)
+            record_result(processor.process_document(sample))
+            response = app.test_client().get('/metrics')
+            body = response.get_data(as_text=True)
+        finally:
+            app_module.document_store = original_store
+        
+        expected = [
+            'idp_documents_processed_total{document_type="Invoice"} 2',
+            'idp_processing_seconds_bucket{le="+Inf"} 2',
+            'idp_stage_seconds_count{stage="ocr"} 2',
+            'idp_stage_seconds_count{stage="persistence"} 2',
+            'idp_job_queue_depth '
+        ]
+        missing = [line for line in expected if line not in body]
+        if response.status_code != 200 or not response.mimetype == 'text/plain' or missing:
+            print(f"❌ Metrics missing {missing}")
+            return False
+        if prometheus_labels({'file': 'a"b\\c'}) != '{file="a\\"b\\\\c"}':
+            print("❌ Label values should be escaped")
+            return False
+        print("✅ /metrics exposes document, stage, cache and queue metrics")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Metrics test failed: {e}")
+        return False
+
+def test_concurrency():
+    """Test that concurrent recording loses nothing and OCR reads are bounded"""
+    print("\nTesting concurrency...")
+    
+    try:
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from app import app, DocumentStore, JobQueue, OCRBackend, processor
+        
+        # Threads each write through their own connection; every result lands
+        store = DocumentStore(os.path.join(tempfile.mkdtemp(), 'concurrent.sqlite3'))
+        text = processor.mock_ocr_extraction('invoice_1.png')
+        results = [processor.build_result(f'invoice_{i}.png', text, 0.1, 'miss') for i in range(200)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(store.add, results))
+        if store.summary()[0] != 200 or store.counts('all') != {'': 200}:
+            print(f"❌ Lost results under concurrent writes: {store.summary()}")
+            return False
+        print("✅ 200 concurrent results recorded without loss")
+        
+        class CountingBackend(OCRBackend):
+            def __init__(self):
+                self.active = self.peak = 0
+                self.lock = threading.Lock()
+            
+            def read(self, image, file_name=None):
+                with self.slot():
+                    with self.lock:
+                        self.active += 1
+                        self.peak = max(self.peak, self.active)
+                    time.sleep(0.01)
+                    with self.lock:
+                        self.active -= 1
+                return []
+        
+        for thread_safe, concurrency, expected in ((True, 3, 3), (False, 3, 1)):
+            backend = CountingBackend()
+            backend.thread_safe = thread_safe
+            backend.limit(concurrency)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(backend.read, range(24)))
+            if backend.peak != expected:
+                print(f"❌ thread_safe={thread_safe} peaked at {backend.peak} reads, expected {expected}")
+                return False
+        print("✅ OCR reads are capped per engine, one at a time for thread-unsafe engines")
+        
+        # A second queue stands in for another gunicorn worker polling the job
+        with app.test_client() as client:
+            sample = os.path.join('static', 'sample_docs', 'invoice_1.png')
+            with open(sample, 'rb') as f:
+                filepath = client.post('/upload', data={'file': (f, 'invoice_1.png')}).get_json()['filepath']
+            job_id = client.post('/extract', json={'filepath': filepath}).get_json()['job_id']
+            if wait_for_job(client, job_id)['status'] != 'done':
+                print("❌ Job did not complete")
+                return False
+        job = JobQueue(app.config).get(job_id)
+        if job is None or job['status'] != 'done' or job['data']['document_type'] != 'Invoice':
+            print(f"❌ Another worker cannot see the finished job: {job}")
+            return False
+        print("✅ Finished jobs are visible to every worker")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Concurrency test failed: {e}")
+        return False
+
+def test_region_ocr():
+    """Test text block detection and block-by-block OCR"""
+    print("\nTesting region OCR...")
+    
+    try:
+        from app import OCRBackend, OPENCV_AVAILABLE, ocr_registry, processor
+        if not OPENCV_AVAILABLE:
+            print("⚠️  OpenCV not installed, pages are always OCR'd whole")
+            return True
+        import cv2
+        import numpy as np
+        
+        page = np.full((800, 600), 255, np.uint8)
+        cv2.putText(page, 'INVOICE', (40, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+        cv2.putText(page, 'Total: 100.00', (40, 600), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+        cv2.putText(page, 'Tax: 5.00', (380, 602), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+        regions = processor.detect_regions(page)
+        if regions is None or len(regions) != 3 or not regions[1][0] < regions[2][0]:
+            print(f"❌ Expected 3 blocks in reading order, got {regions}")
+            return False
+        print(f"✅ Detected {len(regions)} text blocks in reading order")
+        
+        noise = np.random.RandomState(0).randint(0, 2, (400, 400)).astype(np.uint8) * 255
+        if processor.detect_regions(noise) is not None:
+            print("❌ Dense pages should fall back to whole-page OCR")
+            return False
+        
+        class CropBackend(OCRBackend):
+            name = 'crops'
+            
+            def __init__(self):
+                self.shapes = []
+            
+            def read(self, image, file_name=None):
+                self.shapes.append(image.shape)
+                return [(None, f'block{len(self.shapes)}', 0.9)]
+        
+        backend = CropBackend()
+        selected = ocr_registry.selected
+        ocr_registry.selected = backend
+        try:
+            text, engine, blocks = processor.read_layout(page, 'page.png')
+        finally:
+            ocr_registry.selected = selected
+        
+        if len(backend.shapes) != 3 or sum(h * w for h, w in backend.shapes) >= page.size / 4:
+            print(f"❌ Expected 3 small crops, OCR'd {backend.shapes}")
+            return False
+        if engine != 'crops' or [block['bbox'] for block in blocks] != [list(region) for region in regions]:
+            print(f"❌ Blocks should keep their page bounding boxes: {blocks}")
+            return False
+        if len(text.splitlines()) != 3:
+            print(f"❌ Block text should be joined line by line: {text!r}")
+            return False
+        print("✅ Only the blocks are OCR'd, each keeping its bounding box")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Region OCR test failed: {e}")
+        return False
+
+def test_banded_ocr():
+    """Test top-down banded OCR with early exit"""
+    print("\nTesting banded OCR...")
+    
+    try:
+        from app import app, OCRBackend, OPENCV_AVAILABLE, ocr_cache, ocr_registry, processor
+        if not OPENCV_AVAILABLE:
+            print("⚠️  OpenCV not installed, pages are always OCR'd whole")
+            return True
+        import cv2
+        import numpy as np
+        
+        page = np.full((900, 600), 255, np.uint8)
+        cv2.putText(page, 'INVOICE', (40, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+        cv2.putText(page, 'Bill To: Acme', (40, 420), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+        cv2.putText(page, 'Total: 100.00', (40, 780), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        regions = processor.detect_regions(page)
+        texts = dict(zip([(h, w) for _, _, w, h in regions],
+                         ['INVOICE\nInvoice #: INV-9\nDate: 01/02/2024', 'Bill To: Acme', 'TOTAL $100.00']))
+        
+        class BandBackend(OCRBackend):
+            name = 'bands'
+            
+            def __init__(self, text, score):
+                self.text_for, self.score, self.shapes = text, score, []
+            
+            def read(self, image, file_name=None):
+                self.shapes.append(image.shape)
+                return [(None, self.text_for(image.shape), self.score)]
+        
+        def read(backend, bands=3):
+            selected, config = ocr_registry.selected, dict(app.config)
+            ocr_registry.selected = backend
+            app.config.update({'OCR_BANDS': bands, 'OCR_BAND_CONFIDENCE': 0.6})
+            try:
+                return processor.read_layout(page, 'page.png')
+            finally:
+                ocr_registry.selected = selected
+                app.config.update(config)
+        
+        backend = BandBackend(lambda shape: texts[shape], 0.9)
+        text, engine, blocks = read(backend)
+        if len(backend.shapes) != 1 or len(blocks) != 1 or 'INV-9' not in text:
+            print(f"❌ Expected to stop after the header band, read {backend.shapes}")
+            return False
+        print("✅ Stops once the invoice header fields are found")
+        
+        for backend, reason in ((BandBackend(lambda shape: texts[shape], 0.3), 'low confidence'),
+                                (BandBackend(lambda shape: 'Meeting notes', 0.9), 'an unclassified page')):
+            text, engine, blocks = read(backend)
+            if len(backend.shapes) != 3 or len(blocks) != 3:
+                print(f"❌ Expected every band to be read for {reason}, read {backend.shapes}")
+                return False
+        print("✅ Low-confidence and unclassified pages are read to the end")
+        
+        # Batched uploads are read band by band too, since the cache is keyed by the band setting
+        header = 'INVOICE\nInvoice #: INV-9\nDate: 01/02/2024'
+        backend = BandBackend(lambda shape: header, 0.9)
+        selected, config = ocr_registry.selected, dict(app.config)
+        ocr_registry.selected = backend
+        app.config.update({'OCR_BANDS': 3, 'OCR_BAND_CONFIDENCE': 0.6})
+        try:
+            ocr_cache.clear()
+            [result] = processor.process_batch([('page.png', cv2.imencode('.png', page)[1].tobytes())])
+        finally:
+            ocr_registry.selected = selected
+            app.config.update(config)
+        if len(backend.shapes) != 1 or 'INV-9' not in result['raw_text'] or not result.get('blocks'):
+            print(f"❌ Batched pages should stop after the header band, read {backend.shapes}")
+            return False
+        print("✅ Batched pages are read band by band")
+        
+        backend = BandBackend(lambda shape: texts[shape], 0.9)
+        read(backend, bands=0)
+        if len(backend.shapes) != 3:
+            print("❌ Banded OCR should be off unless OCR_BANDS is set")
+            return False
+        
+        bounds = processor.band_bounds(page, 3)
+        if bounds[0][0] != 0 or bounds[-1][1] != page.shape[0] or \
+                any(page[top].min() == 0 for top, _ in bounds[1:]):
+            print(f"❌ Strips should tile the page and be cut at blank rows: {bounds}")
+            return False
+        print(f"✅ Dense pages are split into {len(bounds)} strips at blank rows")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Banded OCR test failed: {e}")
+        return False
+
+def test_automation_delivery():
+    """Test the outbound automation queue: batching, retries and sinks"""
+    print("\nTesting automation delivery...")
+    
+    try:
+        import threading
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        import app as app_module
+        from app import app, DocumentStore, DeliveryQueue, DeliverySink, HTTPSink
+        
+        class FlakySink(DeliverySink):
+            def __init__(self, failures):
+                self.failures = failures
+                self.batches = []
+            
+            def send(self, records):
+                if self.failures:
+                    self.failures -= 1
+                    raise ConnectionError("sink unavailable")
+                self.batches.append(records)
+        
+        def wait_for(queue, ids, status, timeout=10):
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                records = [queue.get(automation_id) for automation_id in ids]
+                if all(record['status'] == status for record in records):
+                    return records
+                time.sleep(0.02)
+            return [queue.get(automation_id) for automation_id in ids]
+        
+        config = dict(app.config, AUTOMATION_RETRY_BASE=0.01, AUTOMATION_MAX_ATTEMPTS=3, AUTOMATION_BATCH_SIZE=10)
+        original_store = app_module.document_store
+        app_module.document_store = DocumentStore(os.path.join(tempfile.mkdtemp(), 'deliveries.sqlite3'))
+        try:
+            sink = FlakySink(failures=1)
+            queue = DeliveryQueue(config, sink)
+            queue.POLL_INTERVAL = 0.05
+            ids = [queue.enqueue({'invoice_number': f'INV-{i}'})['automation_id'] for i in range(5)]
+            records = wait_for(queue, ids, 'delivered')
+            delivered = [record['automation_id'] for batch in sink.batches for record in batch]
+            if any(record['status'] != 'delivered' for record in records) or sorted(delivered) != sorted(ids):
+                print(f"❌ Expected every record delivered once after a retry: {records}")
+                return False
+            if max(record['attempts'] for record in records) != 2:
+                print("❌ The failed batch should have been retried")
+                return False
+            print(f"✅ 5 records delivered in {len(sink.batches)} batch(es) after a failed attempt")
+            queue.stop()
+            
+            failing = DeliveryQueue(config, FlakySink(failures=100))
+            failing.POLL_INTERVAL = 0.05
+            record = wait_for(failing, [failing.enqueue({})['automation_id']], 'failed')[0]
+            failing.stop()
+            if record['status'] != 'failed' or record['attempts'] != 3 or 'unavailable' not in record['error']:
+                print(f"❌ Expected to give up after 3 attempts: {record}")
+                return False
+            print("✅ Records are given up on after AUTOMATION_MAX_ATTEMPTS")
+            
+            # Records left queued by a previous run go out once a new process resumes
+            app_module.document_store.add_delivery('AUTO_LEFTOVER', {'invoice_number': 'INV-9'})
+            sink = FlakySink(failures=0)
+            restarted = DeliveryQueue(config, sink)
+            restarted.POLL_INTERVAL = 0.05
+            original_queue = app_module.delivery_queue
+            app_module.delivery_queue = restarted
+            try:
+                with app.test_client() as client:
+                    client.get('/automations/AUTO_LEFTOVER')  # a worker's first request
+                record = wait_for(restarted, ['AUTO_LEFTOVER'], 'delivered')[0]
+            finally:
+                app_module.delivery_queue = original_queue
+                restarted.stop()
+            if record['status'] != 'delivered' or len(sink.batches) != 1:
+                print(f"❌ Pending records were not resumed after a restart: {record}")
+                return False
+            print("✅ Pending records are delivered after a restart without new work")
+        finally:
+            app_module.document_store = original_store
+        
+        received = []
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                self.send_response(200 if len(received) == 1 else 500)
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            sink = HTTPSink(f'http://127.0.0.1:{server.server_port}/inbox', timeout=5)
+            sink.send([{'automation_id': 'AUTO_1'}])
+            try:
+                sink.send([{'automation_id': 'AUTO_2'}])
+                print("❌ A 500 from the HTTP sink should raise")
+                return False
+            except Exception:
+                pass
+        finally:
+            server.shutdown()
+        if received[0] != {'records': [{'automation_id': 'AUTO_1'}]}:
+            print(f"❌ Unexpected HTTP sink payload: {received}")
+            return False
+        print("✅ HTTP sink posts batches and surfaces failures")
+        
+        with app.test_client() as client:
+            start = time.time()
+            response = client.post('/simulate_automation', json={'invoice_number': 'INV-1'})
+            elapsed = time.time() - start
+            body = response.get_json()
+            if response.status_code != 202 or elapsed > 0.5 or not body['automation_id']:
+                print(f"❌ Expected an immediate 202, got {response.status_code} after {elapsed:.2f}s")
+                return False
+            status = client.get(body['status_url'])
+            if status.status_code != 200 or status.get_json()['status'] not in ('queued', 'sending', 'delivered'):
+                print(f"❌ Unexpected automation status: {status.get_json()}")
+                return False
+            if client.get('/automations/AUTO_UNKNOWN').status_code != 404:
+                print("❌ Unknown automation should return 404")
+                return False
+        print("✅ /simulate_automation queues the record and returns immediately")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Automation delivery test failed: {e}")
+        return False
+
+def test_asgi():
+    """Test the ASGI serving mode keeps the route surface"""
+    print("\nTesting ASGI app...")
+    
+    try:
+        import importlib.util
+        missing = [name for name in ('starlette', 'a2wsgi', 'httpx', 'multipart')
+                   if importlib.util.find_spec(name) is None]
+        if missing:
+            print(f"⚠️  {', '.join(missing)} not installed, skipping ASGI test")
+            return True
+        from starlette.testclient import TestClient
+        from asgi import app as asgi_app
+        
+        with TestClient(asgi_app) as client:
+            sample = os.path.join('static', 'sample_docs', 'invoice_1.png')
+            with open(sample, 'rb') as f:
+                response = client.post('/upload', files={'file': ('invoice_1.png', f, 'image/png')})
+            if response.status_code != 200:
+                print(f"❌ Async upload failed: {response.status_code}")
+                return False
+            
+            response = client.post('/extract', json={'filepath': response.json()['filepath']})
+            if response.status_code != 202 or response.json()['status_url'] != f"/jobs/{response.json()['job_id']}":
+                print(f"❌ Async extract did not queue a job: {response.status_code}")
+                return False
+            status_url = response.json()['status_url']
+            for _ in range(200):
+                job = client.get(status_url).json()
+                if job['status'] in ('done', 'failed'):
+                    break
+                time.sleep(0.05)
+            if job['status'] != 'done':
+                print(f"❌ Job did not complete: {job}")
+                return False
+            print("✅ Upload, extract and job polling run on the event loop")
+            
+            events = client.get(response.json()['events_url'])
+            if not events.headers['content-type'].startswith('text/event-stream') or 'event: done' not in events.text:
+                print(f"❌ Async job stream should end with a done event: {events.text[-200:]!r}")
+                return False
+            
+            if client.post('/extract', json={'filepath': 'missing.png'}).status_code != 400:
+                print("❌ Missing files should be rejected")
+                return False
+            if client.get('/jobs/unknown').status_code != 404:
+                print("❌ Unknown job should return 404")
+                return False
+            
+            analytics = client.get('/analytics')
+            export = client.get('/export_csv')
+            if analytics.status_code != 200 or analytics.json()['total_documents'] < 1:
+                print(f"❌ Async analytics failed: {analytics.status_code}")
+                return False
+            if export.status_code != 200 or not export.text.startswith('document_type,'):
+                print(f"❌ Async CSV export failed: {export.status_code}")
+                return False
+            if client.get('/export_csv?start=yesterday').status_code != 400:
+                print("❌ Malformed export dates should be rejected")
+                return False
+            print("✅ Analytics and CSV export served asynchronously")
+            
+            if client.get('/metrics').status_code != 200 or client.get('/').status_code != 200:
+                print("❌ Other routes should be served by the Flask app")
+                return False
+            print("✅ Remaining routes are bridged to Flask")
+        
+        return True
+    except Exception as e:
+        print(f"❌ ASGI test failed: {e}")
+        return False
+
+def test_event_streams():
+    """Test server-sent job progress and analytics deltas"""
+    print("\nTesting event streams...")
+    
+    try:
+        import app as app_module
+        from app import (app, AnalyticsFeed, DocumentStore, JobFeed, JobQueue, processor, record_result,
+                         stage_reporter)
+        
+        original_store = app_module.document_store
+        app_module.document_store = DocumentStore(os.path.join(tempfile.mkdtemp(), 'events.sqlite3'))
+        try:
+            # A job another worker accepted, which its OCR worker reports has reached OCR
+            job = {'job_id': 'job-1', 'file_name': 'invoice_1.png', 'submitted_at': '2024-01-01T00:00:00',
+                   'finished_at': None, 'result': None, 'error': None}
+            app_module.document_store.save_job(job)
+            stage_reporter('job-1')('ocr')
+            view = JobQueue(app.config).get('job-1')
+            if view['status'] != 'running' or view['stage'] != 'ocr':
+                print(f"❌ Worker progress should be visible to every worker: {view}")
+                return False
+            feed = JobFeed('job-1')
+            message, finished = feed.poll()
+            if finished or 'event: progress' not in message or '"stage": "ocr"' not in message:
+                print(f"❌ Unexpected progress event: {message!r}")
+                return False
+            if feed.poll() != (None, False):
+                print("❌ Unchanged progress should not be resent")
+                return False
+            print("✅ Stage progress is reported once per stage")
+            
+            feed = AnalyticsFeed()
+            snapshot, _ = feed.poll()
+            idle, _ = feed.poll()
+            text = processor.mock_ocr_extraction('receipt_1.png')
+            record_result(processor.build_result('receipt_1.png', text, 0.5, 'miss'))
+            delta, _ = feed.poll()
+            if not snapshot.startswith('event: snapshot') or idle is not None:
+                print(f"❌ Expected one snapshot, then nothing until a change: {snapshot!r}, {idle!r}")
+                return False
+            delta = json.loads(delta.split('data: ', 1)[1])
+            if delta.get('total_documents') != 1 or delta['chart_data'].get('document_types') != {'Receipt': 1}:
+                print(f"❌ Unexpected analytics delta: {delta}")
+                return False
+            if 'error_reduction' in delta:
+                print("❌ Deltas should leave out unchanged figures")
+                return False
+            print("✅ Analytics stream sends a snapshot, then only what changed")
+        finally:
+            app_module.document_store = original_store
+        
+        # Single-threaded workers get short streams, whatever SSE_STREAM_SECONDS says
+        limits = app.config['SSE_STREAM_SECONDS'], app.config['SSE_SYNC_STREAM_SECONDS']
+        app.config.update({'SSE_STREAM_SECONDS': 300, 'SSE_SYNC_STREAM_SECONDS': 0})
+        try:
+            with app.test_client() as client:
+                body = client.get('/analytics/events', environ_overrides={'wsgi.multithread': False}).get_data(as_text=True)
+        finally:
+            app.config['SSE_STREAM_SECONDS'], app.config['SSE_SYNC_STREAM_SECONDS'] = limits
+        if body != 'retry: 2000\n\n':
+            print(f"❌ Streams on single-threaded workers should be capped: {body!r}")
+            return False
+        print("✅ Streams on single-threaded workers end within SSE_SYNC_STREAM_SECONDS")
+        
+        with app.test_client() as client:
+            sample = os.path.join('static', 'sample_docs', 'invoice_1.png')
+            with open(sample, 'rb') as f:
+                filepath = client.post('/upload', data={'file': (f, 'invoice_1.png')}).get_json()['filepath']
+            events_url = client.post('/extract', json={'filepath': filepath}).get_json()['events_url']
+            response = client.get(events_url)
+            body = response.get_data(as_text=True)
+            if response.mimetype != 'text/event-stream' or 'event: done' not in body:
+                print(f"❌ Job stream should end with a done event: {body[-200:]!r}")
+                return False
+            done = json.loads(body.split('event: done\ndata: ', 1)[1].split('\n', 1)[0])
+            if done['data']['document_type'] != 'Invoice':
+                print(f"❌ Done event should carry the result: {done}")
+                return False
+            if client.get('/jobs/unknown/events').status_code != 404:
+                print("❌ Unknown job stream should return 404")
+                return False
+            
+            response = client.get('/analytics/events')
+            first = b''.join(itertools.islice(response.response, 2)).decode('utf-8')
+            response.close()
+            if 'retry: ' not in first or 'event: snapshot' not in first:
+                print(f"❌ Analytics stream should open with a snapshot: {first[:100]!r}")
+                return False
+        print("✅ /jobs/<id>/events and /analytics/events stream over HTTP")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Event stream test failed: {e}")
+        return False
+
+def test_sample_corpus():
+    """Test that a seeded corpus is identical however many workers draw it"""
+    print("\nTesting sample corpus...")
+    
+    try:
+        from create_sample_docs import generate_corpus
+        
+        def draw(folder, workers):
+            generate_corpus(folder, 4, seed=7, workers=workers, multipage=0)
+            contents = {}
+            for name in sorted(os.listdir(folder)):
+                with open(os.path.join(folder, name), 'rb') as f:
+                    contents[name] = f.read()
+            return contents
+        
+        with tempfile.TemporaryDirectory() as one, tempfile.TemporaryDirectory() as two:
+            if draw(one, 1) != draw(two, 2):
+                print("❌ Same seed gave different documents with more workers")
+                return False
+        print("✅ Same seed, same corpus bytes with 1 and 2 workers")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Sample corpus test failed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🧪 Testing Innovo IDP Application")
@@ -95,7 +1422,28 @@ def main():
     tests = [
         test_imports,
         test_document_processing,
-        test_flask_routes
+        test_flask_routes,
+        test_job_queue,
+        test_batch_extract,
+        test_ocr_cache,
+        test_field_extractor,
+        test_document_classifier,
+        test_preprocess_profiles,
+        test_ocr_registry,
+        test_document_store,
+        test_analytics_aggregates,
+        test_export_csv,
+        test_typed_exports,
+        test_pdf_extraction,
+        test_chunked_upload,
+        test_metrics,
+        test_concurrency,
+        test_region_ocr,
+        test_banded_ocr,
+        test_automation_delivery,
+        test_asgi,
+        test_event_streams,
+        test_sample_corpus
     ]
     
     passed = 0